@@ -1,4 +1,5 @@
 cd /geminid1nb/qye/mpec
+START=$(date +%s)
 python proc.py "$(date +'%Y%m')"
 python mpccode.py
 cd makepages
@@ -10,10 +11,12 @@ python browser.py
 python mpc_stat.py
 python Individual_OMF.py
 python StationPage.py
+python PersonPage.py
 python Overall_OMF.py
 python TopObjectsObs_PieChart.py
 python stats.py
 python survey.py
 python ObjectPage.py
-cp *.html ../www
-cp -r /geminid1nb/qye/mpec/www/ /an/chiron~4/qye/mpecwatch
+python output_writer.py --since $START
+# unchanged files keep their mtime (see makepages/output_writer.py), so rsync only copies the changed ones
+rsync -a /geminid1nb/qye/mpec/www /an/chiron~4/qye/mpecwatch
@@ -1,121 +1,126 @@
-import plotly.express as px
-import pandas as pd
-import json
-import numpy as np
-import datetime
-import os
-import sys
-
-# --- Configuration/Constants ---
-MPC_CODE_PATH = '../mpccode.json'
-OBSCODE_STAT_PATH = 'obscode_stat.json'
-OUTPUT_BASE_DIR = "../www/byStation/OMF/"
-TOP_N_LIMIT = 10
-
-def sanitize_name(name, max_len=30):
-    """Truncates long names and appends '...'"""
-    return name[:max_len] + "..." if len(name) > max_len else name
-
-def generate_pie_chart(data_dict, station_code, filename_suffix, include_other=True):
-    """Generates and saves a pie chart."""
-    if 0 in data_dict:
-        print(f"Warning: Key '0' found in data_dict for {station_code}. Removing it.")
-        del data_dict[0]
-
-    # Get the top N items
-    sorted_items = sorted(data_dict.items(), key=lambda x: x[1], reverse=True)
-    top_items = dict(sorted_items[:TOP_N_LIMIT])
-
-    if include_other and len(data_dict) > TOP_N_LIMIT:
-        others_sum = sum(data_dict.values()) - sum(top_items.values())
-        if others_sum > 0:
-            top_items["Others"] = others_sum
-
-    df = pd.DataFrame(list(top_items.items()), columns=['Objects', 'Count'])
-    fig = px.pie(df, values='Count', names='Objects')
-
-    if not top_items:
-        fig.add_annotation(text="No Data Available",
-                           xref="paper", yref="paper",
-                           x=0.3, y=0.3, showarrow=False)
-
-    output_path = os.path.join(OUTPUT_BASE_DIR,
-                               f"{station_code}_{filename_suffix.replace(' ', '_')}.html")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_html(output_path)
-
-def generate_bar_chart(x_data, y_data, x_axis_title, y_axis_title, station_code, filename_suffix):
-    """Generates and saves a bar chart."""
-    fig = px.bar(x=x_data, y=y_data)
-    if x_axis_title == "Day of the Week":
-        fig.update_xaxes(tickmode='array',
-                         tickvals=[0, 1, 2, 3, 4, 5, 6],
-                         ticktext=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
-    fig.update_layout(xaxis_title=x_axis_title, yaxis_title=y_axis_title)
-    output_path = os.path.join(OUTPUT_BASE_DIR,
-                               f"{station_code}_{filename_suffix.replace(' ', '_')}.html")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    fig.write_html(output_path)
-
-
-
-def process_station(station_code, station_data):
-    """Process a single station's data from obscode_stat.json"""
-    print(f"Processing {station_code}...")
-    
-    # Extract OMF data from the station's JSON data
-    observers = station_data.get('OBS', {})
-    measurers = station_data.get('MEA', {})
-    facilities = station_data.get('FAC', {})
-    objects = station_data.get('OBJ', {})
-
-    # Sanitize names for better display in pie charts
-    sanitized_observers = {sanitize_name(name): count for name, count in observers.items()}
-    sanitized_measurers = {sanitize_name(name): count for name, count in measurers.items()}
-    sanitized_facilities = {sanitize_name(name): count for name, count in facilities.items()}
-    sanitized_objects = {sanitize_name(name): count for name, count in objects.items()}
-
-    # Get Time Frequency metrics from stats calculation (obscode_stat.py)
-    hourly = station_data.get('hourly_stats', [0]*24)
-    weekly = station_data.get('weekly_stats', [0]*7)
-    yearly = station_data.get('yearly_stats', [0]*366)
-    
-    # Generate Pie Charts
-    
-    # Generate Pie Charts
-    generate_pie_chart(sanitized_observers, station_code, "Top_Observers")
-    generate_pie_chart(sanitized_measurers, station_code, "Top_Measurers")
-    generate_pie_chart(sanitized_facilities, station_code, "Top_Facilities")
-    generate_pie_chart(sanitized_objects, station_code, "Top_Objects")
-
-    # Generate Time Frequency Charts
-    generate_bar_chart(np.arange(1, 367), yearly, "Day of the Year", "Number of Observations", station_code, "yearly")
-    generate_bar_chart(np.arange(0, 24), hourly, "Hour of the Day", "Number of Observations", station_code, "hourly")
-    generate_bar_chart(np.arange(0, 7), weekly, "Day of the Week", "Number of Observations", station_code, "weekly")
-
-# --- Main Execution ---
-if __name__ == "__main__":
-    print("Loading MPC codes...")
-    with open(MPC_CODE_PATH) as f:
-        mpccode = json.load(f)
-    
-    print("Loading observatory statistics...")
-    with open(OBSCODE_STAT_PATH) as f:
-        obscode_stat = json.load(f)
-    
-    print(f"Processing observatory OMF visualizations...")
-    
-    # Get station code from command line if provided, otherwise process all stations
-    if len(sys.argv) > 1:
-        station_codes = [sys.argv[1]]
-    else:
-        station_codes = list(mpccode.keys())
-    
-    # Process each station
-    for station_code in station_codes:
-        if station_code in obscode_stat:
-            process_station(station_code, obscode_stat[station_code])
-        else:
-            print(f"Warning: Station {station_code} not found in obscode_stat.json")
-    
-    print('Finished processing all stations.')
\ No newline at end of file
+import pandas as pd
+import json
+import numpy as np
+import datetime
+import os
+import argparse
+from figures import report
+from figure_queue import FigureQueue, chart
+
+# --- Configuration/Constants ---
+MPC_CODE_PATH = '../mpccode.json'
+OBSCODE_STAT_PATH = 'obscode_stat.json'
+OUTPUT_BASE_DIR = "../www/byStation/OMF/"
+TOP_N_LIMIT = 10
+
+def bundle_path(station_code):
+    """Figure bundle of a station's OMF and time frequency charts"""
+    return os.path.join(OUTPUT_BASE_DIR, f"{station_code}.json")
+
+def sanitize_name(name, max_len=30):
+    """Truncates long names and appends '...'"""
+    return name[:max_len] + "..." if len(name) > max_len else name
+
+def generate_pie_chart(data_dict, station_code, include_other=True):
+    """Spec of a pie chart of the top items."""
+    if 0 in data_dict:
+        print(f"Warning: Key '0' found in data_dict for {station_code}. Removing it.")
+        del data_dict[0]
+
+    # Get the top N items
+    sorted_items = sorted(data_dict.items(), key=lambda x: (-x[1], str(x[0])))
+    top_items = dict(sorted_items[:TOP_N_LIMIT])
+
+    if include_other and len(data_dict) > TOP_N_LIMIT:
+        others_sum = sum(data_dict.values()) - sum(top_items.values())
+        if others_sum > 0:
+            top_items["Others"] = others_sum
+
+    df = pd.DataFrame(list(top_items.items()), columns=['Objects', 'Count'])
+    calls = []
+    if not top_items:
+        calls.append(('add_annotation', dict(text="No Data Available",
+                                             xref="paper", yref="paper",
+                                             x=0.3, y=0.3, showarrow=False)))
+    return chart('pie', calls, data_frame=df, values='Count', names='Objects')
+
+def generate_bar_chart(x_data, y_data, x_axis_title, y_axis_title):
+    """Spec of a bar chart."""
+    calls = []
+    if x_axis_title == "Day of the Week":
+        calls.append(('update_xaxes', dict(tickmode='array',
+                                           tickvals=[0, 1, 2, 3, 4, 5, 6],
+                                           ticktext=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])))
+    calls.append(('update_layout', dict(xaxis_title=x_axis_title, yaxis_title=y_axis_title)))
+    return chart('bar', calls, x=x_data, y=y_data)
+
+
+
+def process_station(queue, station_code, station_data):
+    """Process a single station's data from obscode_stat.json"""
+    print(f"Processing {station_code}...")
+    
+    # Extract OMF data from the station's JSON data
+    observers = station_data.get('OBS', {})
+    measurers = station_data.get('MEA', {})
+    facilities = station_data.get('FAC', {})
+    objects = station_data.get('OBJ', {})
+
+    # Sanitize names for better display in pie charts
+    sanitized_observers = {sanitize_name(name): count for name, count in observers.items()}
+    sanitized_measurers = {sanitize_name(name): count for name, count in measurers.items()}
+    sanitized_facilities = {sanitize_name(name): count for name, count in facilities.items()}
+    sanitized_objects = {sanitize_name(name): count for name, count in objects.items()}
+
+    # Get Time Frequency metrics from stats calculation (obscode_stat.py)
+    hourly = station_data.get('hourly_stats', [0]*24)
+    weekly = station_data.get('weekly_stats', [0]*7)
+    yearly = station_data.get('yearly_stats', [0]*366)
+    
+    # all charts of a station go to one bundle, rendered by its station page (see figures.py)
+    # and built by the workers of the queue (see figure_queue.py)
+    with queue.bundle(bundle_path(station_code)) as bundle:
+        # Generate Pie Charts
+        bundle.add("Top_Observers", generate_pie_chart(sanitized_observers, station_code))
+        bundle.add("Top_Measurers", generate_pie_chart(sanitized_measurers, station_code))
+        bundle.add("Top_Facilities", generate_pie_chart(sanitized_facilities, station_code))
+        bundle.add("Top_Objects", generate_pie_chart(sanitized_objects, station_code))
+
+        # Generate Time Frequency Charts
+        bundle.add("yearly", generate_bar_chart(np.arange(1, 367), yearly, "Day of the Year", "Number of Observations"))
+        bundle.add("hourly", generate_bar_chart(np.arange(0, 24), hourly, "Hour of the Day", "Number of Observations"))
+        bundle.add("weekly", generate_bar_chart(np.arange(0, 7), weekly, "Day of the Week", "Number of Observations"))
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate the OMF and time frequency charts of the stations')
+    parser.add_argument('station', nargs='?', help='Station code (default: all stations)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='Number of worker processes building the figures (default: number of cores)')
+    args = parser.parse_args()
+
+    print("Loading MPC codes...")
+    with open(MPC_CODE_PATH) as f:
+        mpccode = json.load(f)
+    
+    print("Loading observatory statistics...")
+    with open(OBSCODE_STAT_PATH) as f:
+        obscode_stat = json.load(f)
+    
+    print(f"Processing observatory OMF visualizations...")
+    
+    # Get station code from command line if provided, otherwise process all stations
+    if args.station:
+        station_codes = [args.station]
+    else:
+        station_codes = list(mpccode.keys())
+    
+    # Process each station
+    with FigureQueue(jobs=args.jobs) as queue:
+        for station_code in station_codes:
+            if station_code in obscode_stat:
+                process_station(queue, station_code, obscode_stat[station_code])
+            else:
+                print(f"Warning: Station {station_code} not found in obscode_stat.json")
+    
+    print('Finished processing all stations.')
+    report()
\ No newline at end of file
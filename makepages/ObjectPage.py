@@ -5,9 +5,11 @@ import sys
 import datetime
 import os
 import json
-import plotly.express as px
 import pandas as pd
 import logging
+from page_layout import PageWriter
+from figures import figure_div, viewer_tags
+from figure_queue import FigureQueue, chart
 
 # Configuration
 DB_PATH = '../mpecwatch_v4.db'
@@ -29,6 +31,11 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 OBSCODE_STAT_PATH = 'obscode_stat.json'
 
+OBJECT_PAGE_STYLE = """
+    <style>
+        .section-header { margin-top: 30px; margin-bottom: 15px; }
+    </style>"""
+
 def get_related_designations(cursor, object_designation):
     """
     Retrieve all related designations for a specific object from the DOUIdentifier table.
@@ -92,7 +99,7 @@ def get_object_observations(cursor, object_designation):
     observations = []
     
     # Try to find observations in station tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'station_%'")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'station_%' ORDER BY name")
     station_tables = cursor.fetchall()
     
     for (table_name,) in station_tables:
@@ -127,7 +134,7 @@ def get_object_observations(cursor, object_designation):
     return observations
 
 def create_observation_timeline(observations):
-    """Create a timeline plot of observations."""
+    """Spec of a timeline plot of observations."""
     if not observations:
         return None
     
@@ -135,39 +142,37 @@ def create_observation_timeline(observations):
     df['datetime'] = pd.to_datetime(df['time'], unit='s')
     df['year'] = df['datetime'].dt.year
     
-    # Create timeline figure
-    fig = px.scatter(df, x='datetime', y='station', 
-                     color='mpec_type', size_max=10,
-                     title=f"Observation Timeline",
-                     labels={'datetime': 'Date', 'station': 'Observatory Station'})
-    
     # Mark discoveries
+    calls = []
     discoveries = df[df['discovery'] == 1]
     if not discoveries.empty:
-        fig.add_scatter(x=discoveries['datetime'], y=discoveries['station'],
-                       mode='markers', marker=dict(symbol='star', size=15, color='gold'),
-                       name='Discovery', showlegend=True)
+        calls.append(('add_scatter', dict(x=discoveries['datetime'], y=discoveries['station'],
+                                          mode='markers', marker=dict(symbol='star', size=15, color='gold'),
+                                          name='Discovery', showlegend=True)))
     
-    fig.update_layout(height=400, showlegend=True)
-    return fig
+    calls.append(('update_layout', dict(height=400, showlegend=True)))
+
+    # Create timeline figure
+    return chart('scatter', calls, data_frame=df, x='datetime', y='station', 
+                 color='mpec_type', size_max=10,
+                 title=f"Observation Timeline",
+                 labels={'datetime': 'Date', 'station': 'Observatory Station'})
 
 def create_station_contribution_chart(observations):
-    """Create a chart showing station contributions."""
+    """Spec of a chart showing station contributions."""
     if not observations:
         return None
     
     df = pd.DataFrame(observations)
     station_counts = df['station'].value_counts()
     
-    fig = px.bar(x=station_counts.index, y=station_counts.values,
+    return chart('bar', [('update_layout', dict(height=400))],
+                 x=station_counts.index, y=station_counts.values,
                  title="Observatory Station Contributions",
                  labels={'x': 'Observatory Station', 'y': 'Number of Observations'})
-    
-    fig.update_layout(height=400)
-    return fig
 
-def generate_object_page(object_designation, mpccode_data, cursor):
-    """Generate an HTML page for the specified object."""
+def generate_object_page(object_designation, mpccode_data, cursor, queue):
+    """Generate an HTML page for the specified object; its figures are built by `queue`."""
     
     # Get basic object information
     mpecs = get_object_mpecs(cursor, object_designation)
@@ -194,68 +199,67 @@ def generate_object_page(object_designation, mpccode_data, cursor):
             object_type = mpec[6] or "Unknown"
             break
     
-    # Create visualizations
+    # Create visualizations, rendered by the page from one bundle (see figures.py)
     timeline_fig = create_observation_timeline(observations)
     station_fig = create_station_contribution_chart(observations)
+    bundle_url = f"figures/object_{object_designation}.json"
+    if timeline_fig or station_fig:
+        with queue.bundle(os.path.join(OUTPUT_BASE_DIR, bundle_url)) as bundle:
+            if timeline_fig:
+                bundle.add("timeline", timeline_fig)
+            if station_fig:
+                bundle.add("stations", station_fig)
     
-    # Generate HTML content
-    html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>MPEC Watch - Object {object_designation}</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body {{ padding-top: 20px; }}
-        .section-header {{ margin-top: 30px; margin-bottom: 15px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
+    # Create output directory if it doesn't exist
+    os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
+
+    # Write the HTML file
+    output_path = os.path.join(OUTPUT_BASE_DIR, f"object_{object_designation}.html")
+    extra_scripts = viewer_tags('../') if timeline_fig or station_fig else ''
+    with PageWriter(output_path, f"MPEC Watch | Object {object_designation}", prefix='../', extra_head=OBJECT_PAGE_STYLE, extra_scripts=extra_scripts) as out:
+        out.write(f"""
         <h1>Object {object_designation}</h1>
         <p class="lead">{unpack_designation(object_designation)}</p>
         
         <div class="row">
             <div class="col-md-6">
-                <div class="card">
-                    <div class="card-header">
+                <div class="panel panel-default">
+                    <div class="panel-heading">
                         <h5>Object Information</h5>
                     </div>
-                    <div class="card-body">
+                    <div class="panel-body">
                         <table class="table table-sm">
                             <tr><td><strong>Designation:</strong></td><td>{object_designation}</td></tr>
                             <tr><td><strong>Unpacked:</strong></td><td>{unpack_designation(object_designation)}</td></tr>
                             <tr><td><strong>Object Type:</strong></td><td>{object_type}</td></tr>
                             <tr><td><strong>Total MPECs:</strong></td><td>{len(mpecs)}</td></tr>
                             <tr><td><strong>Total Observations:</strong></td><td>{len(observations)}</td></tr>
-    """
+    """)
     
-    if discovery_station:
-        station_name = mpccode_data.get(discovery_station, {}).get('name', discovery_station)
-        html_content += f"""
+        if discovery_station:
+            station_name = mpccode_data.get(discovery_station, {}).get('name', discovery_station)
+            out.write(f"""
                             <tr><td><strong>Discovered by:</strong></td><td>{discovery_station} ({station_name})</td></tr>
                             <tr><td><strong>Discovery Date:</strong></td><td>{discovery_date.strftime('%Y-%m-%d') if discovery_date else 'Unknown'}</td></tr>
                             <tr><td><strong>Discovery MPEC:</strong></td><td>{discovery_mpec}</td></tr>
-        """
+        """)
     
-    html_content += """
+        out.write("""
                         </table>
                     </div>
                 </div>
             </div>
             
             <div class="col-md-6">
-                <div class="card">
-                    <div class="card-header">
+                <div class="panel panel-default">
+                    <div class="panel-heading">
                         <h5>Related Designations</h5>
                     </div>
-                    <div class="card-body">
-    """
+                    <div class="panel-body">
+    """)
     
-    if related_designations:
-        html_content += """
+        if related_designations:
+            out.write("""
                         <table class="table table-striped table-sm">
                             <thead>
                                 <tr>
@@ -266,51 +270,49 @@ def generate_object_page(object_designation, mpccode_data, cursor):
                                 </tr>
                             </thead>
                             <tbody>
-        """
+        """)
         
-        for rel_dou, rel_type, author, mpec_id, is_retracted in related_designations:
-            html_content += f"""
+            for rel_dou, rel_type, author, mpec_id, is_retracted in related_designations:
+                out.write(f"""
                                 <tr>
                                     <td>{rel_dou}</td>
                                     <td>{rel_type.capitalize()}</td>
                                     <td>{author}</td>
                                     <td>{mpec_id}</td>
                                 </tr>
-            """
+            """)
         
-        html_content += """
+            out.write("""
                             </tbody>
                         </table>
-        """
-    else:
-        html_content += "<p>No related designations found.</p>"
+        """)
+        else:
+            out.write("<p>No related designations found.</p>")
     
-    html_content += """
+        out.write("""
                     </div>
                 </div>
             </div>
         </div>
         
         <h3 class="section-header">Observation Timeline</h3>
-    """
+    """)
     
-    if timeline_fig:
-        timeline_html = timeline_fig.to_html(include_plotlyjs='cdn', div_id="timeline")
-        html_content += timeline_html
-    else:
-        html_content += "<p>No observation data available for timeline.</p>"
+        if timeline_fig:
+            out.write(figure_div(bundle_url, "timeline", height=400))
+        else:
+            out.write("<p>No observation data available for timeline.</p>")
     
-    html_content += """
+        out.write("""
         <h3 class="section-header">Observatory Contributions</h3>
-    """
+    """)
     
-    if station_fig:
-        station_html = station_fig.to_html(include_plotlyjs='cdn', div_id="stations")
-        html_content += station_html
-    else:
-        html_content += "<p>No station contribution data available.</p>"
+        if station_fig:
+            out.write(figure_div(bundle_url, "stations", height=400))
+        else:
+            out.write("<p>No station contribution data available.</p>")
     
-    html_content += """
+        out.write("""
         <h3 class="section-header">MPEC History</h3>
         <div class="table-responsive">
             <table class="table table-striped">
@@ -324,13 +326,13 @@ def generate_object_page(object_designation, mpccode_data, cursor):
                     </tr>
                 </thead>
                 <tbody>
-    """
+    """)
     
-    for mpec in mpecs:
-        mpec_date = datetime.datetime.fromtimestamp(mpec[2]).strftime('%Y-%m-%d')
-        # mpec url structure: 'https://www.minorplanetcenter.net/mpec/' + century + ym[2:4] + '/' + century + ym[2:4] + halfmonth + str(tens_digit) + str(int(ones_digit)) + '.html'
-        url = get_mpec_url(mpec[0])
-        html_content += f"""
+        for mpec in mpecs:
+            mpec_date = datetime.datetime.fromtimestamp(mpec[2]).strftime('%Y-%m-%d')
+            # mpec url structure: 'https://www.minorplanetcenter.net/mpec/' + century + ym[2:4] + '/' + century + ym[2:4] + halfmonth + str(tens_digit) + str(int(ones_digit)) + '.html'
+            url = get_mpec_url(mpec[0])
+            out.write(f"""
                     <tr>
                         <td><a href="{url}">{mpec[0]}</a></td>
                         <td>{mpec_date}</td>
@@ -338,27 +340,13 @@ def generate_object_page(object_designation, mpccode_data, cursor):
                         <td>{mpec[1][:80]}{'...' if len(mpec[1]) > 80 else ''}</td>
                         <td>{mpec[3][:50]}{'...' if len(mpec[3]) > 50 else ''}</td>
                     </tr>
-        """
+        """)
     
-    html_content += """
+        out.write("""
                 </tbody>
             </table>
         </div>
-        
-    </div>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>
-    """
-    
-    # Create output directory if it doesn't exist
-    os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
-    
-    # Write the HTML file
-    output_path = os.path.join(OUTPUT_BASE_DIR, f"object_{object_designation}.html")
-    with open(output_path, "w", encoding='utf-8') as f:
-        f.write(html_content)
+    """)
 
     logger.info(f"Generated object page for {object_designation}")
 
@@ -472,19 +460,21 @@ def main():
     failed = 0
     failed_pages = []
     
-    for i, object_designation in enumerate(objects_to_process, 1):
-        try:
-            if len(objects_to_process) > 1:
-                logger.info(f"Processing {i}/{len(objects_to_process)}: {object_designation}")
+    # the figures of all pages are built by a pool of worker processes (see figure_queue.py)
+    with FigureQueue(log=logger.info) as queue:
+        for i, object_designation in enumerate(objects_to_process, 1):
+            try:
+                if len(objects_to_process) > 1:
+                    logger.info(f"Processing {i}/{len(objects_to_process)}: {object_designation}")
 
-            generate_object_page(object_designation, mpccode_data, cursor)
-            successful += 1
-            
-        except Exception as e:
-            # Log error but continue with next object
-            logger.error(f"Error generating page for {object_designation}: {e}")
-            failed += 1
-            failed_pages.append(object_designation)
+                generate_object_page(object_designation, mpccode_data, cursor, queue)
+                successful += 1
+                
+            except Exception as e:
+                # Log error but continue with next object
+                logger.error(f"Error generating page for {object_designation}: {e}")
+                failed += 1
+                failed_pages.append(object_designation)
     
     conn.close()
 
@@ -492,6 +482,8 @@ def main():
     if failed > 0:
         logger.warning(f"Failed: {failed} pages")
         logger.warning(f"Failed objects: {', '.join(failed_pages)}")
+    if queue.failures:
+        logger.warning(f"Failed figures: {len(queue.failures)}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Make a page for every observer/measurer and a sortable person browser (persons.html)
+
+ Everything is read from the person tables maintained by proc.py (see makepages/name_map.py):
+ PersonIndex holds, for every person, the stations and roles they appear in with MPEC counts
+ and first/last years of activity, keyed by PersonId, so a person's page only reads that
+ person's rows.
+
+ Usage: python PersonPage.py [PersonId ...]
+        (default: all persons)
+
+ (C) Quanzhi Ye
+
+"""
+
+import sqlite3, json, os, argparse, html
+from itertools import groupby
+from page_layout import PageWriter
+from volatile import placeholder, volatile_tag, mark_updated
+
+dbFile = '../mpecwatch_v4.db'
+mpccode = '../mpccode.json'
+outputDir = '../www/byPerson'
+
+ROLES = {'OBS': 'Observer', 'MEA': 'Measurer'}
+
+def person_rows(cursor, person_id):
+    """PersonIndex rows of one person (PersonIndex is keyed by PersonId)"""
+    return cursor.execute("SELECT StationCode, Role, MPECCount, FirstYear, LastYear FROM PersonIndex WHERE PersonId = ? ORDER BY StationCode, Role", (person_id,)).fetchall()
+
+def make_person_page(person_id, name, aliases, rows, stations):
+    with PageWriter('%s/person_%i.html' % (outputDir, person_id), 'MPEC Watch | %s' % html.escape(name), prefix='../', active='persons', extra_scripts=volatile_tag('../')) as out:
+        out.write("""
+          <div class="page-header">
+            <h1>%s</h1>
+            <p>Also published as: %s</p>
+            <p><a href="../persons.html">All observers and measurers</a></p>
+          </div>
+          <p>
+            Last update: UTC %s
+          </p>""" % (html.escape(name), html.escape(', '.join(aliases)) or '&mdash;', placeholder('updated')))
+
+        out.write("""
+          <table class="table table-striped"
+              data-toggle="table"
+              data-search="true"
+              data-show-export="true"
+              data-pagination="true">
+              <thead>
+                <tr>
+                  <th data-field="code" data-sortable="true">Code</th>
+                  <th data-field="obs" data-sortable="true">Observatory</th>
+                  <th data-field="role" data-sortable="true">Role</th>
+                  <th data-field="nmpec" data-sortable="true">MPECs</th>
+                  <th data-field="first" data-sortable="true">First year</th>
+                  <th data-field="last" data-sortable="true">Last year</th>
+                </tr>
+              </thead>
+              <tbody>""")
+
+        for station, role, n, first, last in rows:
+            out.write("""
+                <tr>
+                  <td><a href="../byStation/station_%s.html">%s</a></td>
+                  <td>%s</td>
+                  <td>%s</td>
+                  <td>%i</td>
+                  <td>%s</td>
+                  <td>%s</td>
+                </tr>""" % (station, station, html.escape(stations.get(station, {}).get('name', '')), ROLES.get(role, role), n, first or '', last or ''))
+
+        out.write("""
+              </tbody>
+          </table>""")
+
+def summarize(rows):
+    """#stations, #MPECs as observer, #MPECs as measurer, first and last year of a person's PersonIndex rows"""
+    n_obs = sum(n for station, role, n, first, last in rows if role == 'OBS')
+    n_mea = sum(n for station, role, n, first, last in rows if role == 'MEA')
+    firsts = [first for station, role, n, first, last in rows if first is not None]
+    lasts = [last for station, role, n, first, last in rows if last is not None]
+    return len(set(row[0] for row in rows)), n_obs, n_mea, min(firsts, default=''), max(lasts, default='')
+
+def make_browser(persons):
+    """persons: [(PersonId, name, summary)]"""
+    with PageWriter('../www/persons.html', 'MPEC Watch | Person Browser', active='persons', extra_scripts=volatile_tag()) as out:
+        out.write("""
+          <div class="page-header">
+            <h1>Observers and Measurers</h1>
+            <p>MPEC counts are per station: an MPEC listing a person at two stations counts twice.</p>
+          </div>
+          <p>
+            Last update: UTC %s
+          </p>
+          <table class="table table-striped"
+              data-toggle="table"
+              data-search="true"
+              data-show-export="true"
+              data-pagination="true"
+              data-sort-name="nobs"
+              data-sort-order="desc">
+              <thead>
+                <tr>
+                  <th data-field="name" data-sortable="true">Name</th>
+                  <th data-field="nstation" data-sortable="true">Stations</th>
+                  <th data-field="nobs" data-sortable="true">MPECs as observer</th>
+                  <th data-field="nmea" data-sortable="true">MPECs as measurer</th>
+                  <th data-field="first" data-sortable="true">First year</th>
+                  <th data-field="last" data-sortable="true">Last year</th>
+                </tr>
+              </thead>
+              <tbody>""" % placeholder('updated'))
+
+        for person_id, name, (n_station, n_obs, n_mea, first, last) in persons:
+            out.write("""
+                <tr>
+                  <td><a href="byPerson/person_%i.html">%s</a></td>
+                  <td>%i</td>
+                  <td>%i</td>
+                  <td>%i</td>
+                  <td>%s</td>
+                  <td>%s</td>
+                </tr>""" % (person_id, html.escape(name), n_station, n_obs, n_mea, first, last))
+
+        out.write("""
+              </tbody>
+          </table>""")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate person pages and the person browser')
+    parser.add_argument('persons', nargs='*', type=int, help='PersonIds to update (default: all persons)')
+    args = parser.parse_args()
+
+    with open(mpccode) as f:
+        stations = json.load(f)
+
+    os.makedirs(outputDir, exist_ok=True)
+    db = sqlite3.connect(dbFile)
+    cursor = db.cursor()
+
+    names = dict(cursor.execute("SELECT PersonId, Name FROM Person").fetchall())
+    aliases = {}
+    for alias, person_id in cursor.execute("SELECT Alias, PersonId FROM PersonAlias ORDER BY Alias"):
+        if alias != names.get(person_id):
+            aliases.setdefault(person_id, []).append(alias)
+
+    if args.persons:
+        for person_id in args.persons:
+            make_person_page(person_id, names[person_id], aliases.get(person_id, []), person_rows(cursor, person_id), stations)
+    else:
+        persons = []
+        index = cursor.execute("SELECT PersonId, StationCode, Role, MPECCount, FirstYear, LastYear FROM PersonIndex ORDER BY PersonId, StationCode, Role")
+        for person_id, rows in groupby(index, key=lambda row: row[0]):
+            rows = [row[1:] for row in rows]
+            make_person_page(person_id, names[person_id], aliases.get(person_id, []), rows, stations)
+            persons.append((person_id, names[person_id], summarize(rows)))
+        make_browser(persons)
+        print("Wrote %i person pages" % len(persons))
+
+    db.close()
+    mark_updated()
@@ -6,8 +6,14 @@ Make sure to run obscode_stat.py first!
 
 Generates individual station webpages including tables and statistics. 
 Graphs are generated in IndividualOMF.py - make sure to run IndividualOMF.py as well!
+
+Usage: python StationPage.py [auto | station ...] [--jobs N]
+Pages are built by N worker processes (default: number of cores). Observers and measurers
+are read from the canonical persons resolved by proc.py (MPECPersons and PersonIndex, see
+name_map.py).
 """
 
+import argparse
 import concurrent.futures
 import ctypes
 import datetime
@@ -15,18 +21,23 @@ import json
 import logging
 import multiprocessing
 import os
-import re
 import signal
 import sys
 import sqlite3
 import time
 import hashlib
+import html
 from collections import Counter
+from itertools import groupby
 
-import numpy as np
-import pandas as pd
-import plotly.express as px
-from rapidfuzz import fuzz, process
+from breakdown import Breakdown, station_cube, MONTHS
+from figures import figure_div, viewer_tags, install_viewer, figure_stats
+from figure_queue import FigureQueue, chart
+from frozen_years import FrozenOutputs, closed, digest, year_hash
+from volatile import placeholder, volatile_tag, mark_updated
+from mpec_table import load_mpec_table, render_row, export_row
+from page_layout import PageWriter, Template, CREDIT_QYE_TH
+from table_shards import ShardWriter, write_table, table_attrs, script_tag, install_script
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -41,7 +52,7 @@ def get_stations_needing_update():
             conn.execute("PRAGMA busy_timeout=30000")
             cursor = conn.cursor()
             # Simply get stations marked as changed
-            cursor.execute("SELECT MPECId FROM LastRun WHERE MPECId LIKE 'station_%' AND Changed = 1")
+            cursor.execute("SELECT MPECId FROM LastRun WHERE MPECId LIKE 'station_%' AND Changed = 1 ORDER BY MPECId")
             stations_to_update = [row[0].replace('station_', '') for row in cursor.fetchall()]
         return stations_to_update
     except sqlite3.Error as e:
@@ -59,9 +70,19 @@ mpccode = 'mpccode.json'
 with open(mpccode) as mpccode:
     mpccode = json.load(mpccode)
 
-obscode = 'obscode_stat.json'
-with open(obscode) as obscode:
-    obscode = json.load(obscode)
+# obscode_stat.json and the shared MPEC table written by obscode_stat.py (obscode[...]['MPECs']
+# holds indexes into it) are loaded by load_data(): once in the parent, then inherited by (or
+# loaded once in) each worker
+obscodeFile = 'obscode_stat.json'
+obscode = None
+mpecs = None
+
+def load_data():
+    global obscode, mpecs
+    if obscode is None:
+        with open(obscodeFile) as f:
+            obscode = json.load(f)
+        mpecs = load_mpec_table()
 
 BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
 def encode(num, alphabet=BASE62):
@@ -80,103 +101,61 @@ def encode(num, alphabet=BASE62):
     arr.reverse()
     return ''.join(arr)
 
-# ——— Global container for fuzzy‑built name_map ———
-name_map = {}
-
-def normalize_name(name: str) -> str:
-    name = name.strip()
-    name = re.sub(r'\s+', ' ', name)
-    name = re.sub(r'\.\s', '.', name)
-    return name
-
-def build_name_map(threshold: int = 90):
-    global name_map
-    all_names = set()
-
-    # Build set of individual names from the MPEC data
-    for station_data in obscode.values():
-        for role in ('OBS','MEA'):
-            for group in station_data[role].keys():       # each group is a comma-joined string
-                for name in group.split(','):             # split on the comma itself
-                    name = name.strip()                    # trim any stray spaces
-                    all_names.add(name)
-
-    canonical = []
-    local_map = {}
-    for name in sorted(all_names):
-        #print("Processing name: ", name)
-        if canonical:
-            # find best match among canonicals
-            match, score, _ = process.extractOne(
-                name,
-                canonical,
-                scorer=fuzz.token_sort_ratio
-            )
-            if score >= threshold:
-                local_map[name] = match
-                continue
-
-        # no good match → new canonical
-        canonical.append(name)
-        local_map[name] = name
-
-    logging.info("Name map created with %d names.", len(local_map))
-    name_map = local_map
-
-def process_role(raw_counts: dict):
-    counts = Counter()
-    for group, cnt in raw_counts.items():
-        key = standardize_group(group)
-        counts[key] += cnt
-    return counts
-
-def standardize_group(obs_str: str) -> str:
-    parts = [ normalize_name(nm) for nm in obs_str.lstrip(', ').split(',') ]
-    corrected = [ name_map.get(nm, nm) for nm in parts ]
-    return ', '.join(sorted(corrected))
+def person_group_rows(station_code, role):
+    """(group, #MPECs) of a station and role, most frequent first: a group is the persons credited
+    together in an MPEC (from TABLE MPECPersons, see name_map.py)"""
+    groups = Counter()
+    conn = _open_database()
+    try:
+        cursor = conn.execute("""
+            SELECT mp.MPECId, p.Name
+            FROM MPECPersons mp JOIN Person p ON p.PersonId = mp.PersonId
+            WHERE mp.StationCode = ? AND mp.Role = ?
+            ORDER BY mp.MPECId, p.Name
+        """, (station_code, role))
+        for mpec_id, rows in groupby(cursor, key=lambda row: row[0]):
+            groups[', '.join(name for _, name in rows)] += 1
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in person_group_rows for station {station_code}: {e}")
+    finally:
+        conn.close()
+    return sorted(groups.items(), key=lambda x: (-x[1], x[0]))
 
-def per_person_counts(counts: Counter) -> Counter:
-    per_person = Counter()
-    for group, cnt in counts.items():
-        for name in group.split(','):
-            name = name.strip()
-            per_person[name] += cnt
-    return per_person
+def person_rows(station_code, role):
+    """Persons of a station and role with their number of MPECs, most active first, linked to their
+    person pages (from TABLE PersonIndex, see name_map.py and PersonPage.py)"""
+    conn = _open_database()
+    try:
+        cursor = conn.execute("""
+            SELECT pi.PersonId, p.Name, pi.MPECCount
+            FROM PersonIndex pi JOIN Person p ON p.PersonId = pi.PersonId
+            WHERE pi.StationCode = ? AND pi.Role = ?
+            ORDER BY pi.MPECCount DESC, p.Name
+        """, (station_code, role))
+        for person_id, name, count in cursor:
+            yield {
+                'individual': f'<a href="../byPerson/person_{person_id}.html" class="text-decoration-none">{html.escape(name)}</a>',
+                'count': count,
+            }
+    except sqlite3.Error as e:
+        logging.error(f"SQLite error in person_rows for station {station_code}: {e}")
+    finally:
+        conn.close()
 
-def generate_station_objects_table_rows(station_code):
+def station_object_rows(station_code):
+    """Rows of the objects table of a station, one dict per object (from TABLE StationObjects, see station_objects.py)"""
     conn = _open_database()
-    rows = ""
     try:
         cursor = conn.cursor()
-        tables = cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        table_names = [table[0] for table in tables.fetchall()]
-        station = 'station_'+station_code
-        # Some stations have no data, thus no table
-        if station not in table_names:
-            logging.info(f"Station {station_code} has no station table; skipping objects table")
-            return "" # Automatically populated with bootstrap table "No matching records found"
-        cursor.execute(f"""
-            SELECT s.Object, 
-                    COUNT(*) as ObsCount,
-                    SUM(s.Discovery) as Discoveries,
-                    MIN(s.Time) as FirstObs,
-                    MAX(s.Time) as LastObs,
-                    o.Mag,
-                    COUNT(DISTINCT mo.MPECId) as MPECCount
-            FROM {station} s
-            LEFT JOIN Objects o ON s.Object = o.ObjectId
-            LEFT JOIN MPECObjects mo ON s.Object = mo.ObjectId
-            GROUP BY s.Object
-            ORDER BY Discoveries DESC, ObsCount DESC
-        """)
-        objects = cursor.fetchall()
-        
-        if not objects:
-            logging.info(f"Station {station_code} has no objects in station table; skipping objects table")
-            return ""
+        # a range read of idx_stationobjects_order; stations without observations have no rows
+        cursor.execute("""
+            SELECT ObjectId, ObsCount, Discoveries, FirstObs, LastObs, LastMag, MPECCount
+            FROM StationObjects
+            WHERE StationCode = ?
+            ORDER BY Discoveries DESC, ObsCount DESC, ObjectId
+        """, (station_code,))
 
-        html = ""
-        for obj_id, obs_count, discoveries_count, first_obs, last_obs, mag, mpec_count in objects:
+        for obj_id, obs_count, discoveries_count, first_obs, last_obs, mag, mpec_count in cursor:
             first_date = datetime.datetime.fromtimestamp(first_obs).strftime('%Y-%m-%d') if first_obs else 'N/A'
             last_date = datetime.datetime.fromtimestamp(last_obs).strftime('%Y-%m-%d') if last_obs else 'N/A'
             try:
@@ -186,27 +165,23 @@ def generate_station_objects_table_rows(station_code):
                 pass
             discovery_badge = f'<span class="badge bg-success">{discoveries_count}</span>' if discoveries_count > 0 else '0'
             
-            html += f"""
-                        <tr>
-                            <td><a href="../byObject/object_{obj_id}.html" class="text-decoration-none">{obj_id}</a></td>
-                            <td>{obs_count}</td>
-                            <td>{discovery_badge}</td>
-                            <td>{first_date}</td>
-                            <td>{last_date}</td>
-                            <td>{magnitude}</td>
-                            <td>{mpec_count}</td>
-                        </tr>"""
-        
-        return html
+            yield {
+                'object': f'<a href="../byObject/object_{obj_id}.html" class="text-decoration-none">{obj_id}</a>',
+                'observations': obs_count,
+                'discoveries': discovery_badge,
+                'first_obs': first_date,
+                'last_obs': last_date,
+                'magnitude': magnitude,
+                'mpecs': mpec_count,
+            }
     except sqlite3.Error as e:
-        logging.error(f"SQLite error in generate_station_objects_table for station {station_code}: {e}")
-        return ""
+        logging.error(f"SQLite error in station_object_rows for station {station_code}: {e}")
     finally:
         conn.close()
 
-MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup"]
-OBJ_TYPES = ["NEA", "PHA", "Comet", "Satellite", "TNO", "Unusual", "Interstellar", "Unknown"]
-MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+# data-fields of the sharded tables
+MPEC_COLUMNS = ['index', 'name', 'date', 'ds', 'fs', 'obj', 'catch']
+OBJECT_COLUMNS = ['object', 'observations', 'discoveries', 'first_obs', 'last_obs', 'magnitude', 'mpecs']
 
 stop_event = None
 
@@ -215,223 +190,114 @@ def signal_handler(sig, frame):
     if stop_event:
         stop_event.set()
 
-def make_monthly_page(df_monthly, station, year):
-    if stop_event and stop_event.is_set():
-        return
+# monthly page of a station for one year, written through PageWriter (see page_layout.py)
+MONTHLY_HEAD = Template("""
+        <h2>%(name)s %(year)s | Monthly Breakdown</h2>
+        %(figure)s
+        <table id="month_table"
+            class="table table-striped table-hover table-sm table-responsive"
+            data-toggle="table"
+            data-show-export="true"
+            data-show-columns="true">
+            <thead>
+                <tr>
+                    <th>Month</th>
+                    <th>Editorial</th>
+                    <th>Discovery</th>
+                    <th>Orbit Update</th>
+                    <th>DOU</th>
+                    <th>List Update</th>
+                    <th>Retraction</th>
+                    <th>Other</th>
+                    <th>Follow-Up</th>
+                    <th>First Follow-Up</th>
+                </tr>
+            </thead>
+            <tbody>""")
+MONTHLY_ROW = Template("""
+                <tr>
+                    <td>%(month)s</td>%(cells)s
+                </tr>""")
+MONTHLY_CELL = Template("""
+                    <td>%(count)s</td>""")
 
-    station_code = station[-3:]
+def monthly_paths(station, year):
+    """Page and figure bundle of the monthly page of a station for one year"""
     station_year = station + "_" + str(year)
+    return f"../www/byStation/monthly/{station_year}.html", f"../www/byStation/monthly/graphs/{station_year}.json"
 
-    try:
-        fig = px.bar(df_monthly, x="Month", y="#MPECs", color="MPECType")
-        fig.write_html(f"../www/byStation/monthly/graphs/{station_year}.html")
-    except (ValueError, OSError) as e:
-        logging.error(f"Failed to generate/write monthly graph for {station_code} {year}: {e}")
-        return
-    
-    # Log DataFrame contents if it does not contain the expected columns
-    if not all(col in df_monthly.columns for col in ["Month", "#MPECs", "MPECType"]):
-        logging.info(f"DataFrame contents for station {station_code}, year {year}:\n{df_monthly}")
-        if stop_event:
-            stop_event.set()
-        return
-
-    df_monthly.set_index(['Month', 'MPECType'], inplace=True) # set index after making the graph to avoid error
-    page_monthly = f"../www/byStation/monthly/{station_year}.html"
-    o = f"""
-<!DOCTYPE html>
-<html lang="en">
-    <head>
-        <meta charset="utf-8">
-        <meta http-equiv="X-UA-Compatible" content="IE=edge">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <title>MPECWatch: {year} Monthly Summary | {station_code}</title>
-        <!-- Bootstrap CSS -->
-        <link href="../../dist/css/bootstrap.min.css" rel="stylesheet">
-        <!-- Bootstrap Theme CSS -->
-        <link href="../../dist/css/bootstrap-theme.min.css" rel="stylesheet">
-        <!-- Bootstrap Table CSS -->
-        <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.css">
+def make_monthly_page(breakdown, station, year, queue):
+    """Write the monthly page of a station for one year; returns False if it was interrupted"""
+    if stop_event and stop_event.is_set():
+        return False
 
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <link href="../../assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
+    station_code = station[-3:]
+    station_year = station + "_" + str(year)
+    page_monthly, bundle_path = monthly_paths(station, year)
 
-        <!-- Custom styles for this template -->
-        <link href="../../theme.css" rel="stylesheet">
-
-        <!-- HTML5 shim and Respond.js for IE8 support of HTML5 elements and media queries -->
-        <!--[if lt IE 9]>
-        <script src="https://oss.maxcdn.com/html5shiv/3.7.3/html5shiv.min.js"></script>
-        <script src="https://oss.maxcdn.com/respond/1.4.2/respond.min.js"></script>
-        <![endif]-->
-    </head>
-    <body>
-        <div class="container" role="main" style="padding-bottom: 20px;">
-            <h2 style="margin-top: 20px;">{mpccode[station_code]['name']} {year} | Monthly Breakdown</h2>
-            <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="graphs/{station_year}.html" height="525" width="100%"></iframe>
-            <table id="month_table"
-                class="table table-striped table-hover table-sm table-responsive"
-                data-toggle="table"
-                data-show-export="true"
-                data-show-columns="true">
-                <thead>
-                    <tr>
-                        <th>Month</th>
-                        <th>Editorial</th>
-                        <th>Discovery</th>
-                        <th>Orbit Update</th>
-                        <th>DOU</th>
-                        <th>List Update</th>
-                        <th>Retraction</th>
-                        <th>Other</th>
-                        <th>Follow-Up</th>
-                        <th>First Follow-Up</th>
-                    </tr>
-                </thead>"""
-    for month in MONTHS:
-        o += f"""   
-                <tr>
-                    <td>{month}</td>"""
-        for mpecType in MPEC_TYPES:
-            o += f"""
-                    <td>{int(df_monthly.loc[(month, mpecType)]['#MPECs'])}</td>"""
-        o+= """</tr>"""
-    o += r"""
-            </table>            
-        </div>
-        <!-- jQuery -->
-        <script src="https://code.jquery.com/jquery-3.2.1.slim.min.js" integrity="sha384-KJ3o2DKtIkvYIK3UENzmM7KCkRr/rE9/Qpg6aAZGJwFDMVNA/GpGFF93hXpG5KkN" crossorigin="anonymous"></script>
-        <script>window.jQuery || document.write('<script src="../assets/js/vendor/jquery.min.js"><\/script>')</script>
-        <!-- Popper JS -->
-        <script src="https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js" integrity="sha384-I7E8VVD/ismYTF4hNIPjVp/Zjvgyol6VFvRkX/vR+Vc4jQkC+hVqc2pM8ODewa9r" crossorigin="anonymous"></script>
-        <!-- Bootrap JS -->
-        <script src="../../dist/js/bootstrap.min.js"></script>
-        <!-- Bootstrap Table JS -->
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/tableExport.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/libs/jsPDF/jspdf.umd.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/extensions/export/bootstrap-table-export.min.js"></script>
-    </body>
-</html>"""
+    with queue.bundle(bundle_path) as bundle:
+        bundle.add(year, chart('bar', data_frame=breakdown.monthly_frame(year), x="Month", y="#MPECs", color="MPECType"))
 
     if stop_event and stop_event.is_set():
-        return
-
-    with open(page_monthly, 'w') as f:
-        f.write(o)
+        return False
+
+    with PageWriter(page_monthly, f"MPEC Watch | {year} Monthly Summary {station_code}", prefix='../../', active='obs',
+                    extra_scripts=viewer_tags('../../'), credit=CREDIT_QYE_TH) as out:
+        out.render(MONTHLY_HEAD, name=mpccode[station_code]['name'], year=year, figure=figure_div(f"graphs/{station_year}.json", year))
+        for month, counts in zip(MONTHS, breakdown.monthly(year)):
+            out.render(MONTHLY_ROW, month=month, cells=''.join(MONTHLY_CELL.render(count=count) for count in counts))
+        out.write("""
+            </tbody>
+        </table>""")
+    return True
 
 # ----------- MAIN FUNCTION TO MAKE STATION PAGE -----------
 def make_station_page(station_code):
+    """Write the page of one station; returns station_code once the page is written"""
     if stop_event and stop_event.is_set():
         return
-    if not name_map:
-        build_name_map()
     logging.info(f"Starting processing for station: {station_code}")
+    bundle_bytes = figure_stats()['bundle_bytes']
+    # the pages are already built by one worker process per station, so the figures are built in this one
+    queue = FigureQueue(jobs=1, log=logging.info)
+    frozen = FrozenOutputs()
     
-    conn = _open_database()
     station = 'station_'+station_code
     page = f"../www/byStation/{station}.html"
 
-    o = f"""
-<!doctype html>
-<html lang="en">
-  <head>
-        <!-- Google tag (gtag.js) -->
-          <script async src="https://www.googletagmanager.com/gtag/js?id=G-WTXHKC28G9"></script>
-          <script>
-            window.dataLayer = window.dataLayer || [];
-            function gtag(){{dataLayer.push(arguments);}}
-            gtag('js', new Date());
-            gtag('config', 'G-WTXHKC28G9');
-          </script>
-    <meta charset="utf-8">
-    <meta http-equiv="X-UA-Compatible" content="IE=edge">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <!-- The above 3 meta tags *must* come first in the head; any other head content must come *after* these tags -->
-    <meta name="description" content="">
-    <meta name="author" content="">
-    <link rel="icon" href="../favicon.ico">
-
-    <title>MPEC Watch | Station Statistics {station_code}</title>
-
-    <!-- Bootstrap CSS -->
-    <link href="../dist/css/bootstrap.min.css" rel="stylesheet">
-    <!-- Bootstrap Theme CSS -->
-    <link href="../dist/css/bootstrap-theme.min.css" rel="stylesheet">
-    <!-- Bootstrap Table CSS -->
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.css">
-
-    <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-    <link href="../assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
-
-    <!-- Custom styles for this template -->
-    <link href="../theme.css" rel="stylesheet">
-
-    <!-- HTML5 shim and Respond.js for IE8 support of HTML5 elements and media queries -->
-    <!--[if lt IE 9]>
-      <script src="https://oss.maxcdn.com/html5shiv/3.7.3/html5shiv.min.js"></script>
-      <script src="https://oss.maxcdn.com/respond/1.4.2/respond.min.js"></script>
-    <![endif]-->
-  </head>
-<!-- Fixed navbar -->
-  <nav class="navbar navbar-inverse navbar-fixed-top">
-    <div class="container">
-        <div class="navbar-header">
-            <button type="button" class="navbar-toggle collapsed" data-toggle="collapse" data-target="#navbar" aria-expanded="false" aria-controls="navbar">
-                <span class="sr-only">Toggle navigation</span>
-                <span class="icon-bar"></span>
-                <span class="icon-bar"></span>
-                <span class="icon-bar"></span>
-            </button>
-            <a class="navbar-brand" href="#">MPEC Watch</a>
-        </div>
-        <div id="navbar" class="navbar-collapse collapse">
-            <ul class="nav navbar-nav">
-                <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/index.html">Home</a></li>
-                <li class="active"><a href="https://sbnmpc.astro.umd.edu/mpecwatch/obs.html">Observatory Browser</a></li>
-                <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">Survey Browser</a></li>
-                <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/stats.html">Various Statistics</a></li>
-                <!-- <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/mpc_stuff.html">MPC Stuff (non-public)</a></li> -->
-                <li><a href="https://github.com/Yeqzids/mpecwatch/issues">Issue Tracker</a></li>
-                <li><a href="https://sbnmpc.astro.umd.edu">SBN-MPC Annex</a></li>
-            </ul>
-        </div><!--/.nav-collapse -->
-    </div>
-  </nav>
-  <body style="padding-top: 50px;">
-    <div class="container theme-showcase" role="main">
+    with PageWriter(page, f"MPEC Watch | Station Statistics {station_code}", prefix='../', active='obs', extra_scripts=script_tag('../') + viewer_tags('../') + volatile_tag('../'), credit=CREDIT_QYE_TH) as out:
+        out.write(f"""
         <div class="row">
             <!-- Main jumbotron for a primary marketing message or call to action -->
-            <h2>{station_code} {mpccode[station_code]['name']}</h2><p>
-            Last update: UTC %s
-          </p>""" % (datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
-              
-    if station_code not in ['244', '245', '247', '248', '249', '250', '258', '270', '273', '274', '275', '288', '289', '336', '338', '339', '500', 'C49', 'C50', 'C51', 'C52', 'C53', 'C54', 'C55', 'C56', 'C57', 'C58', 'C59']:
-        #print(station_code)
-        #print(mpccode[station_code])
+            <h2>{station_code} {mpccode[station_code]['name']}</h2>""")
+            
+        if station_code not in ['244', '245', '247', '248', '249', '250', '258', '270', '273', '274', '275', '288', '289', '336', '338', '339', '500', 'C49', 'C50', 'C51', 'C52', 'C53', 'C54', 'C55', 'C56', 'C57', 'C58', 'C59']:
+            #print(station_code)
+            #print(mpccode[station_code])
         
-        r = mpccode[station_code]
-        country = stripq(r.get("country"))
-        state = stripq(r.get("state"))
-        county = stripq(r.get("county"))
-        city = stripq(r.get("city"))
-        observations_type = stripq(r.get("observations_type"))
-        old_names = stripq(r.get("old_names"))
-        weblink = stripq(r.get("web_link"))
+            r = mpccode[station_code]
+            country = stripq(r.get("country"))
+            state = stripq(r.get("state"))
+            county = stripq(r.get("county"))
+            city = stripq(r.get("city"))
+            observations_type = stripq(r.get("observations_type"))
+            old_names = stripq(r.get("old_names"))
+            weblink = stripq(r.get("web_link"))
+            print(r, weblink)
 
-        if weblink:
-            if not weblink.startswith(("http://", "https://")):
-                weblink = "https://" + weblink
-            weblink_html = f'<a href="{weblink}" target="_blank">{weblink}</a>'
-        else:
-            weblink_html = ""
+            if weblink:
+                if not weblink.startswith(("http://", "https://")):
+                    weblink = "https://" + weblink
+                weblink_html = f'<a href="{weblink}" target="_blank">{weblink}</a>'
+            else:
+                weblink_html = ""
         
-        if mpccode[station_code]['lon'] > 180:
-            lon = mpccode[station_code]['lon'] - 360
-        else:
-            lon = mpccode[station_code]['lon']
+            if mpccode[station_code]['lon'] > 180:
+                lon = mpccode[station_code]['lon'] - 360
+            else:
+                lon = mpccode[station_code]['lon']
         
-        o += f"""
+            out.write(f"""
             <ul>
               <li>Country: {country}</li>
               <li>State: {state}</li>
@@ -439,12 +305,17 @@ def make_station_page(station_code):
               <li>City: {city}</li>
               <li>Observatory Type: {observations_type}</li>
               <li>Old Names: {old_names}</li>
-              <li>Web Link: <a href="{weblink}" target="_blank">{weblink}</a></li>
+              <li>Website: {weblink_html}</li>
               <li><a href="https://geohack.toolforge.org/geohack.php?params={mpccode[station_code]['lat']};{lon}">Where is this observatory?</a></li>
             </ul>
-            """    
+            <p>Last update: UTC %s</p>""" % placeholder('updated'))  
+        
+            if mpccode[station_code]['lon'] > 180:
+                lon = mpccode[station_code]['lon'] - 360
+            else:
+                lon = mpccode[station_code]['lon']
 
-    o += f"""
+        out.write(f"""
             <p>
                 <h3>Graphs</h3>
                 <h4>Yearly Breakdown of MPEC Types</h4>
@@ -459,25 +330,25 @@ def make_station_page(station_code):
                 Followup - MPECs associated with follow-up observations made by this station to an object discovered elsewhere.<br>
                 FirstFollowup - MPECs associated with follow-up observations made by this station to an object discovered elsewhere, with this station being the first station to follow-up.<br>
                 Other - MPECs that do not fit into categories listed above and involve observations made by this station.
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}.html" height="525" width="100%"></iframe>
+                {figure_div(f"Graphs/{station}.json", "yearly")}
                 <h4>Yearly Breakdown of Discovery Object Types</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}_disc_obj.html" height="525" width="100%"></iframe>
+                {figure_div(f"Graphs/{station}.json", "disc_obj")}
                 <h4>Yearly Breakdown of Orbit Update Object Types</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}_OU_obj.html" height="525" width="100%"></iframe>
+                {figure_div(f"Graphs/{station}.json", "OU_obj")}
                 <h4>Breakdown by Observers</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Observers.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "Top_Observers")}
                 <h4>Breakdown by Measurers</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Measurers.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "Top_Measurers")}
                 <h4>Breakdown by Facilities</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Facilities.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "Top_Facilities")}
                 <h4>Breakdown by Objects</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Objects.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "Top_Objects")}
                 <h4>Annual Breakdown</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_yearly.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "yearly")}
                 <h4>Weekly Breakdown</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_weekly.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "weekly")}
                 <h4>Hourly Breakdown</h4>
-                <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_hourly.html" height="525" width="100%"></iframe>
+                {figure_div(f"OMF/{station_code}.json", "hourly")}
             </p>
         </div>
         <div class="row">
@@ -501,50 +372,56 @@ def make_station_page(station_code):
                         <th>Follow-Up</th>
                         <th>First Follow-Up</th>
                     </tr>
-                </thead>"""
+                </thead>""")
     
-    df_yearly = pd.DataFrame({"Year": [], "MPECType": [], "#MPECs": []})
-    disc_obj = pd.DataFrame({"Year": [], "ObjectType": [], "#MPECs": []})
-    OU_obj = pd.DataFrame({"Year": [], "ObjectType": [], "#MPECs": []})
-    for year in list(np.arange(1993, datetime.datetime.now().year+1, 1))[::-1]:
-        # yearly breakdown of MPEC types
-        df_yearly = pd.concat([df_yearly, pd.DataFrame({"Year": [year]*len(MPEC_TYPES), "MPECType": MPEC_TYPES, "#MPECs": [obscode[station_code][mpecType][str(year)]['total'] for mpecType in MPEC_TYPES]})])
-        # edit the FU count just for the graph since First FU is a subset of FU
-        df_yearly.loc[df_yearly['MPECType'] == 'Follow-Up', '#MPECs'] -= df_yearly.loc[df_yearly['MPECType'] == 'First Follow-Up', '#MPECs']
-        disc_obj = pd.concat([disc_obj, pd.DataFrame({"Year": [year]*len(OBJ_TYPES), "ObjectType": OBJ_TYPES, "#MPECs": [obscode[station_code]['Discovery'][str(year)][obj] for obj in OBJ_TYPES]})])
-        OU_obj = pd.concat([OU_obj, pd.DataFrame({"Year": [year]*len(OBJ_TYPES), "ObjectType": OBJ_TYPES, "#MPECs": [obscode[station_code]['OrbitUpdate'][str(year)][obj] for obj in OBJ_TYPES]})])
-
-        df_monthly = pd.DataFrame({"Month": [], "MPECType": [], "#MPECs": []})
-        # monthly breakdown of MPEC types
-        for month in MONTHS:
-            df_monthly = pd.concat([df_monthly, pd.DataFrame({"Month": [month] * len(MPEC_TYPES), "MPECType": MPEC_TYPES, "#MPECs": [obscode[station_code][mpecType][str(year)][month] for mpecType in MPEC_TYPES]})])
-            # edit the FU count just for the graph since First FU is a subset of FU
-            df_monthly.loc[df_monthly['MPECType'] == 'Follow-Up', '#MPECs'] -= df_monthly.loc[df_monthly['MPECType'] == 'First Follow-Up', '#MPECs']
-        make_monthly_page(df_monthly, station, year)
-
-        o += f"""
+        breakdown = Breakdown(station_cube(obscode[station_code]))
+        for year, counts in zip(breakdown.years, breakdown.yearly()):
+            # monthly pages of closed years are only rewritten when their counters change (see frozen_years.py)
+            key, paths = f"station/{station_code}/{year}", monthly_paths(station, year)
+            inputs = digest(year_hash(obscode[station_code], year), mpccode[station_code]['name'])
+            if not (closed(year) and frozen.current(key, inputs, *paths)):
+                if make_monthly_page(breakdown, station, year, queue) and closed(year):
+                    frozen.add(key, inputs, *paths)
+
+            out.write(f"""
                 <tr>
                     <td><a href="monthly/{station}_{year}.html">{year}</a></td>
-                    <td>{sum([obscode[station_code][mpecType][str(year)]['total'] for mpecType in MPEC_TYPES])}</td>"""
-        for mpecType in MPEC_TYPES:
-            o += f"""
-                    <td>{obscode[station_code][mpecType][str(year)]['total']}</td>"""
-        o += """
-                </tr>"""            
+                    <td>{counts.sum()}</td>""")
+            for count in counts:
+                out.write(f"""
+                    <td>{count}</td>""")
+            out.write("""
+                </tr>""")            
     
-    o += """
+        # the large tables are written as JSON shards that the page loads on demand (see table_shards.py)
+        data_dir = f"../www/byStation/data/{station}"
+        with ShardWriter(f"{data_dir}/mpecs", MPEC_COLUMNS) as shards:
+            for index, j in enumerate(obscode[station_code]['MPECs'], start=1):
+                name, date, ds, fs, obj, catch = render_row(mpecs[j], (station_code,))
+                shards.add({'index': index, 'name': name, 'date': str(date), 'ds': ds, 'fs': fs, 'obj': obj, 'catch': catch,
+                            '_export': {"Index": index, **export_row(mpecs[j], (station_code,))}})
+        write_table(f"{data_dir}/objects", OBJECT_COLUMNS, station_object_rows(station_code))
+
+        # observers and measurers are the canonical persons resolved at ingest time (see name_map.py)
+        write_table(f"{data_dir}/observers", ['observer', 'count'], ({'observer': html.escape(group), 'count': count} for group, count in person_group_rows(station_code, 'OBS')))
+        write_table(f"{data_dir}/ind_observers", ['individual', 'count'], person_rows(station_code, 'OBS'))
+        write_table(f"{data_dir}/measurers", ['measurer', 'count'], ({'measurer': html.escape(group), 'count': count} for group, count in person_group_rows(station_code, 'MEA')))
+        write_table(f"{data_dir}/ind_measurers", ['individual', 'count'], person_rows(station_code, 'MEA'))
+
+        out.write("""
             </table>
         </div>
-        <div class="row">
+        <div class="row my-4">
             <h4 style="padding-top: 20px;">List of Individual MPECs</h4>
+            <button id="custom-export-btn" class="btn btn-primary btn-sm" style="margin-bottom: 10px;">Export to CSV</button>
             <table id="mpec_table" 
                 class="table table-striped table-bordered table-sm"
-                data-height="460"
                 data-toggle="table"
                 data-pagination="true"
                 data-search="true"
-                data-show-export="true"
-                data-show-columns="true">
+                data-show-columns="true"
+                data-search-align="left"
+                %(mpecs)s>
                 <thead>
                     <tr>
                         <th class="th-sm" data-field="index" data-sortable="true">Index</th>
@@ -556,599 +433,154 @@ def make_station_page(station_code):
                         <th class="th-sm" data-field="catch" data-sortable="true">Search Archival Image</th>
                     </tr>
                 </thead>
-                <tbody>
-    """
-
-    index = 1
-    for i in obscode[station_code]['MPECs']:
-        o += f"""
+            </table>
+        </div>
+        <script>
+            document.addEventListener('DOMContentLoaded', () => {
+                const btn = document.getElementById('custom-export-btn');
+                if(btn) {
+                    btn.addEventListener('click', () => exportShardsCSV('mpec_table', '%(station_code)s_mpec_export.csv'));
+                }
+            });
+        </script>
+        <div class="row my-4">
+            <h4 class ="mt-3">Objects Observed by This Station</h4>
+            <table id="OBJ_table"
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-show-columns="true"
+                data-pagination="true"
+                data-search-align="left"
+                %(objects)s>
+                <thead>
                     <tr>
-                        <td>{index}</td>
-                        <td>{i[0]}</td>
-                        <td>{datetime.datetime.fromtimestamp(i[1])}</td>
-                        <td>{i[2]}</td>
-                        <td>{i[3]}</td>
-                        <td>{i[4]}</td>
-                        <td>{i[5]}</td>
+                        <th class="th-sm" data-field="object" data-sortable="true">Object</th>
+                        <th class="th-sm" data-field="observations" data-sortable="true">Observations</th>
+                        <th class="th-sm" data-field="discoveries" data-sortable="true">Discoveries</th>
+                        <th class="th-sm" data-field="first_obs" data-sortable="true">First Obs</th>
+                        <th class="th-sm" data-field="last_obs" data-sortable="true">Last Obs</th>
+                        <th class="th-sm" data-field="magnitude" data-sortable="true">Magnitude</th>
+                        <th class="th-sm" data-field="mpecs" data-sortable="true">MPECs</th>
                     </tr>
-        """
-        index += 1
-        
-    o += """    </tbody>
+                </thead>
             </table>
-        </div>"""
-    
-    try:
-        cursor = conn.cursor()
-        station = 'station_'+station_code
-        page = f"../www/byStation/{station}.html"
-
-        o = f"""
-    <!doctype html>
-    <html lang="en">
-    <head>
-            <!-- Google tag (gtag.js) -->
-            <script async src="https://www.googletagmanager.com/gtag/js?id=G-WTXHKC28G9"></script>
-            <script>
-                window.dataLayer = window.dataLayer || [];
-                function gtag(){{dataLayer.push(arguments);}}
-                gtag('js', new Date());
-                gtag('config', 'G-WTXHKC28G9');
-            </script>
-        <meta charset="utf-8">
-        <meta http-equiv="X-UA-Compatible" content="IE=edge">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <!-- The above 3 meta tags *must* come first in the head; any other head content must come *after* these tags -->
-        <meta name="description" content="">
-        <meta name="author" content="">
-        <link rel="icon" href="../favicon.ico">
-
-        <title>MPEC Watch | Station Statistics {station_code}</title>
-
-        <!-- Bootstrap CSS -->
-        <link href="../dist/css/bootstrap.min.css" rel="stylesheet">
-        <!-- Bootstrap Theme CSS -->
-        <link href="../dist/css/bootstrap-theme.min.css" rel="stylesheet">
-        <!-- Bootstrap Table CSS -->
-        <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.css">
-
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <link href="../assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
-
-        <!-- Custom styles for this template -->
-        <link href="../theme.css" rel="stylesheet">
-
-        <!-- HTML5 shim and Respond.js for IE8 support of HTML5 elements and media queries -->
-        <!--[if lt IE 9]>
-        <script src="https://oss.maxcdn.com/html5shiv/3.7.3/html5shiv.min.js"></script>
-        <script src="https://oss.maxcdn.com/respond/1.4.2/respond.min.js"></script>
-        <![endif]-->
-    </head>
-    <!-- Fixed navbar -->
-    <nav class="navbar navbar-inverse navbar-fixed-top">
-        <div class="container">
-            <div class="navbar-header">
-                <button type="button" class="navbar-toggle collapsed" data-toggle="collapse" data-target="#navbar" aria-expanded="false" aria-controls="navbar">
-                    <span class="sr-only">Toggle navigation</span>
-                    <span class="icon-bar"></span>
-                    <span class="icon-bar"></span>
-                    <span class="icon-bar"></span>
-                </button>
-                <a class="navbar-brand" href="#">MPEC Watch</a>
-            </div>
-            <div id="navbar" class="navbar-collapse collapse">
-                <ul class="nav navbar-nav">
-                    <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/index.html">Home</a></li>
-                    <li class="active"><a href="https://sbnmpc.astro.umd.edu/mpecwatch/obs.html">Observatory Browser</a></li>
-                    <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">Survey Browser</a></li>
-                    <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/stats.html">Various Statistics</a></li>
-                    <!-- <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/mpc_stuff.html">MPC Stuff (non-public)</a></li> -->
-                    <li><a href="https://github.com/Yeqzids/mpecwatch/issues">Issue Tracker</a></li>
-                    <li><a href="https://sbnmpc.astro.umd.edu">SBN-MPC Annex</a></li>
-                </ul>
-            </div><!--/.nav-collapse -->
         </div>
-    </nav>
-    <body style="padding-top: 50px;">
-        <div class="container theme-showcase" role="main">
-            <div class="row">
-                <!-- Main jumbotron for a primary marketing message or call to action -->
-                <h2>{station_code} {mpccode[station_code]['name']}</h2>"""
-                
-        if station_code not in ['244', '245', '247', '248', '249', '250', '258', '270', '273', '274', '275', '288', '289', '336', '338', '339', '500', 'C49', 'C50', 'C51', 'C52', 'C53', 'C54', 'C55', 'C56', 'C57', 'C58', 'C59']:
-            #print(station_code)
-            #print(mpccode[station_code])
-            
-            r = mpccode[station_code]
-            country = stripq(r.get("country"))
-            state = stripq(r.get("state"))
-            county = stripq(r.get("county"))
-            city = stripq(r.get("city"))
-            observations_type = stripq(r.get("observations_type"))
-            old_names = stripq(r.get("old_names"))
-            weblink = stripq(r.get("web_link"))
-            print(r, weblink)
-
-            if weblink:
-                if not weblink.startswith(("http://", "https://")):
-                    weblink = "https://" + weblink
-                weblink_html = f'<a href="{weblink}" target="_blank">{weblink}</a>'
-            else:
-                weblink_html = ""
-            
-            if mpccode[station_code]['lon'] > 180:
-                lon = mpccode[station_code]['lon'] - 360
-            else:
-                lon = mpccode[station_code]['lon']
-            
-            o += f"""
-                <ul>
-                  <li>Country: {country}</li>
-                  <li>State: {state}</li>
-                  <li>County: {county}</li>
-                  <li>City: {city}</li>
-                  <li>Observatory Type: {observations_type}</li>
-                  <li>Old Names: {old_names}</li>
-                  <li>Website: {weblink_html}</li>
-                  <li><a href="https://geohack.toolforge.org/geohack.php?params={mpccode[station_code]['lat']};{lon}">Where is this observatory?</a></li>
-                </ul>
-                <p>Last update: UTC %s</p>""" % datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")  
-            
-            if mpccode[station_code]['lon'] > 180:
-                lon = mpccode[station_code]['lon'] - 360
-            else:
-                lon = mpccode[station_code]['lon']
-
-        o += f"""
-                <p>
-                    <h3>Graphs</h3>
-                    <h4>Yearly Breakdown of MPEC Types</h4>
-                    <b>Term definition:</b>
-                    <br>
-                    Editorial - Editorial MPECs associated with this station.<br>
-                    Discovery - MPECs associated with discovery made by this station.<br>
-                    OrbitUpdate - MPECs associated with orbit updates involving observations made by this station. Typically, these are recoveries of single-opposition objects.<br>
-                    DOU - Daily Orbit Update MPECs involving observations made by this station.<br>
-                    ListUpdate - MPECs associated with list updates involving observations made by this station. This category has largely been retired since 2012.<br>
-                    Retraction - Retracted MPECs involving observations made by this station.<br>
-                    Followup - MPECs associated with follow-up observations made by this station to an object discovered elsewhere.<br>
-                    FirstFollowup - MPECs associated with follow-up observations made by this station to an object discovered elsewhere, with this station being the first station to follow-up.<br>
-                    Other - MPECs that do not fit into categories listed above and involve observations made by this station.
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}.html" height="525" width="100%"></iframe>
-                    <h4>Yearly Breakdown of Discovery Object Types</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}_disc_obj.html" height="525" width="100%"></iframe>
-                    <h4>Yearly Breakdown of Orbit Update Object Types</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="Graphs/{station}_OU_obj.html" height="525" width="100%"></iframe>
-                    <h4>Breakdown by Observers</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Observers.html" height="525" width="100%"></iframe>
-                    <h4>Breakdown by Measurers</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Measurers.html" height="525" width="100%"></iframe>
-                    <h4>Breakdown by Facilities</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Facilities.html" height="525" width="100%"></iframe>
-                    <h4>Breakdown by Objects</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_Top_Objects.html" height="525" width="100%"></iframe>
-                    <h4>Annual Breakdown</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_yearly.html" height="525" width="100%"></iframe>
-                    <h4>Weekly Breakdown</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_weekly.html" height="525" width="100%"></iframe>
-                    <h4>Hourly Breakdown</h4>
-                    <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="OMF/{station_code}_hourly.html" height="525" width="100%"></iframe>
-                </p>
-            </div>
-            <div class="row">
-                <h3>Tables</h3>
-                <h4>Yearly Breakdown of MPEC Types</h4>
-                <table id="year_table" class="table table-striped table-sm" 
-                    data-toggle="table"
-                    data-show-export="true"
-                    data-show-columns="true">
-                    <thead>
-                        <tr>
-                            <th>Year</th>
-                            <th>Total MPECs</th>
-                            <th>Editorial</th>
-                            <th>Discovery</th>
-                            <th>Orbit Update</th>
-                            <th>DOU</th>
-                            <th>List Update</th>
-                            <th>Retraction</th>
-                            <th>Other</th>
-                            <th>Follow-Up</th>
-                            <th>First Follow-Up</th>
-                        </tr>
-                    </thead>"""
-        
-        df_yearly = pd.DataFrame({"Year": [], "MPECType": [], "#MPECs": []})
-        disc_obj = pd.DataFrame({"Year": [], "ObjectType": [], "#MPECs": []})
-        OU_obj = pd.DataFrame({"Year": [], "ObjectType": [], "#MPECs": []})
-        for year in list(np.arange(1993, datetime.datetime.now().year+1, 1))[::-1]:
-            # yearly breakdown of MPEC types
-            df_yearly = pd.concat([df_yearly, pd.DataFrame({
-                "Year": [year]*len(MPEC_TYPES), 
-                "MPECType": MPEC_TYPES, 
-                "#MPECs": [obscode[station_code][mpecType][str(year)]['total'] for mpecType in MPEC_TYPES] # use .get to avoid KeyError
-            })])
-            # edit the FU count just for the graph since First FU is a subset of FU
-            df_yearly.loc[df_yearly['MPECType'] == 'Follow-Up', '#MPECs'] -= df_yearly.loc[df_yearly['MPECType'] == 'First Follow-Up', '#MPECs']
-            disc_obj = pd.concat([disc_obj, pd.DataFrame({"Year": [year]*len(OBJ_TYPES), "ObjectType": OBJ_TYPES, "#MPECs": [obscode[station_code]['Discovery'][str(year)][obj] for obj in OBJ_TYPES]})])
-            # add DOU to OU_obj
-            for obj in OBJ_TYPES:
-                OU_obj = pd.concat([OU_obj, pd.DataFrame({"Year": [year]*len(OBJ_TYPES), "ObjectType": OBJ_TYPES, "#MPECs": [obscode[station_code]['OrbitUpdate'][str(year)][obj] + obscode[station_code]['DOU'][str(year)][obj] for obj in OBJ_TYPES]})])
-
-
-            df_monthly = pd.DataFrame({"Month": [], "MPECType": [], "#MPECs": []})
-            # monthly breakdown of MPEC types
-            for month in MONTHS:
-                df_monthly = pd.concat([df_monthly, pd.DataFrame({"Month": [month] * len(MPEC_TYPES), "MPECType": MPEC_TYPES, "#MPECs": [obscode[station_code][mpecType][str(year)][month] for mpecType in MPEC_TYPES]})])
-                # edit the FU count just for the graph since First FU is a subset of FU
-                df_monthly.loc[df_monthly['MPECType'] == 'Follow-Up', '#MPECs'] -= df_monthly.loc[df_monthly['MPECType'] == 'First Follow-Up', '#MPECs']
-            make_monthly_page(df_monthly, station, year)
-
-            o += f"""
+        <div class="row my-4">
+            <h4 class ="mt-3">List of Observers</h4>
+            <table id="OBS_table" 
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-pagination="true"
+                data-search-align="left"
+                %(observers)s>
+                <thead>
                     <tr>
-                        <td><a href="monthly/{station}_{year}.html">{year}</a></td>
-                        <td>{sum([obscode[station_code][mpecType][str(year)]['total'] for mpecType in MPEC_TYPES])}</td>"""
-            for mpecType in MPEC_TYPES:
-                o += f"""
-                        <td>{obscode[station_code][mpecType][str(year)]['total']}</td>"""
-            o += """
-                    </tr>"""            
-        
-        o += """
-                </table>
-            </div>
-            <div class="row my-4">
-                <h4 style="padding-top: 20px;">List of Individual MPECs</h4>
-                <button id="custom-export-btn" class="btn btn-primary btn-sm" style="margin-bottom: 10px;">Export to CSV</button>
-                <table id="mpec_table" 
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-pagination="true"
-                    data-search="true"
-                    data-show-columns="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="index" data-sortable="true">Index</th>
-                            <th class="th-sm" data-field="name" data-sortable="true">Name</th>
-                            <th class="th-sm" data-field="date" data-sortable="true">Date/Time</th>
-                            <th class="th-sm" data-field="ds" data-sortable="true">Discoverer</th>
-                            <th class="th-sm" data-field="fs" data-sortable="true">First-responding Confirmer</th>
-                            <th class="th-sm" data-field="obj" data-sortable="true">Object Type</th>
-                            <th class="th-sm" data-field="catch" data-sortable="true">Search Archival Image</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-        """
-
-        index = 1
-        for i in obscode[station_code]['MPECs']:
-            o += f"""
-                        <tr>
-                            <td>{index}</td>
-                            <td>{i[0]}</td>
-                            <td>{datetime.datetime.fromtimestamp(i[1])}</td>
-                            <td>{i[2]}</td>
-                            <td>{i[3]}</td>
-                            <td>{i[4]}</td>
-                            <td>{i[5]}</td>
-                        </tr>
-            """
-            index += 1
-            
-        o += """    
-                    </tbody>
-                </table>
-            </div>"""
-        
-        mpecs_for_export = []
-        export_index = 1
-        for i in obscode[station_code]['MPECs']:
-            clean_name = re.sub(r'<[^>]+>', '', i[0]) if isinstance(i[0], str) else i[0]
-            disc = "Yes" if isinstance(i[2], str) and '&#x2713;' in i[2] else "No"
-            first_resp = "Yes" if isinstance(i[3], str) and '&#x2713;' in i[3] else "No"
-            clean_obj = re.sub(r'<[^>]+>', '', i[4]) if isinstance(i[4], str) else i[4]
-            clean_catch = ""
-            if isinstance(i[5], str):
-                catch_match = re.search(r'<a href=([^>]+)>CATCH</a>', i[5], re.IGNORECASE)
-                clean_catch = catch_match.group(1).strip("\"'") if catch_match else ""
-            else:
-                clean_catch = i[5]
-            
-            mpecs_for_export.append({
-                "Index": export_index,
-                "Name": clean_name,
-                "Date/Time": str(datetime.datetime.fromtimestamp(i[1])),
-                "Discoverer": disc,
-                "First-responding Confirmer": first_resp,
-                "Object Type": clean_obj,
-                "Search Archival Image": clean_catch
-            })
-            export_index += 1
-            
-        mpec_json_str = json.dumps(mpecs_for_export)
-
-        o += """
-            <script>
-                const mpecTableData = """ + mpec_json_str + """;
-                const stationCode = '""" + station_code + """';
-
-                function exportMPECsCSV() {
-                    if (!mpecTableData || !mpecTableData.length) {
-                        console.warn("No data available to export.");
-                        return;
-                    }
-
-                    const headers = Object.keys(mpecTableData[0]);
-
-                    const escapeCSV = (val) => {
-                        if (val === null || val === undefined) return '""';
-                        const str = String(val);
-                        if (str.includes(',') || str.includes('"') || str.includes('\\n')) {
-                            return '"' + str.replace(/"/g, '""') + '"';
-                        }
-                        return str;
-                    };
-
-                    const csvRows = [];
-                    csvRows.push(headers.map(escapeCSV).join(','));
-
-                    for (const row of mpecTableData) {
-                        const rowValues = headers.map(header => escapeCSV(row[header]));
-                        csvRows.push(rowValues.join(','));
-                    }
-
-                    const csvString = csvRows.join('\\r\\n');
-                    const blob = new Blob([csvString], { type: 'text/csv;charset=utf-8;' });
-                    const url = URL.createObjectURL(blob);
-                    const link = document.createElement('a');
-                    link.href = url;
-                    link.setAttribute('download', stationCode + '_mpec_export.csv');
-                    document.body.appendChild(link);
-                    link.click();
-                    document.body.removeChild(link);
-                    URL.revokeObjectURL(url);
-                }
-
-                document.addEventListener('DOMContentLoaded', () => {
-                    const btn = document.getElementById('custom-export-btn');
-                    if(btn) {
-                        btn.addEventListener('click', exportMPECsCSV);
-                    }
-                });
-            </script>"""
-
-        # Generate and insert the station objects table
-        o += """
-            <div class="row my-4">
-                <h4 class ="mt-3">Objects Observed by This Station</h4>
-                <table id="OBJ_table"
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-show-columns="true"
-                    data-pagination="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="object" data-sortable="true">Object</th>
-                            <th class="th-sm" data-field="observations" data-sortable="true">Observations</th>
-                            <th class="th-sm" data-field="discoveries" data-sortable="true">Discoveries</th>
-                            <th class="th-sm" data-field="first_obs" data-sortable="true">First Obs</th>
-                            <th class="th-sm" data-field="last_obs" data-sortable="true">Last Obs</th>
-                            <th class="th-sm" data-field="magnitude" data-sortable="true">Magnitude</th>
-                            <th class="th-sm" data-field="mpecs" data-sortable="true">MPECs</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
-
-        objects_table_html = generate_station_objects_table_rows(station_code)
-        o += objects_table_html
-        
-        o += """
-                    </tbody>
-                </table>
-            </div>
-            <div class="row my-4">
-                <h4 class ="mt-3">List of Observers</h4>
-                <table id="OBS_table" 
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-pagination="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="observer" data-sortable="true">Observer Group</th>
-                            <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
-        
-        
-        obs_counts = process_role(obscode[station_code]['OBS'])
-        ind_obs_counts = per_person_counts(obs_counts)
-        mea_counts = process_role(obscode[station_code]['MEA'])
-        ind_mea_counts = per_person_counts(mea_counts)
-
-        # print("Station code: ", station_code)
-        # print("Length of cleaned measurer counts: ", len(mea_counts))
-        # print("Length of original measurer counts: ", len(mpec_data[station_code]['MEA']))
-        # print("Length of cleaned observer counts: ", len(obs_counts))
-        # print("Length of original observer counts: ", len(mpec_data[station_code]['OBS']))
-
-        for observer, count in obs_counts.most_common():
-            o += f"""
-                <tr>
-                    <td>{observer}</td>
-                    <td>{count}</td>
-                </tr>"""
-
-        o += """
-                    </tbody>
-                </table>
-                <table id="IND_OBS_table"
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-pagination="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="individual" data-sortable="true">Individual Observer</th>
-                            <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
-        
-        for ind_observer, count in ind_obs_counts.most_common():
-            o += f"""
-                        <tr>
-                            <td>{ind_observer}</td>
-                            <td>{count}</td>
-                        </tr>"""
+                        <th class="th-sm" data-field="observer" data-sortable="true">Observer Group</th>
+                        <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
+                    </tr>
+                </thead>
+            </table>
+            <table id="IND_OBS_table"
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-pagination="true"
+                data-search-align="left"
+                %(ind_observers)s>
+                <thead>
+                    <tr>
+                        <th class="th-sm" data-field="individual" data-sortable="true">Individual Observer</th>
+                        <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
+                    </tr>
+                </thead>
+            </table>
+        </div>
+        <div class="row my-4">
+            <h4 class ="mt-3">List of Measurers</h4>
+            <table id="MEA_table" 
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-pagination="true"
+                data-search-align="left"
+                %(measurers)s>
+                <thead>
+                    <tr>
+                        <th class="th-sm" data-field="measurer" data-sortable="true">Measurer Group</th>
+                        <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
+                    </tr>
+                </thead>
+            </table>
+            <table id="IND_MEA_table"
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-pagination="true"
+                data-search-align="left"
+                %(ind_measurers)s>
+                <thead>
+                    <tr>
+                        <th class="th-sm" data-field="individual" data-sortable="true">Individual Measurer</th>
+                        <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
+                    </tr>
+                </thead>
+            </table>
+        </div>""" % dict({table: table_attrs(f"data/{station}/{table}/manifest.json") for table in ['mpecs', 'objects', 'observers', 'ind_observers', 'measurers', 'ind_measurers']}, station_code=station_code))
 
-        o += """
-                    </tbody>
-                </table>
-            </div>
-            <div class="row my-4">
-                <h4 class ="mt-3">List of Measurers</h4>
-                <table id="MEA_table" 
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-pagination="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="measurer" data-sortable="true">Measurer Group</th>
-                            <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
-        
-        for measurer, count in mea_counts.most_common():
-            o += f"""
-                        <tr>
-                            <td>{measurer}</td>
-                            <td>{count}</td>
-                        </tr>"""
-            
-        o += """
-                    </tbody>
-                </table>
-                <table id="IND_MEA_table"
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-pagination="true"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="individual" data-sortable="true">Individual Measurer</th>
-                            <th class="th-sm" data-field="count" data-sortable="true">Total MPECs</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
-        
-        for ind_measurer, count in ind_mea_counts.most_common():
-            o += f"""
-                        <tr>
-                            <td>{ind_measurer}</td>
-                            <td>{count}</td>
-                        </tr>"""
-        
-        o += """
-                    </tbody>
-                </table>
-            </div>
-            <div class="row my-4">
-                <h4 class ="mt-3">List of Facilities</h4>
-                <table id="FAC_table" 
-                    class="table table-striped table-bordered table-sm"
-                    data-toggle="table"
-                    data-search="true"
-                    data-pagination="true"
-                    data-sort-name="count"
-                    data-sort-order="desc"
-                    data-search-align="left">
-                    <thead>
-                        <tr>
-                            <th class="th-sm" data-field="facility" data-sortable="true">Facilities</th>
-                            <th class="th-sm" data-field="count" data-sortable="true">Count</th>
-                        </tr>
-                    </thead>
-                    <tbody>"""
+        out.write("""
+        <div class="row my-4">
+            <h4 class ="mt-3">List of Facilities</h4>
+            <table id="FAC_table" 
+                class="table table-striped table-bordered table-sm"
+                data-toggle="table"
+                data-search="true"
+                data-pagination="true"
+                data-sort-name="count"
+                data-sort-order="desc"
+                data-search-align="left">
+                <thead>
+                    <tr>
+                        <th class="th-sm" data-field="facility" data-sortable="true">Facilities</th>
+                        <th class="th-sm" data-field="count" data-sortable="true">Count</th>
+                    </tr>
+                </thead>
+                <tbody>""")
         for facility, count in obscode[station_code]['FAC'].items():
-            o += f"""
-                        <tr>
-                            <td>{facility}</td>
-                            <td>{count}</td>
-                        </tr>"""
-            
-        o += r"""
-                    </tbody>
-                </table>
-            </div>
-            <footer class="text-muted border-top">
-            Script by <a href="https://www.astro.umd.edu/~qye/">Quanzhi Ye</a> and <a href="https://taegonhibbitts.com">Taegon Hibbitts</a>, hosted at <a href="https://sbnmpc.astro.umd.edu">SBN-MPC</a>. Powered by <a href="https://getbootstrap.com"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-bootstrap-fill" viewBox="0 0 16 16">
-            <path d="M6.375 7.125V4.658h1.78c.973 0 1.542.457 1.542 1.237 0 .802-.604 1.23-1.764 1.23H6.375zm0 3.762h1.898c1.184 0 1.81-.48 1.81-1.377 0-.885-.65-1.348-1.886-1.348H6.375v2.725z"/>
-            <path d="M4.002 0a4 4 0 0 0-4 4v8a4 4 0 0 0 4 4h8a4 4 0 0 0 4-4V4a4 4 0 0 0-4-4h-8zm1.06 12V3.545h3.399c1.587 0 2.543.809 2.543 2.11 0 .884-.65 1.675-1.483 1.816v.1c1.143.117 1.904.931 1.904 2.033 0 1.488-1.084 2.396-2.888 2.396H5.062z"/>
-            </svg> Bootstrap</a> and <a href="https://bootstrap-table.com">Bootstrap Table</a>.
-                <a href="https://pdssbn.astro.umd.edu/"><img src="../sbn_logo5_v0.png" width="100" style="vertical-align:bottom"></a>
-                <a href="https://github.com/Small-Bodies-Node/mpecwatch"><svg xmlns="http://www.w3.org/2000/svg" width="50" height="50" fill="currentColor" class="bi bi-github" viewBox="0 0 16 16">
-            <path d="M8 0C3.58 0 0 3.58 0 8c0 3.54 2.29 6.53 5.47 7.59.4.07.55-.17.55-.38 0-.19-.01-.82-.01-1.49-2.01.37-2.53-.49-2.69-.94-.09-.23-.48-.94-.82-1.13-.28-.15-.68-.52-.01-.53.63-.01 1.08.58 1.23.82.72 1.21 1.87.87 2.33.66.07-.52.28-.87.51-1.07-1.78-.2-3.64-.89-3.64-3.95 0-.87.31-1.59.82-2.15-.08-.2-.36-1.02.08-2.12 0 0 .67-.21 2.2.82.64-.18 1.32-.27 2-.27.68 0 1.36.09 2 .27 1.53-1.04 2.2-.82 2.2-.82.44 1.1.16 1.92.08 2.12.51.56.82 1.27.82 2.15 0 3.07-1.87 3.75-3.65 3.95.29.25.54.73.54 1.48 0 1.07-.01 1.93-.01 2.2 0 .21.15.46.55.38A8.012 8.012 0 0 0 16 8c0-4.42-3.58-8-8-8z"/>
-            </svg></a>
-            </footer>
-        </div> <!-- /container -->
-        <!-- jQuery -->
-        <script src="https://code.jquery.com/jquery-3.2.1.slim.min.js" integrity="sha384-KJ3o2DKtIkvYIK3UENzmM7KCkRr/rE9/Qpg6aAZGJwFDMVNA/GpGFF93hXpG5KkN" crossorigin="anonymous"></script>
-        <script>window.jQuery || document.write('<script src="../assets/js/vendor/jquery.min.js"><\/script>')</script>
-        <!-- Popper JS -->
-        <script src="https://cdn.jsdelivr.net/npm/@popperjs/core@2.11.8/dist/umd/popper.min.js" integrity="sha384-I7E8VVD/ismYTF4hNIPjVp/Zjvgyol6VFvRkX/vR+Vc4jQkC+hVqc2pM8ODewa9r" crossorigin="anonymous"></script>
-        <!-- Bootrap JS -->
-        <script src="../dist/js/bootstrap.min.js"></script>
-        <!-- Bootstrap Table JS -->
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/tableExport.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/libs/jsPDF/jspdf.umd.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/extensions/export/bootstrap-table-export.min.js"></script>
-    </body>
-    </html>"""    
+            out.write(f"""
+                    <tr>
+                        <td>{facility}</td>
+                        <td>{count}</td>
+                    </tr>""")
         
-        ## figures ##
+        out.write(r"""
+                </tbody>
+            </table>
+        </div>""")
+
+    if stop_event and stop_event.is_set():
+        return
+    
+    ## figures ##
+    stack = [('update_layout', {'barmode': 'stack'})]
+    with queue.bundle(f"../www/byStation/Graphs/{station}.json") as bundle:
         # figure: yearly breakdown of MPEC types   
-        fig = px.bar(df_yearly, x="Year", y="#MPECs", color="MPECType")
-        fig.update_layout(barmode='stack')
-        fig.write_html(f"../www/byStation/Graphs/{station}.html")
+        bundle.add("yearly", chart('bar', stack, data_frame=breakdown.yearly_frame(), x="Year", y="#MPECs", color="MPECType"))
 
         # figure: yearly breakdown of Discovery object types
-        fig = px.bar(disc_obj, x="Year", y="#MPECs", color="ObjectType")
-        fig.update_layout(barmode='stack')
-        fig.write_html(f"../www/byStation/Graphs/{station}_disc_obj.html")
-
-        # figure: yearly breakdown of Orbit Update object types
-        fig = px.bar(OU_obj, x="Year", y="#MPECs", color="ObjectType")
-        fig.update_layout(barmode='stack')
-        fig.write_html(f"../www/byStation/Graphs/{station}_OU_obj.html")
+        bundle.add("disc_obj", chart('bar', stack, data_frame=breakdown.objects_frame('Discovery'), x="Year", y="#MPECs", color="ObjectType"))
 
-        if stop_event and stop_event.is_set():
-            return
+        # figure: yearly breakdown of Orbit Update (and DOU) object types
+        bundle.add("OU_obj", chart('bar', stack, data_frame=breakdown.objects_frame('OrbitUpdate', 'DOU'), x="Year", y="#MPECs", color="ObjectType"))
+    failures = queue.close()
+    if failures:
+        logging.error(f"{len(failures)} figures of station {station_code} failed")
+    frozen.commit(path for path, name, error in failures)
 
-        #print(station)
-        with open(page, 'w') as f:
-            f.write(o)
+    logging.info(f"Finished processing for station: {station_code} ({(figure_stats()['bundle_bytes'] - bundle_bytes) / 1e3:.0f} kB of figures)")
 
-        logging.info(f"Finished processing for station: {station_code}")
-
-        # Mark the station as processed in the database
-        cursor.execute("""
-            UPDATE LastRun SET Changed = 0 WHERE MPECId = ?
-        """, (station,))
-        conn.commit()
-    finally:
-        conn.close()    
+    return station_code
 
 def _open_database():
     conn = sqlite3.connect(dbFile, timeout=30)  # wait up to 30s for locks
@@ -1156,7 +588,29 @@ def _open_database():
     conn.execute("PRAGMA busy_timeout=30000")   # 30s busy timeout inside SQL engine
     return conn
 
+def _init_worker(shared_stop_event):
+    # with fork the parent's data is inherited and load_data() is a no-op; otherwise it is loaded once per worker
+    global stop_event
+    stop_event = shared_stop_event
+    load_data()
+
+def mark_processed(station_codes):
+    """Mark stations as processed in the database; done by the parent only, in one transaction"""
+    if not station_codes:
+        return
+    conn = _open_database()
+    try:
+        conn.executemany("UPDATE LastRun SET Changed = 0 WHERE MPECId = ?", [('station_'+code,) for code in station_codes])
+        conn.commit()
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate individual station pages')
+    parser.add_argument('stations', nargs='*', help="Station codes to process, or 'auto' for the stations that changed since the last run (default: all stations)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: number of cores)')
+    args = parser.parse_args()
+
     # only on Windows
     if sys.platform == "win32":
         ES_CONTINUOUS       = 0x80000000
@@ -1171,12 +625,13 @@ if __name__ == "__main__":
         def prevent_sleep(): pass
         def allow_sleep(): pass
 
-    build_name_map()
-    if (len(sys.argv) > 1):
-        if sys.argv[1] == 'auto':
-            stations_to_process = get_stations_needing_update()
-        else:
-            stations_to_process = sys.argv[1:]
+    load_data()
+    install_script()
+    install_viewer()
+    if args.stations == ['auto']:
+        stations_to_process = get_stations_needing_update()
+    elif args.stations:
+        stations_to_process = args.stations
     else:
         stations_to_process = list(obscode.keys())
 
@@ -1197,10 +652,11 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
 
     prevent_sleep()
-    #max_workers = max(1, os.cpu_count()//2)
-    max_workers = 1
+    max_workers = max(1, min(args.jobs, len(stations_to_process)))
+    logging.info(f"Using {max_workers} worker processes")
+    processed = []
     time_start = datetime.datetime.now()
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(stop_event,)) as executor:
         # submit only tasks for stations that need updating
         futures = {
             executor.submit(make_station_page, station_code): station_code
@@ -1215,7 +671,8 @@ if __name__ == "__main__":
                     break
 
                 try:
-                    future.result()
+                    if future.result():
+                        processed.append(station)
                 except Exception as exc:
                     logging.error(f"Station {station} failed: {exc}", exc_info=True)
                     stop_event.set()
@@ -1228,6 +685,8 @@ if __name__ == "__main__":
         finally:
             executor.shutdown(wait=False, cancel_futures=True)
     
+    mark_processed(processed)
+    mark_updated()
     allow_sleep()
     time_end = datetime.datetime.now()
     logging.info(f"Total time taken: {time_end - time_start}")
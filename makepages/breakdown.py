@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Yearly and monthly breakdowns of the station statistics as arrays
+
+ The per-year counters of a station in obscode_stat.json (stat[MPECType][year] holds the
+ 'total', the count of every month and, for some MPEC types, of every object type) are
+ read once into an integer cube
+
+    cube[year, MPECType, column]    columns: 'total', MONTHS, OBJ_TYPES
+
+ so a survey is the sum of the cubes of its stations, and the long-format frames used by
+ the figures (one row per (Year or Month, series)) are a single reshape of a slice of it.
+
+ First Follow-Up MPECs are a subset of Follow-Up MPECs; the figures stack both, so the
+ frames for the figures count only the other Follow-Up MPECs under 'Followup' (see
+ stack_followups). The tables show the counters as they are.
+
+ Usage:
+    b = Breakdown(station_cube(obscode['G96']))
+    px.bar(b.yearly_frame(), x="Year", y="#MPECs", color="MPECType")
+
+ (C) Quanzhi Ye
+
+"""
+
+import datetime, numpy as np, pandas as pd
+
+MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup"]
+OBJ_TYPES = ["NEA", "PHA", "Comet", "Satellite", "TNO", "Unusual", "Interstellar", "Unknown"]
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+COLUMNS = ['total'] + MONTHS + OBJ_TYPES
+FIRST_YEAR = 1993
+
+_TOTAL = 0
+_MONTHS = slice(1, 1 + len(MONTHS))
+
+def station_years():
+    """1993 to the current year, newest first (the order of the tables and figures)"""
+    return list(range(datetime.datetime.now().year, FIRST_YEAR - 1, -1))
+
+def station_cube(stat, years=None):
+    """int64 cube[year, MPECType, column] of the counters of one station's statistics;
+    counters missing from `stat` (e.g. the object types of Editorial MPECs) are 0"""
+    years = station_years() if years is None else years
+    cube = np.zeros((len(years), len(MPEC_TYPES), len(COLUMNS)), dtype=np.int64)
+    for j, mpec_type in enumerate(MPEC_TYPES):
+        by_year = stat[mpec_type]
+        for i, year in enumerate(years):
+            counts = by_year.get(str(year))
+            if counts:
+                cube[i, j] = [counts.get(column, 0) for column in COLUMNS]
+    return cube
+
+def long_frame(counts, index, index_name, series, series_name):
+    """Long-format frame of counts[index, series]: one row per (index, series) pair, index-major"""
+    counts = np.asarray(counts)
+    return pd.DataFrame({
+        index_name: np.repeat(index, len(series)),
+        series_name: np.tile(series, len(index)),
+        "#MPECs": counts.reshape(-1),
+    })
+
+def stack_followups(counts):
+    """Copy of counts[..., MPECType] with First Follow-Up MPECs taken out of 'Followup'"""
+    counts = np.array(counts)
+    counts[..., MPEC_TYPES.index('Followup')] -= counts[..., MPEC_TYPES.index('FirstFollowup')]
+    return counts
+
+class Breakdown:
+    """Tables and figure frames of a cube built by station_cube (or a sum of such cubes)"""
+    def __init__(self, cube, years=None):
+        self.cube = cube
+        self.years = station_years() if years is None else years
+
+    def yearly(self):
+        """counts[year, MPECType] of the MPEC totals"""
+        return self.cube[:, :, _TOTAL]
+
+    def monthly(self, year):
+        """counts[month, MPECType] of one year"""
+        return self.cube[self.years.index(year), :, _MONTHS].T
+
+    def objects(self, *mpec_types, obj_types=OBJ_TYPES):
+        """counts[year, ObjectType] summed over `mpec_types`"""
+        types = [MPEC_TYPES.index(t) for t in mpec_types]
+        columns = [COLUMNS.index(o) for o in obj_types]
+        return self.cube[:, types][:, :, columns].sum(axis=1)
+
+    def yearly_frame(self, stacked=True):
+        counts = self.yearly()
+        return long_frame(stack_followups(counts) if stacked else counts, self.years, "Year", MPEC_TYPES, "MPECType")
+
+    def monthly_frame(self, year, stacked=True):
+        counts = self.monthly(year)
+        return long_frame(stack_followups(counts) if stacked else counts, MONTHS, "Month", MPEC_TYPES, "MPECType")
+
+    def objects_frame(self, *mpec_types, obj_types=OBJ_TYPES, label="ObjectType"):
+        return long_frame(self.objects(*mpec_types, obj_types=obj_types), self.years, "Year", obj_types, label)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Build the figures of the chart-producing scripts in a pool of worker processes
+
+ Building a plotly figure and serializing it costs far more than collecting its data, so
+ the generators do not build figures themselves. They describe each one as a chart spec,
+
+    chart('bar', x=[...], y=[...], calls=[('update_layout', {'xaxis_title': 'Year'})])
+
+ i.e. px.bar(x=[...], y=[...]) followed by fig.update_layout(xaxis_title='Year'), and add
+ it to a bundle of a FigureQueue (the queued counterpart of figures.FigureBundle):
+
+    with FigureQueue(jobs=8) as queue:
+        with queue.bundle('../www/byStation/OMF/G96.json') as bundle:
+            bundle.add('yearly', chart('bar', x=days, y=counts))
+        ...
+
+ Specs are batched by chart type (px.pie, px.bar, ...) and each batch is built by one
+ worker. At most 2 * jobs batches are in flight; submitting more waits for the oldest,
+ so memory stays bounded however many figures a script produces. A bundle file is
+ written as soon as all of its figures are built, with the figures in the order they
+ were added. A figure that fails is logged with its bundle and name and left out of the
+ bundle (the page shows "No figure available."); the others are not affected.
+
+ With jobs <= 1 the figures are built in the calling process, e.g. in scripts that
+ already run one worker process per page. The workers are forked: some generators are
+ plain scripts (survey.py) that a spawned worker would run again on import. Where fork
+ is not available (Windows) the figures are always built in the calling process.
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, concurrent.futures, multiprocessing
+import plotly.express as px
+from figures import FigureBundle, figure_spec
+
+BATCH_SIZE = 32
+PROGRESS_EVERY = 500    # figures between progress lines
+
+def chart(kind, calls=(), **args):
+    """Spec of the figure px.<kind>(**args), then fig.<method>(**kwargs) for each (method, kwargs) in calls"""
+    return {'kind': kind, 'args': args, 'calls': list(calls)}
+
+def build(spec):
+    fig = getattr(px, spec['kind'])(**spec['args'])
+    for method, kwargs in spec['calls']:
+        getattr(fig, method)(**kwargs)
+    return fig
+
+def _render_batch(specs):
+    """[(figure spec, None) or (None, error)] for a list of chart specs; runs in the workers"""
+    results = []
+    for spec in specs:
+        try:
+            results.append((figure_spec(build(spec)), None))
+        except Exception as e:
+            results.append((None, '%s: %s' % (type(e).__name__, e)))
+    return results
+
+class QueuedBundle:
+    """Bundle whose figures are built by a FigureQueue; saved once closed and all figures are built"""
+    def __init__(self, queue, path):
+        self.queue = queue
+        self.path = path
+        self.names = []
+        self.figures = {}
+        self.waiting = 0
+        self.closed = False
+
+    def add(self, name, spec):
+        name = str(name)
+        self.names.append(name)
+        self.waiting += 1
+        self.queue._submit(self, name, spec)
+
+    def save(self):
+        self.closed = True
+        self.queue._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+        return False
+
+class FigureQueue:
+    def __init__(self, jobs=None, batch_size=BATCH_SIZE, log=print):
+        self.jobs = (os.cpu_count() or 1) if jobs is None else jobs
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.jobs = 1
+        self.batch_size = batch_size
+        self.max_in_flight = 2 * self.jobs
+        self.log = log
+        self.executor = None
+        if self.jobs > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context('fork'))
+        self.pending = {}      # chart type -> [(bundle, name, spec)] not yet dispatched
+        self.in_flight = {}    # future -> [(bundle, name)]
+        self.submitted = 0
+        self.done = 0
+        self.failures = []     # [(bundle path, figure name, error)]
+
+    def bundle(self, path):
+        return QueuedBundle(self, path)
+
+    def _submit(self, bundle, name, spec):
+        batch = self.pending.setdefault(spec['kind'], [])
+        batch.append((bundle, name, spec))
+        self.submitted += 1
+        if len(batch) >= self.batch_size:
+            self._dispatch(spec['kind'])
+
+    def _dispatch(self, kind):
+        batch = self.pending.pop(kind)
+        keys = [(bundle, name) for bundle, name, spec in batch]
+        specs = [spec for bundle, name, spec in batch]
+        if self.executor is None:
+            self._collect(keys, _render_batch(specs))
+            return
+        while len(self.in_flight) >= self.max_in_flight:
+            self._harvest(concurrent.futures.FIRST_COMPLETED)
+        self.in_flight[self.executor.submit(_render_batch, specs)] = keys
+        self._harvest(timeout=0)
+
+    def _harvest(self, return_when=concurrent.futures.ALL_COMPLETED, timeout=None):
+        if not self.in_flight:
+            return
+        done, _ = concurrent.futures.wait(self.in_flight, timeout=timeout, return_when=return_when)
+        for future in done:
+            keys = self.in_flight.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                # the worker died; every figure of the batch is lost
+                results = [(None, '%s: %s' % (type(e).__name__, e))] * len(keys)
+            self._collect(keys, results)
+
+    def _collect(self, keys, results):
+        for (bundle, name), (spec, error) in zip(keys, results):
+            if error is None:
+                bundle.figures[name] = spec
+            else:
+                self.failures.append((bundle.path, name, error))
+                self.log("Figure %s [%s] failed: %s" % (bundle.path, name, error))
+            bundle.waiting -= 1
+            self.done += 1
+            if self.done % PROGRESS_EVERY == 0:
+                self.progress()
+            self._finish(bundle)
+
+    def _finish(self, bundle):
+        if bundle.closed and bundle.waiting == 0:
+            saved = FigureBundle(bundle.path)
+            saved.figures = {name: bundle.figures[name] for name in bundle.names if name in bundle.figures}
+            saved.save()
+            bundle.figures = {}
+
+    def progress(self):
+        self.log("Figures: %i/%i built, %i failed" % (self.done, self.submitted, len(self.failures)))
+
+    def close(self):
+        """Build everything still queued and write the remaining bundles; returns the failures"""
+        for kind in list(self.pending):
+            self._dispatch(kind)
+        self._harvest()
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.submitted:
+            self.progress()
+        return self.failures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        return False
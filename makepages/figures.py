@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Write plotly figures that share a single copy of plotly.js, or as JSON
+				bundles rendered by the page itself
+
+ By default fig.write_html embeds all of plotly.js (about 3.5 MB) in every figure file.
+ Figures written with write_figure reference one copy instead,
+
+    ../www/dist/js/plotly-<version>.min.js
+
+ installed once from the plotly package. The version is part of the file name, so a
+ plotly upgrade installs a new file next to the old one (pages still referencing the
+ old one keep working) and browsers can cache it indefinitely. The figure links it by a
+ path relative to its own location, so `path` must be the figure's final place in the
+ www tree.
+
+ The charts of the station and survey pages are not written as files of their own.
+ Their data and layout are collected in a FigureBundle, one JSON file per page (or
+ per set of pages, e.g. all monthly pages of a station), and the page renders them in
+ place of the old iframes with the shared viewer (../www/dist/js/figure_viewer.js,
+ see VIEWER below):
+
+    <div class="mpec-figure" data-figure-bundle="<bundle url>" data-figure="<name>"></div>
+
+ The plotly template, the same for every figure, is left out of the bundles and
+ shipped once with the viewer.
+
+ Every process counts the figures it wrote and the bytes not written; see report().
+
+ Usage:
+    write_figure(px.bar(df, x="Year", y="#MPECs"), '../www/MPECTally_ByYear_Fig.html')
+
+    with FigureBundle('../www/byStation/Graphs/station_G96.json') as bundle:
+        bundle.add('yearly', px.bar(df, x="Year", y="#MPECs"))
+    page.write(figure_div('Graphs/station_G96.json', 'yearly'))
+    ...
+    report()
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, json
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+from output_writer import write_text
+
+WWW = '../www'
+BUNDLE_VERSION = 1
+VIEWER_ASSET = 'dist/js/figure_viewer.js'    # relative to ../www
+
+_installed = {}    # www root -> path of the installed plotly.js
+_viewers = {}      # www root -> path of the installed viewer
+_stats = {'figures': 0, 'saved': 0, 'bundles': 0, 'bundled': 0, 'bundle_bytes': 0}
+_bundle_size = None
+
+def plotlyjs_asset():
+    """Path of the shared plotly.js relative to the www root"""
+    return 'dist/js/plotly-%s.min.js' % get_plotlyjs_version()
+
+def install_plotlyjs(www=WWW):
+    """Write the shared plotly.js to the www tree unless it is already there; returns its path"""
+    if www not in _installed:
+        path = os.path.join(www, plotlyjs_asset())
+        if not os.path.exists(path):
+            write_text(path, get_plotlyjs())
+        _installed[www] = path
+    return _installed[www]
+
+def plotlyjs_tag(prefix='', www=WWW):
+    """<script> tag loading the shared plotly.js into a page at `prefix` from the site root"""
+    install_plotlyjs(www)
+    return '\n    <script src="%s%s"></script>' % (prefix, plotlyjs_asset())
+
+def bundle_size():
+    global _bundle_size
+    if _bundle_size is None:
+        _bundle_size = len(get_plotlyjs().encode('utf-8'))
+    return _bundle_size
+
+def write_figure(fig, path, www=WWW, **kwargs):
+    """fig.write_html(path, ...) referencing the shared plotly.js; returns the bytes saved"""
+    url = os.path.relpath(install_plotlyjs(www), os.path.dirname(path) or '.').replace(os.sep, '/')
+    # plotly gives the figure's div a random id; one derived from the file name keeps unchanged figures byte-identical
+    kwargs.setdefault('div_id', 'figure-' + os.path.splitext(os.path.basename(path))[0])
+    write_text(path, fig.to_html(include_plotlyjs=url, **kwargs))
+    _stats['figures'] += 1
+    _stats['saved'] += bundle_size()
+    return bundle_size()
+
+def figure_spec(fig):
+    """Data and layout of a figure, without the template (the viewer applies it)"""
+    spec = json.loads(fig.to_json())
+    spec['layout'].pop('template', None)
+    return spec
+
+class FigureBundle:
+    """Figures saved together in one JSON file, {"version": 1, "figures": {name: {"data": [...], "layout": {...}}}};
+    the file is only written by save() (or on leaving a with block without an exception)"""
+    def __init__(self, path):
+        self.path = path
+        self.figures = {}
+
+    def add(self, name, fig):
+        self.figures[str(name)] = figure_spec(fig)
+
+    def save(self):
+        text = json.dumps({'version': BUNDLE_VERSION, 'figures': self.figures}, separators=(',', ':'))
+        write_text(self.path, text)
+        _stats['bundles'] += 1
+        _stats['bundled'] += len(self.figures)
+        _stats['bundle_bytes'] += len(text)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+        return False
+
+def figure_div(bundle_url, name, height=525):
+    """Placeholder of a bundled figure; bundle_url is relative to the page"""
+    return '<div class="mpec-figure" data-figure-bundle="%s" data-figure="%s" style="height: %ipx; width: 100%%;"></div>' % (bundle_url, name, height)
+
+def viewer_tags(prefix='', www=WWW):
+    """<script> tags of plotly.js and the figure viewer for a page at `prefix` from the site root"""
+    install_viewer(www)
+    return plotlyjs_tag(prefix, www) + '\n    <script src="%s%s"></script>' % (prefix, VIEWER_ASSET)
+
+VIEWER = r"""/*
+ * MPEC Watch: render the figures bundled by makepages/figures.py. Placeholders are
+ *   <div class="mpec-figure" data-figure-bundle="<bundle url>" data-figure="<name>"></div>
+ * Each bundle is fetched once per page; figures are drawn when they scroll into view.
+ */
+(function () {
+  var TEMPLATE = __TEMPLATE__;
+  var bundles = {};
+
+  function bundle(url) {
+    if (!bundles[url]) {
+      bundles[url] = fetch(url).then(function (response) {
+        if (!response.ok) throw new Error(url + ': HTTP ' + response.status);
+        return response.json();
+      });
+    }
+    return bundles[url];
+  }
+
+  function render(el) {
+    var name = el.getAttribute('data-figure');
+    return bundle(el.getAttribute('data-figure-bundle')).then(function (b) {
+      var spec = b.figures[name];
+      if (!spec) {
+        el.textContent = 'No figure available.';
+        return;
+      }
+      var layout = Object.assign({template: TEMPLATE, autosize: true}, spec.layout);
+      return Plotly.newPlot(el, spec.data, layout, {responsive: true});
+    }).catch(function (error) {
+      console.error(error);
+      el.textContent = 'The figure could not be loaded.';
+    });
+  }
+
+  function renderAll() {
+    var figures = document.querySelectorAll('.mpec-figure');
+    if (!('IntersectionObserver' in window)) {
+      figures.forEach(render);
+      return;
+    }
+    var observer = new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          render(entry.target);
+        }
+      });
+    }, {rootMargin: '200px'});
+    figures.forEach(function (el) { observer.observe(el); });
+  }
+
+  window.renderFigure = render;
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', renderAll);
+  else renderAll();
+})();
+"""
+
+def install_viewer(www=WWW):
+    """Write the viewer, with the current plotly template, to ../www/dist/js/figure_viewer.js if it is missing or out of date"""
+    path = os.path.join(www, VIEWER_ASSET)
+    if www in _viewers:
+        return path
+    template = pio.templates[pio.templates.default]
+    write_text(path, VIEWER.replace('__TEMPLATE__', pio.to_json(template.to_plotly_json(), validate=False)))
+    _viewers[www] = path
+    return path
+
+def figure_stats():
+    """Counts of this process: 'figures' written as HTML, 'saved' bytes of plotly.js not written,
+    'bundles' written holding 'bundled' figures in 'bundle_bytes' bytes"""
+    return dict(_stats)
+
+def report(log=print):
+    if _stats['figures']:
+        log("%i figures written with the shared plotly.js, %.1f MB of embedded plotly.js saved" % (_stats['figures'], _stats['saved'] / 1e6))
+    if _stats['bundles']:
+        log("%i figures written in %i bundles, %.1f MB" % (_stats['bundled'], _stats['bundles'], _stats['bundle_bytes'] / 1e6))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Regenerate the outputs of closed years only when their counters change
+
+ The yearly and monthly outputs of past years (the monthly pages of the stations and
+ surveys, obs-YYYY.html, survey-YYYY.html) only depend on the counters of that year in
+ obscode_stat.json, which rarely change once the year is over. Such an output is frozen
+ with a hash of its inputs, built from the per-(station, year) counter hashes of
+ year_hash, and is skipped as long as that hash is unchanged and its files exist. The
+ current year and the all-time views are always regenerated.
+
+ Frozen outputs are kept in TABLE FrozenOutputs of the output manifest (see
+ output_writer.py):
+
+    Key         e.g. 'station/G96/2019', 'obs/2019'
+    Hash        hash of the inputs the output was last generated from
+
+ Outputs are only frozen once all of their files are written (see FrozenOutputs).
+ Bump FROZEN_VERSION when the layout of frozen outputs changes, or thaw them all with
+
+    python frozen_years.py --thaw
+
+ Usage:
+    frozen = FrozenOutputs()
+    inputs = digest(year_hash(stat['G96'], 2019), mpccode['G96']['name'])
+    if not frozen.current('station/G96/2019', inputs, page):
+        ...write page...
+        frozen.add('station/G96/2019', inputs, page)
+    frozen.commit()
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, json, hashlib, datetime, argparse
+from output_writer import manifest
+
+FROZEN_VERSION = 2
+
+# every per-year counter of a station in obscode_stat.json
+MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup", "Precovery", "1stRecovery"]
+
+_ready = None
+
+def _db():
+    global _ready
+    conn = manifest()
+    if _ready is not conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS FrozenOutputs (
+                Key TEXT PRIMARY KEY,
+                Hash TEXT
+            ) WITHOUT ROWID
+        """)
+        _ready = conn
+    return conn
+
+def closed(year):
+    return int(year) < datetime.datetime.now().year
+
+def digest(*parts):
+    """Hash of JSON-serializable parts (numpy integers included)"""
+    text = json.dumps([FROZEN_VERSION, parts], sort_keys=True, separators=(',', ':'), default=int)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def year_hash(stat, year):
+    """Hash of the counters of one station (its entry of obscode_stat.json) in one year"""
+    year = str(year)
+    return digest(stat.get(year), [stat[t].get(year) for t in MPEC_TYPES if t in stat])
+
+class FrozenOutputs:
+    """Frozen outputs; outputs added during a run are frozen by commit()"""
+    def __init__(self):
+        self.pending = []
+
+    def current(self, key, inputs, *paths):
+        """True if the output `key` was generated from `inputs` and all of its files exist"""
+        row = _db().execute("SELECT Hash FROM FrozenOutputs WHERE Key = ?", (key,)).fetchone()
+        return row is not None and row[0] == inputs and all(os.path.exists(path) for path in paths)
+
+    def add(self, key, inputs, *paths):
+        """Freeze the output `key` at commit(), unless one of its files failed"""
+        self.pending.append((key, inputs, paths))
+
+    def commit(self, failed=()):
+        """Freeze the added outputs; `failed` are paths that could not be written (e.g. figure bundles)"""
+        failed = set(failed)
+        rows = [(key, inputs) for key, inputs, paths in self.pending if not failed.intersection(paths)]
+        _db().executemany("INSERT OR REPLACE INTO FrozenOutputs (Key, Hash) VALUES (?,?)", rows)
+        self.pending = []
+        return len(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Frozen outputs of closed years')
+    parser.add_argument('--thaw', action='store_true', help='Forget all frozen outputs, so the next run regenerates them')
+    args = parser.parse_args()
+    if args.thaw:
+        n = _db().execute("DELETE FROM FrozenOutputs").rowcount
+        print("%i outputs thawed" % n)
+    else:
+        print("%i frozen outputs" % _db().execute("SELECT COUNT(*) FROM FrozenOutputs").fetchone()[0])
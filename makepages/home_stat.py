@@ -4,14 +4,48 @@
  PROJECT:		MPEC Watch
  PURPOSE:		Generate some statistics for the home page
 
+ Leaderboards (MPECs, discoveries, follow-ups, first follow-ups, precoveries, recoveries
+ and first-sighter recoveries) for the last 1 year, last 5 years and all time are kept
+ in a rolling state (home_stat_state.json, see leaderboard.py). Each run only adds the
+ MPECs ingested since the previous run and expires the days that left the windows, then
+ writes the top 10 of every leaderboard to home_stat.json:
+
+    {
+        "windows": {"1y": [start, end], "5y": [start, end], "all": [null, end]},
+        "boards": {"mpec": {"1y": [[station, count], ...], "5y": [...], "all": [...]}, ...}
+    }
+
+ Usage: python home_stat.py [--rebuild]
+
  (C) Quanzhi Ye
- 
+
 """
 
-import sqlite3, datetime, re, json
+import sqlite3, datetime, json, time, argparse
+from station_roles import classify, DISCOVERY, FOLLOWUP, FIRST_FOLLOWUP, PRECOVERY, RECOVERY, FIRST_RECOVERY
+from leaderboard import RollingLeaderboard, WINDOWS
 
 dbFile = '../mpecwatch_v4.db'
 mpccode = '../mpccode.json'
+outputFile = 'home_stat.json'
+stateFile = 'home_stat_state.json'
+
+TOP_K = 10
+
+# leaderboard -> station role counted (None: every MPEC that lists the station)
+BOARDS = {
+    'mpec': None,
+    'disc': DISCOVERY,
+    'fu': FOLLOWUP,
+    'fu1': FIRST_FOLLOWUP,
+    'pc': PRECOVERY,
+    'r': RECOVERY,
+    'r1': FIRST_RECOVERY,
+}
+
+parser = argparse.ArgumentParser(description='Home page leaderboards')
+parser.add_argument('--rebuild', action='store_true', help='Recount everything instead of updating the saved state')
+args = parser.parse_args()
 
 db = sqlite3.connect(dbFile)
 cursor = db.cursor()
@@ -19,138 +53,39 @@ cursor = db.cursor()
 with open(mpccode) as mpccode:
     mpccode = json.load(mpccode)
 
-mpec_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-disc_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-fu_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-fu1_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-pc_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-r_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-r1_count = '{:3s} {:10s} {:10s} {:10s}\n'.format('cod', 'count1y', 'count5y', 'countall')
-
-for s in mpccode:
-    t_1y = datetime.datetime.utcnow() - datetime.timedelta(days=365)
-    t_5y = datetime.datetime.utcnow() - datetime.timedelta(days=365*5)
-    
-    # Count numbers of MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select station from MPEC where station like '%{}%' and time >= {};".format(s, t_1y.timestamp()))
-    c_1y = len(cursor.fetchall())
-    cursor.execute("select station from MPEC where station like '%{}%' and time >= {};".format(s, t_5y.timestamp()))
-    c_5y = len(cursor.fetchall())
-    cursor.execute("select station from MPEC where station like '%{}%';".format(s))
-    c_all = len(cursor.fetchall())
-    mpec_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(c_1y), str(c_5y), str(c_all))
-    
-    # Count numbers of discovery MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select DiscStation from MPEC where DiscStation like '{}' and time >= {};".format(s, t_1y.timestamp()))
-    c_1y = len(cursor.fetchall())
-    cursor.execute("select DiscStation from MPEC where DiscStation like '{}' and time >= {};".format(s, t_5y.timestamp()))
-    c_5y = len(cursor.fetchall())
-    cursor.execute("select DiscStation from MPEC where DiscStation like '{}';".format(s))
-    c_all = len(cursor.fetchall())
-    disc_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(c_1y), str(c_5y), str(c_all))
-    
-    # Count numbers of follow-up MPECs (precoveries/follow-ups, but not DOUs) for each station for last 1, 5 year and all time
-    
-    cursor.execute("select Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_1y.timestamp(), s))
-    c_1y = len(cursor.fetchall())
-    cursor.execute("select Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_5y.timestamp(), s))
-    c_5y = len(cursor.fetchall())
-    cursor.execute("select Station from MPEC where Station like '%{}%' and MPECType = 'Discovery' and DiscStation != '{}';".format(s, s))
-    c_all = len(cursor.fetchall())
-    fu_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(c_1y), str(c_5y), str(c_all))
-    
-    # Count numbers of first follow-up MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_1y.timestamp(), s))
-    d_1y = cursor.fetchall()
-    c_1y = 0
-    for i in d_1y:
-        if i[0] + ', ' + s in i[1]:
-            c_1y += 1
-            
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_5y.timestamp(), s))
-    d_5y = cursor.fetchall()
-    c_5y = 0
-    for i in d_5y:
-        if i[0] + ', ' + s in i[1]:
-            c_5y += 1
-            
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and MPECType = 'Discovery' and DiscStation != '{}';".format(s, s))
-    d_all = cursor.fetchall()
-    c_all = 0
-    for i in d_all:
-        if i[0] + ', ' + s in i[1]:
-            c_all += 1
-            
-    fu1_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(c_1y), str(c_5y), str(c_all))
-    
-    # Count numbers of precovery MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_1y.timestamp(), s))
-    d_1y = cursor.fetchall()
-    c_1y = 0
-    for i in d_1y:
-        if bool(re.match('.*' + s + '.*' + i[0] + '.*', i[1])):
-            c_1y += 1
-            
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'Discovery' and DiscStation != '{}';".format(s, t_5y.timestamp(), s))
-    d_5y = cursor.fetchall()
-    c_5y = 0
-    for i in d_5y:
-        if bool(re.match('.*' + s + '.*' + i[0] + '.*', i[1])):
-            c_5y += 1
-            
-    cursor.execute("select DiscStation, Station from MPEC where Station like '%{}%' and MPECType = 'Discovery' and DiscStation != '{}';".format(s, s))
-    d_all = cursor.fetchall()
-    c_all = 0
-    for i in d_all:
-        if bool(re.match('.*' + s + '.*' + i[0] + '.*', i[1])):
-            c_all += 1
-            
-    pc_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(c_1y), str(c_5y), str(c_all))
-    
-    # Count numbers of orbit update MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'OrbitUpdate';".format(s, t_1y.timestamp()))
-    r_1y = len(cursor.fetchall())
-    cursor.execute("select Station from MPEC where Station like '%{}%' and time >= {} and MPECType = 'OrbitUpdate';".format(s, t_5y.timestamp()))
-    r_5y = len(cursor.fetchall())
-    cursor.execute("select Station from MPEC where Station like '%{}%' and MPECType = 'OrbitUpdate';".format(s))
-    r_all = len(cursor.fetchall())
-    r_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(r_1y), str(r_5y), str(r_all))
-    
-    # Count numbers of "1st spotter" orbit update MPECs for each station for last 1, 5 year and all time
-    
-    cursor.execute("select Station from MPEC where Station like '{}%' and time >= {} and MPECType = 'OrbitUpdate';".format(s, t_1y.timestamp()))
-    r1_1y = len(cursor.fetchall())
-            
-    cursor.execute("select Station from MPEC where Station like '{}%' and time >= {} and MPECType = 'OrbitUpdate';".format(s, t_5y.timestamp()))
-    r1_5y = len(cursor.fetchall())
-            
-    cursor.execute("select Station from MPEC where Station like '{}%' and MPECType = 'OrbitUpdate';".format(s))
-    r1_all = len(cursor.fetchall())
-            
-    r1_count += '{:3s} {:10s} {:10s} {:10s}\n'.format(s, str(r1_1y), str(r1_5y), str(r1_all))
-    
-with open('mpec_count.txt', 'w') as f:
-	f.write(mpec_count)
-
-with open('disc_count.txt', 'w') as f:
-	f.write(disc_count)
-    
-with open('fu_count.txt', 'w') as f:
-	f.write(fu_count)
-    
-with open('fu1_count.txt', 'w') as f:
-	f.write(fu1_count)
-    
-with open('pc_count.txt', 'w') as f:
-	f.write(pc_count)
-
-with open('r_count.txt', 'w') as f:
-	f.write(r_count)
-    
-with open('r1_count.txt', 'w') as f:
-	f.write(r1_count)
+max_rowid = cursor.execute("SELECT MAX(rowid) FROM MPEC").fetchone()[0] or 0
+
+state = None if args.rebuild else RollingLeaderboard.load(stateFile, BOARDS)
+if state is None or state.last_rowid > max_rowid:
+    # no usable state (or the database was rebuilt): count from scratch
+    state = RollingLeaderboard(BOARDS)
+
+today = int(time.time() // 86400)
+state.advance(today)
+
+new_mpecs = 0
+for t, stations, disc_station, mpec_type in cursor.execute("SELECT Time, Station, DiscStation, MPECType FROM MPEC WHERE rowid > ? AND rowid <= ?", (state.last_rowid, max_rowid)):
+    new_mpecs += 1
+    day = int(t // 86400)
+    for station, roles in classify(stations, disc_station, mpec_type):
+        for board, role in BOARDS.items():
+            if role is None or roles & role:
+                state.add(day, station, board)
+state.last_rowid = max_rowid
+
+db.close()
+state.save(stateFile)
+print("Added %i new MPECs to the leaderboards" % new_mpecs)
+
+def day_string(day):
+    return datetime.datetime.fromtimestamp(day * 86400, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+with open(outputFile, 'w') as f:
+    json.dump({
+        'windows': {
+            '1y': [day_string(today - WINDOWS['1y']), day_string(today)],
+            '5y': [day_string(today - WINDOWS['5y']), day_string(today)],
+            'all': [None, day_string(today)],
+        },
+        'boards': {board: {window: state.top(board, window, TOP_K, mpccode) for window in ['1y', '5y', 'all']} for board in BOARDS},
+    }, f)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Rolling station leaderboards for the home page, updated incrementally
+
+ For every leaderboard the per-station counts are kept for all time and for the last
+ 1 and 5 years. New MPECs are added to a ring buffer of daily per-station counts that
+ covers the 5-year window. When the day changes, the days falling out of a window are
+ subtracted from that window's totals, so a refresh only costs the new MPECs plus the
+ expired days. The top K of a window is taken with a small heap.
+
+ The state is saved as JSON between runs (see RollingLeaderboard.save).
+
+ (C) Quanzhi Ye
+
+"""
+
+import heapq, json
+
+STATE_VERSION = 1
+
+# window -> number of days before today still inside the window
+WINDOWS = {'1y': 365, '5y': 365*5}
+RING_SIZE = WINDOWS['5y'] + 1
+
+class RollingLeaderboard:
+    def __init__(self, boards):
+        self.boards = list(boards)
+        self.last_rowid = 0     # last MPEC rowid added
+        self.today = None       # days since 1970-01-01 (UTC) the windows end on
+        self.totals = {board: {window: {} for window in list(WINDOWS) + ['all']} for board in self.boards}
+        # slot (day % RING_SIZE) -> [day, {board: {station: count}}]
+        self.ring = [None] * RING_SIZE
+
+    @classmethod
+    def load(cls, path, boards):
+        """Saved state, or None if there is none or it was made for other leaderboards."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if state.get('version') != STATE_VERSION or state.get('boards') != list(boards):
+            return None
+        lb = cls(boards)
+        lb.last_rowid = state['last_rowid']
+        lb.today = state['today']
+        lb.totals = state['totals']
+        for day, counts in state['ring']:
+            lb.ring[day % RING_SIZE] = [day, counts]
+        return lb
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'version': STATE_VERSION,
+                'boards': self.boards,
+                'last_rowid': self.last_rowid,
+                'today': self.today,
+                'totals': self.totals,
+                'ring': sorted(slot for slot in self.ring if slot is not None),
+            }, f)
+
+    def _subtract(self, window, counts):
+        for board, stations in counts.items():
+            totals = self.totals[board][window]
+            for station, n in stations.items():
+                totals[station] -= n
+                if totals[station] == 0:
+                    del totals[station]
+
+    def advance(self, today):
+        """Move the end of the windows to `today`, expiring the days that fall out of them."""
+        if self.today is None:
+            self.today = today
+            return
+        if today <= self.today:
+            return
+        for i, slot in enumerate(self.ring):
+            if slot is None:
+                continue
+            day, counts = slot
+            for window, span in WINDOWS.items():
+                # inside the window ending on self.today, outside the one ending on today
+                if self.today - span <= day < today - span:
+                    self._subtract(window, counts)
+            if day < today - WINDOWS['5y']:
+                self.ring[i] = None
+        self.today = today
+
+    def add(self, day, station, board):
+        """Count one MPEC of `station` on `day` in `board`."""
+        totals = self.totals[board]
+        totals['all'][station] = totals['all'].get(station, 0) + 1
+        if day < self.today - WINDOWS['5y']:
+            return
+
+        slot = self.ring[day % RING_SIZE]
+        if slot is None or slot[0] != day:
+            slot = self.ring[day % RING_SIZE] = [day, {}]
+        counts = slot[1].setdefault(board, {})
+        counts[station] = counts.get(station, 0) + 1
+
+        for window, span in WINDOWS.items():
+            if day >= self.today - span:
+                totals[window][station] = totals[window].get(station, 0) + 1
+
+    def top(self, board, window, k=10, stations=None):
+        """[[station, count], ...] of the k best stations, ties broken by station code."""
+        totals = self.totals[board][window]
+        best = heapq.nsmallest(k, ((-n, station) for station, n in totals.items() if stations is None or station in stations))
+        return [[station, -n] for n, station in best]
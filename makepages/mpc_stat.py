@@ -8,239 +8,22 @@
  
 """
 
-import sqlite3, datetime, json, numpy as np, plotly.express as px, pandas as pd, calendar, pytz
-
-eastern = pytz.timezone('US/Eastern')
+import sqlite3
+from mpec_metrics import update_metrics
+from output_writer import write_text
+from figures import plotlyjs_tag
+from volatile import placeholder, volatile_tag, mark_updated
 
 dbFile = '../mpecwatch_v4.db'
 
 db = sqlite3.connect(dbFile)
 cursor = db.cursor()
 
-currentYear = datetime.datetime.now().year
-
-list_computer = ['Alexandersen', 'Bell', 'MPC', 'Marsden', 'Pan', 'Pike', 'Spahr', 'Veres', 'Williams', 'Others']
-list_issuer = ['A. U. Tomatic', 'Brian G. Marsden', 'Gareth V. Williams', 'Kyle E. Smalley', 'M. P. C. Staff', 'Sonia Keys', 'Timothy B. Spahr', 'Others']
-
-# for computer and issuer: do stat, write to json and make figures
-
-stat_computer = dict()
-for i in list_computer:
-    stat_computer[i] = {}
-    
-stat_issuer = dict()
-for i in list_issuer:
-    stat_issuer[i] = {}
-    
-df_computer = pd.DataFrame({"Year": [], "Computer": [], "#MPECs": []})
-df_issuer = pd.DataFrame({"Year": [], "Issuer": [], "#MPECs": []})
-
-for y in np.arange(1993, currentYear+1, 1):
-    y = int(y)
-    timestamp_start = calendar.timegm(datetime.date(y,1,1).timetuple())
-    timestamp_end = calendar.timegm(datetime.date(y+1,1,1).timetuple())-1
-    
-    computer_nmpec_thisyear = []
-    issuer_nmpec_thisyear = []
-    
-    for computer in list_computer:
-        cursor.execute("select `OrbitComp`, count(*) from MPEC where time >= {} and time <= {} group by `OrbitComp`;".format(timestamp_start, timestamp_end))
-        r = cursor.fetchall()
-        matched = [(i, el.index(computer)) for i, el in enumerate(r) if computer in el]
-        if computer == 'Others':
-            total = 0
-            none = 0
-            for i in r:
-                total += i[1]
-                if i[0] == None or i[0] == '':
-                    none += i[1]
-
-            stat_computer[computer][str(y)] = total - sum(computer_nmpec_thisyear) - none
-            computer_nmpec_thisyear.append(stat_computer[computer][str(y)])
-        else:
-            if len(matched) == 0:
-                stat_computer[computer][str(y)] = 0
-                computer_nmpec_thisyear.append(0)
-            else:
-                stat_computer[computer][str(y)] = r[matched[0][0]][1]
-                computer_nmpec_thisyear.append(r[matched[0][0]][1])
-        
-    for issuer in list_issuer:
-        cursor.execute("select `Issuer`, count(*) from MPEC where time >= {} and time <= {} group by `Issuer`;".format(timestamp_start, timestamp_end))
-        r = cursor.fetchall()
-        matched = [(i, el.index(issuer)) for i, el in enumerate(r) if issuer in el]
-        if issuer == 'Others':
-            total = 0
-            none = 0
-            for i in r:
-                total += i[1]
-                if i[0] == None or i[0] == '':
-                    none += i[1]
-                
-            stat_issuer[issuer][str(y)] = total - sum(issuer_nmpec_thisyear) - none
-            issuer_nmpec_thisyear.append(stat_issuer[issuer][str(y)])
-        else:
-            if len(matched) == 0:
-                stat_issuer[issuer][str(y)] = 0
-                issuer_nmpec_thisyear.append(0)
-            else:
-                stat_issuer[issuer][str(y)] = r[matched[0][0]][1]
-                issuer_nmpec_thisyear.append(r[matched[0][0]][1])
-        
-    df_computer = pd.concat([df_computer, pd.DataFrame({"Year": [y]*len(list_computer), "Orbit computer": list_computer, "#MPECs": computer_nmpec_thisyear})], ignore_index = True)
-    df_issuer = pd.concat([df_issuer, pd.DataFrame({"Year": [y]*len(list_issuer), "Issuer": list_issuer, "#MPECs": issuer_nmpec_thisyear})], ignore_index = True)
-    
-fig = px.bar(df_computer, x="Year", y="#MPECs", color="Orbit computer", title="Number MPECs by orbit computers")
-fig.write_html("../www/Computer_ByYear_Fig.html")  
-
-fig = px.bar(df_issuer, x="Year", y="#MPECs", color="Issuer", title="Number MPECs by issuers")
-fig.write_html("../www/Issuer_ByYear_Fig.html")
-
-with open('../www/computer_stat.json', 'w') as o:
-    json.dump(stat_computer, o)
-    
-with open('../www/issuer_stat.json', 'w') as o:
-    json.dump(stat_issuer, o)    
-    
-# for computer and issuer but for discovery and orbit update MPECs only: do stat, write to json and make figures
-
-for mt in ['Discovery', 'OrbitUpdate']:
-    stat_computer = dict()
-    for i in list_computer:
-        stat_computer[i] = {}
-        
-    stat_issuer = dict()
-    for i in list_issuer:
-        stat_issuer[i] = {}
-        
-    df_computer = pd.DataFrame({"Year": [], "Computer": [], "#MPECs": []})
-    df_issuer = pd.DataFrame({"Year": [], "Issuer": [], "#MPECs": []})
-    
-    for y in np.arange(1993, currentYear+1, 1):
-        y = int(y)
-        timestamp_start = calendar.timegm(datetime.date(y,1,1).timetuple())
-        timestamp_end = calendar.timegm(datetime.date(y+1,1,1).timetuple())-1
-        
-        computer_nmpec_thisyear = []
-        issuer_nmpec_thisyear = []
-        
-        for computer in list_computer:
-            cursor.execute("select `OrbitComp`, count(*) from MPEC where time >= {} and time <= {} and MPECType = '{}' group by `OrbitComp`;".format(timestamp_start, timestamp_end, mt))
-            r = cursor.fetchall()
-            matched = [(i, el.index(computer)) for i, el in enumerate(r) if computer in el]
-            if computer == 'Others':
-                total = 0
-                none = 0
-                for i in r:
-                    total += i[1]
-                    if i[0] == None or i[0] == '':
-                        none += i[1]
-    
-                stat_computer[computer][str(y)] = total - sum(computer_nmpec_thisyear) - none
-                computer_nmpec_thisyear.append(stat_computer[computer][str(y)])
-            else:
-                if len(matched) == 0:
-                    stat_computer[computer][str(y)] = 0
-                    computer_nmpec_thisyear.append(0)
-                else:
-                    stat_computer[computer][str(y)] = r[matched[0][0]][1]
-                    computer_nmpec_thisyear.append(r[matched[0][0]][1])
-            
-        for issuer in list_issuer:
-            cursor.execute("select `Issuer`, count(*) from MPEC where time >= {} and time <= {} and MPECType = '{}' group by `Issuer`;".format(timestamp_start, timestamp_end, mt))
-            r = cursor.fetchall()
-            matched = [(i, el.index(issuer)) for i, el in enumerate(r) if issuer in el]
-            if issuer == 'Others':
-                total = 0
-                none = 0
-                for i in r:
-                    total += i[1]
-                    if i[0] == None or i[0] == '':
-                        none += i[1]
-                    
-                stat_issuer[issuer][str(y)] = total - sum(issuer_nmpec_thisyear) - none
-                issuer_nmpec_thisyear.append(stat_issuer[issuer][str(y)])
-            else:
-                if len(matched) == 0:
-                    stat_issuer[issuer][str(y)] = 0
-                    issuer_nmpec_thisyear.append(0)
-                else:
-                    stat_issuer[issuer][str(y)] = r[matched[0][0]][1]
-                    issuer_nmpec_thisyear.append(r[matched[0][0]][1])
-            
-        df_computer = pd.concat([df_computer, pd.DataFrame({"Year": [y]*len(list_computer), "Orbit computer": list_computer, "#MPECs": computer_nmpec_thisyear})], ignore_index = True)
-        df_issuer = pd.concat([df_issuer, pd.DataFrame({"Year": [y]*len(list_issuer), "Issuer": list_issuer, "#MPECs": issuer_nmpec_thisyear})], ignore_index = True)
-        
-    fig = px.bar(df_computer, x="Year", y="#MPECs", color="Orbit computer", title="Number MPECs by orbit computers")
-    fig.write_html("../www/Computer_%s_ByYear_Fig.html" % mt)  
-    
-    fig = px.bar(df_issuer, x="Year", y="#MPECs", color="Issuer", title="Number MPECs by issuers")
-    fig.write_html("../www/Issuer_%s_ByYear_Fig.html" % mt)
-    
-    with open('../www/computer_%s_stat.json' % mt.lower(), 'w') as o:
-        json.dump(stat_computer, o)
-        
-    with open('../www/issuer_%s_stat.json' % mt.lower(), 'w') as o:
-        json.dump(stat_issuer, o)    
-
-# hours, weekdays and types of MPECs from the past year, 2015, 2005 and 1995
-
-## 1995, 2005 and 2015
+# all figures and JSON files come from the shared metrics engine, which only recomputes them after an ingest (or on a new day)
 
-for y in [1, 1995, 2005, 2015]:
+update_metrics(cursor)
+db.close()
 
-    df_hours = pd.DataFrame({"Hour": [], "MPECType": [], "#MPECs": []}) 
-    df_weekdays = pd.DataFrame({"Weekday": [], "MPECType": [], "#MPECs": []}) 
-    
-    if y == 1:
-        t_1y = datetime.datetime.utcnow() - datetime.timedelta(days=365)
-        cursor.execute("select Time, MPECType from MPEC where time >= {};".format(t_1y.timestamp()))
-        r = cursor.fetchall()
-    else:
-        timestamp_start = calendar.timegm(datetime.date(y,1,1).timetuple())
-        timestamp_end = calendar.timegm(datetime.date(y+1,1,1).timetuple())-1
-        cursor.execute("select Time, MPECType from MPEC where time >= {} and time <= {};".format(timestamp_start, timestamp_end))
-        r = cursor.fetchall()
-    
-    tmp = []
-    
-    for i in r:
-        tmp.append([int(pytz.utc.localize(datetime.datetime.utcfromtimestamp(i[0])).astimezone(eastern).strftime('%H')), pytz.utc.localize(datetime.datetime.utcfromtimestamp(i[0])).astimezone(eastern).strftime('%a'), i[1]])
-        
-    tmp = np.array(tmp)
-        
-    for h in list(range(24)):
-        h = str(h)
-        editorial = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'Editorial'))[0])
-        discovery = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'Discovery'))[0])
-        orbitupdate = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'OrbitUpdate'))[0])
-        dou = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'DOU'))[0])
-        listupdate = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'ListUpdate'))[0])
-        retraction = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'Retraction'))[0])
-        other = len(np.where((tmp.T[0] == h) & (tmp.T[2] == 'Other'))[0])
-        df_hours = df_hours.append(pd.DataFrame({"Hour": [h, h, h, h, h, h, h], "MPECType": ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other"], "#MPECs": [editorial, discovery, orbitupdate, dou, listupdate, retraction, other]}), ignore_index = True)
-        
-    for w in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']:
-        editorial = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'Editorial'))[0])
-        discovery = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'Discovery'))[0])
-        orbitupdate = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'OrbitUpdate'))[0])
-        dou = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'DOU'))[0])
-        listupdate = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'ListUpdate'))[0])
-        retraction = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'Retraction'))[0])
-        other = len(np.where((tmp.T[1] == w) & (tmp.T[2] == 'Other'))[0])
-        df_weekdays = df_weekdays.append(pd.DataFrame({"Weekday": [w, w, w, w, w, w, w], "MPECType": ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other"], "#MPECs": [editorial, discovery, orbitupdate, dou, listupdate, retraction, other]}), ignore_index = True)
-    
-    if y == 1:
-        fig = px.bar(df_hours, x="Hour", y="#MPECs", color="MPECType", title="Number and type of MPECs by hours over the past 1-year period")
-        fig.write_html("../www/MPECTally_ByHour_Fig_Last1Yr.html")
-        fig = px.bar(df_weekdays, x="Weekday", y="#MPECs", color="MPECType", title="Number and type of MPECs by weekdays over the last 1-year period")
-        fig.write_html("../www/MPECTally_ByWeekday_Fig_Last1Yr.html")
-    else:
-        fig = px.bar(df_hours, x="Hour", y="#MPECs", color="MPECType", title="Number and type of MPECs by hours in %s" % str(y))
-        fig.write_html("../www/MPECTally_ByHour_Fig_%s.html" % str(y))
-        fig = px.bar(df_weekdays, x="Weekday", y="#MPECs", color="MPECType", title="Number and type of MPECs by weekdays in %s" % str(y))
-        fig.write_html("../www/MPECTally_ByWeekday_Fig_%s.html" % str(y))
-        
 # make the page
 
 o = """
@@ -325,7 +108,7 @@ o = """
           </div>
           <p>
             Last update: UTC %s
-          </p>""" % (datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+          </p>""" % placeholder('updated')
           
 o += """
           <div class="page-header">
@@ -347,22 +130,64 @@ o += """
             <iframe id="igraph6" scrolling="no" style="border:none;" seamless="seamless" src="Issuer_OrbitUpdate_ByYear_Fig.html" height="525" width="100%"></iframe>
           </p>
           
-          <h2>MPEC post time by the hour, in the last 1-year period, 2015, 2005 and 1995</h2>
+          <h2>MPEC post time by the hour and by weekdays</h2>
           <p>Hours, weekdays are all in US/Eastern time (where MPC is located).</p>
           <p>
-            <iframe id="igraph7" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByHour_Fig_Last1Yr.html" height="525" width="100%"></iframe>
-            <iframe id="igraph8" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByHour_Fig_2015.html" height="525" width="100%"></iframe>
-            <iframe id="igraph9" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByHour_Fig_2005.html" height="525" width="100%"></iframe>
-            <iframe id="igraph10" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByHour_Fig_1995.html" height="525" width="100%"></iframe>
+            <label for="hw-period">Period:</label>
+            <select id="hw-period" class="form-control" style="width:auto;display:inline-block;">
+              <option value="last1yr">Last 1-year period</option>
+            </select>
           </p>
+          <div id="hw-hours" style="height:525px;width:100%;"></div>
+          <div id="hw-weekdays" style="height:525px;width:100%;"></div>
           
-          <h2>MPEC post time by weekdays, in the last 1-year period, 2015, 2005 and 1995</h2>
-          <p>
-            <iframe id="igraph11" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByWeekday_Fig_Last1Yr.html" height="525" width="100%"></iframe>
-            <iframe id="igraph12" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByWeekday_Fig_2015.html" height="525" width="100%"></iframe>
-            <iframe id="igraph13" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByWeekday_Fig_2005.html" height="525" width="100%"></iframe>
-            <iframe id="igraph14" scrolling="no" style="border:none;" seamless="seamless" src="MPECTally_ByWeekday_Fig_1995.html" height="525" width="100%"></iframe>
-          </p>"""
+          """ + plotlyjs_tag() + """
+          <script>
+            // counts[year, hour, weekday, type] cube written by mpec_metrics.py
+            function decodeCounts(data) {
+              var bytes = Uint8Array.from(atob(data), function (c) { return c.charCodeAt(0); });
+              return new Int32Array(bytes.buffer);
+            }
+            fetch('stats/hour_weekday_cube.json').then(function (r) { return r.json(); }).then(function (hw) {
+              var cube = decodeCounts(hw.cube), last1yr = decodeCounts(hw.last1yr);
+              var nt = hw.types.length, size = 24 * 7 * nt;
+              var select = document.getElementById('hw-period');
+              hw.years.slice().reverse().forEach(function (y) {
+                var opt = document.createElement('option');
+                opt.value = y;
+                opt.text = y;
+                select.appendChild(opt);
+              });
+              function draw() {
+                var counts, label;
+                if (select.value == 'last1yr') {
+                  counts = last1yr;
+                  label = 'over the past 1-year period';
+                } else {
+                  var i = hw.years.indexOf(parseInt(select.value));
+                  counts = cube.subarray(i * size, (i + 1) * size);
+                  label = 'in ' + select.value;
+                }
+                var hours = [], weekdays = [];
+                hw.types.forEach(function (type, t) {
+                  var byHour = new Array(24).fill(0), byWeekday = new Array(7).fill(0);
+                  for (var h = 0; h < 24; h++) {
+                    for (var w = 0; w < 7; w++) {
+                      var n = counts[(h * 7 + w) * nt + t];
+                      byHour[h] += n;
+                      byWeekday[w] += n;
+                    }
+                  }
+                  hours.push({type: 'bar', name: type, x: Array.from(Array(24).keys()), y: byHour});
+                  weekdays.push({type: 'bar', name: type, x: hw.weekdays, y: byWeekday});
+                });
+                Plotly.react('hw-hours', hours, {barmode: 'stack', title: 'Number and type of MPECs by hours ' + label, xaxis: {title: 'Hour', dtick: 1}, yaxis: {title: '#MPECs'}, legend: {title: {text: 'MPECType'}}});
+                Plotly.react('hw-weekdays', weekdays, {barmode: 'stack', title: 'Number and type of MPECs by weekdays ' + label, xaxis: {title: 'Weekday'}, yaxis: {title: '#MPECs'}, legend: {title: {text: 'MPECType'}}});
+              }
+              select.addEventListener('change', draw);
+              draw();
+            });
+          </script>"""
     
 o += """
     	<footer class="pt-5 my-5 text-muted border-top">
@@ -389,9 +214,9 @@ o += """
         <script src="https://cdn.jsdelivr.net/npm/jquery/dist/jquery.min.js"></script>
         <script src="https://cdn.jsdelivr.net/npm/popper.js@1.16.0/dist/umd/popper.min.js"></script>
         <script src="https://stackpath.bootstrapcdn.com/bootstrap/4.3.1/js/bootstrap.min.js" integrity="sha384-JjSmVgyd0p3pXB1rRibZUAYoIIy6OrQ6VrjIEaFf/nJGzIxFDsf4x0xIM+B07jRM" crossorigin="anonymous"></script>
-        <script src="https://unpkg.com/bootstrap-table@1.19.1/dist/bootstrap-table.min.js"></script>
+        <script src="https://unpkg.com/bootstrap-table@1.19.1/dist/bootstrap-table.min.js"></script>""" + volatile_tag() + """
       </body>
     </html>"""
     
-with open('../www/mpc_stuff.html', 'w') as f:
-    f.write(o)
+write_text('../www/mpc_stuff.html', o)
+mark_updated()
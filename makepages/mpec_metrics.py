@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Metrics engine shared by stats.py and mpc_stat.py
+
+ The metrics (MPECs per year by orbit computer and by issuer, overall and for Discovery
+ and OrbitUpdate MPECs, and MPEC post times by hour and weekday) are computed once into
+ a versioned artifact, mpec_metrics.json, tagged with the database's ingest generation
+ (see query_cache.py) and the UTC date (the last 1-year period moves every day). The
+ figures and JSON files in ../www are written only when the artifact is rebuilt, so the
+ second page rendered in a run, or any page added later, costs no queries or plotting.
+
+ MPEC post times are bucketed by hour and weekday in US/Eastern time (where MPC is
+ located). The timestamps are converted in one vectorized step and counted with a single
+ bincount over (year, hour, weekday, MPECType) codes into an int32 cube covering every
+ year since 1993 (years are UTC calendar years), plus the same counts for the last
+ 1-year period. The cube is shipped to the browser as ../www/stats/hour_weekday_cube.json:
+
+    {"years": [1993, ...], "weekdays": [...], "types": [...], "shape": [years, 24, 7, types],
+     "cube": "<base64 of little-endian int32>", "last1yr": "<base64, shape [24, 7, types]>"}
+
+ and mpc_stuff.html switches between years client-side.
+
+ Usage:
+    metrics = update_metrics(cursor)
+
+ (C) Quanzhi Ye
+
+"""
+
+import datetime, json, os, base64, numpy as np, pandas as pd, plotly.express as px
+from query_cache import QueryCache, generation
+from figures import write_figure, report
+from output_writer import write_text
+
+METRICS_VERSION = 2
+METRICS_FILE = 'mpec_metrics.json'
+CUBE_ASSET = 'stats/hour_weekday_cube.json'    # relative to ../www
+
+TIMEZONE = 'US/Eastern'
+MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other"]
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+LIST_COMPUTER = ['Alexandersen', 'Bell', 'MPC', 'Marsden', 'Pan', 'Pike', 'Spahr', 'Veres', 'Williams', 'Others']
+LIST_ISSUER = ['A. U. Tomatic', 'Brian G. Marsden', 'Gareth V. Williams', 'Kyle E. Smalley', 'M. P. C. Staff', 'Sonia Keys', 'Timothy B. Spahr', 'Others']
+
+# breakdown key -> MPECType (None: all MPECs); the key is also the suffix of the output files
+BREAKDOWN_TYPES = {'': None, 'Discovery': 'Discovery', 'OrbitUpdate': 'OrbitUpdate'}
+FIRST_YEAR = 1993
+
+def hour_weekday_cube(times, mpec_types, years=None):
+    """int32 counts[year, hour, weekday, type] of MPECs posted at unix `times` (counts[hour, weekday, type] if
+    no `years` are given); weekday 0 is Monday, types follow MPEC_TYPES"""
+    local = pd.to_datetime(np.asarray(times, dtype='int64'), unit='s', utc=True)
+    if years is None:
+        year_codes, n_years = np.zeros(len(local), dtype='int64'), 1
+    else:
+        year_codes, n_years = local.year.to_numpy() - years[0], len(years)
+    local = local.tz_convert(TIMEZONE)
+    type_codes = np.asarray(pd.Categorical(mpec_types, categories=MPEC_TYPES).codes, dtype='int64')
+    codes = ((year_codes * 24 + local.hour.to_numpy()) * 7 + local.weekday.to_numpy()) * len(MPEC_TYPES) + type_codes
+    # MPECs of types not in MPEC_TYPES (code -1) or outside `years` are not counted
+    codes = codes[(type_codes >= 0) & (year_codes >= 0) & (year_codes < n_years)]
+    shape = (n_years, 24, 7, len(MPEC_TYPES))
+    cube = np.bincount(codes, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+    return cube if years is not None else cube[0]
+
+def encode_counts(counts):
+    return base64.b64encode(np.ascontiguousarray(counts, dtype='<i4').tobytes()).decode()
+
+def breakdown(rows, names, current_year, mt=None):
+    """{name: {year: #MPECs}} for 1993 to current_year; 'Others' counts every other non-empty name"""
+    counts = dict()
+    for year, mpec_type, name, n in rows:
+        if mt is None or mpec_type == mt:
+            counts[(year, name)] = counts.get((year, name), 0) + n
+
+    stat = dict()
+    for i in names:
+        stat[i] = {}
+
+    for y in range(1993, current_year+1):
+        total = sum(n for (year, name), n in counts.items() if year == y and name != None and name != '')
+        for name in names:
+            if name == 'Others':
+                stat[name][str(y)] = total - sum(stat[i][str(y)] for i in names if i != 'Others')
+            else:
+                stat[name][str(y)] = counts.get((y, name), 0)
+    return stat
+
+def build_metrics(cursor):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    current_year = datetime.datetime.now().year
+
+    # one grouped query per column covers every year and MPEC type
+    cache = QueryCache(cursor)
+    computer_rows = cache.fetchall("select cast(strftime('%Y', Time, 'unixepoch') as integer), `MPECType`, `OrbitComp`, count(*) from MPEC group by 1, 2, 3;")
+    issuer_rows = cache.fetchall("select cast(strftime('%Y', Time, 'unixepoch') as integer), `MPECType`, `Issuer`, count(*) from MPEC group by 1, 2, 3;")
+    cache.save()
+
+    # all post times are fetched once and bucketed per period
+    cursor.execute("select Time, MPECType from MPEC;")
+    r = cursor.fetchall()
+    times = np.array([i[0] for i in r], dtype='int64')
+    mpec_types = np.array([i[1] for i in r], dtype=object)
+
+    years = list(range(FIRST_YEAR, current_year+1))
+    cube = hour_weekday_cube(times, mpec_types, years)
+    last_year = times >= (now - datetime.timedelta(days=365)).timestamp()
+    last1yr = hour_weekday_cube(times[last_year], mpec_types[last_year])
+
+    return {
+        'version': METRICS_VERSION,
+        'generation': generation(cursor),
+        'date': now.strftime('%Y-%m-%d'),
+        'computer': {key: breakdown(computer_rows, LIST_COMPUTER, current_year, mt) for key, mt in BREAKDOWN_TYPES.items()},
+        'issuer': {key: breakdown(issuer_rows, LIST_ISSUER, current_year, mt) for key, mt in BREAKDOWN_TYPES.items()},
+        'hour_weekday': {
+            'years': years,
+            'weekdays': WEEKDAYS,
+            'types': MPEC_TYPES,
+            'shape': list(cube.shape),
+            'cube': encode_counts(cube),
+            'last1yr': encode_counts(last1yr),
+        },
+    }
+
+def load_metrics(cursor, path=METRICS_FILE):
+    """The saved metrics, or None if there are none or they are out of date"""
+    try:
+        with open(path) as f:
+            metrics = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if metrics.get('version') != METRICS_VERSION or metrics.get('generation') != generation(cursor) \
+        or metrics.get('date') != datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d'):
+        return None
+    return metrics
+
+def breakdown_frame(stat, label):
+    return pd.DataFrame([{"Year": int(y), label: name, "#MPECs": stat[name][y]} for y in stat[list(stat)[0]] for name in stat])
+
+def write_outputs(metrics, www='../www'):
+    """Figures and JSON files of the metrics"""
+    for key in BREAKDOWN_TYPES:
+        suffix = '_%s' % key if key else ''
+        stat_computer = metrics['computer'][key]
+        stat_issuer = metrics['issuer'][key]
+
+        fig = px.bar(breakdown_frame(stat_computer, "Orbit computer"), x="Year", y="#MPECs", color="Orbit computer", title="Number MPECs by orbit computers")
+        write_figure(fig, "%s/Computer%s_ByYear_Fig.html" % (www, suffix), www)
+
+        fig = px.bar(breakdown_frame(stat_issuer, "Issuer"), x="Year", y="#MPECs", color="Issuer", title="Number MPECs by issuers")
+        write_figure(fig, "%s/Issuer%s_ByYear_Fig.html" % (www, suffix), www)
+
+        write_text('%s/computer%s_stat.json' % (www, suffix.lower()), json.dumps(stat_computer))
+        write_text('%s/issuer%s_stat.json' % (www, suffix.lower()), json.dumps(stat_issuer))
+
+    write_text(os.path.join(www, CUBE_ASSET), json.dumps(metrics['hour_weekday']))
+
+def update_metrics(cursor, path=METRICS_FILE):
+    """Saved metrics if still current; otherwise rebuild them, write their outputs and save them"""
+    metrics = load_metrics(cursor, path)
+    if metrics is None:
+        metrics = build_metrics(cursor)
+        write_outputs(metrics)
+        report()
+        with open(path, 'w') as f:
+            json.dump(metrics, f)
+    return metrics
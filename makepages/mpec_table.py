@@ -0,0 +1,116 @@
+"""
+Shared MPEC table helpers
+
+obscode_stat.py stores every MPEC once in obscode_mpecs.json; stations (and surveys)
+only keep integer indexes into that table. The HTML for the "List of Individual MPECs"
+tables is rendered here, at page build time, by StationPage.py and survey.py.
+
+Table layout (one row per MPEC, see COLUMNS):
+    [MPECId, Title, Time, MPECType, ObjectType, DiscStation, FirstConf, PackedDesig]
+
+ (C) Quanzhi Ye
+"""
+
+import datetime
+import json
+
+MPEC_TABLE_FILE = 'obscode_mpecs.json'
+
+COLUMNS = ["MPECId", "Title", "Time", "MPECType", "ObjectType", "DiscStation", "FirstConf", "PackedDesig"]
+MPEC_ID, TITLE, TIME, MPEC_TYPE, OBJECT_TYPE, DISC_STATION, FIRST_CONF, PACKED_DESIG = range(len(COLUMNS))
+
+CHECK_MARK = "&#x2713;"
+
+OBJECT_TYPE_LABELS = {
+    "unk": "Unknown",
+    "NEAg22": "NEA (H>22)",
+    "NEA1822": "NEA (18>H>22)",
+    "NEAl18": "NEA (H<18)",
+    "PHAl18": "PHA (H<18)",
+    "PHAg18": "PHA (H>18)",
+}
+
+BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+def encode(num, alphabet=BASE62):
+    """Encode a positive number in Base X
+    Arguments:
+    - `num`: The number to encode
+    - `alphabet`: The alphabet to use for encoding
+    """
+    if num == 0:
+        return alphabet[0]
+    arr = []
+    base = len(alphabet)
+    while num:
+        num, rem = divmod(num, base)
+        arr.append(alphabet[rem])
+    arr.reverse()
+    return ''.join(arr)
+
+def load_mpec_table(path=MPEC_TABLE_FILE):
+    """Return the list of MPEC rows written by obscode_stat.py."""
+    with open(path) as f:
+        return json.load(f)['rows']
+
+def write_mpec_table(rows, path=MPEC_TABLE_FILE):
+    with open(path, 'w') as f:
+        json.dump({'columns': COLUMNS, 'rows': rows}, f)
+
+def mpec_url(mpec_id):
+    """MPC URL of an MPEC, e.g. 'MPEC 2023-A01' -> .../mpec/K23/K23A01.html"""
+    id = mpec_id[5::]
+    packed_front = ""
+    packed_back = ""
+
+    if id[0:2] == "18":
+        packed_front = "I" + id[2:4]
+    elif id[0:2] == "19":
+        packed_front = "J" + id[2:4]
+    elif id[0:2] == "20":
+        packed_front = "K" + id[2:4]
+
+    if len(id) == 8:
+        packed_back = packed_front + id[-3::]
+    elif len(id) == 9:
+        packed_back = packed_front + id[5] + encode(int(id[6:8])) + id[-1]
+
+    return "https://www.minorplanetcenter.net/mpec/{}/{}.html".format(packed_front, packed_back)
+
+def catch_url(row):
+    """CATCH archival image search URL, only for MPECs with an object type."""
+    if row[OBJECT_TYPE] and row[PACKED_DESIG]:
+        return "https://catch.astro.umd.edu/data?target={}".format(row[PACKED_DESIG])
+    return ""
+
+def is_discoverer(row, stations):
+    return row[MPEC_TYPE] == 'Discovery' and row[DISC_STATION] in stations
+
+def is_first_conf(row, stations):
+    return row[MPEC_TYPE] == 'Discovery' and row[FIRST_CONF] in stations
+
+def render_row(row, stations):
+    """
+    Cells of one row of the individual MPEC table:
+    [Name (linked), Date/Time, Discoverer, First-responding Confirmer, Object Type, CATCH]
+    `stations` is the collection of station codes the page is about.
+    """
+    url = catch_url(row)
+    return [
+        '<a href="{}">{}\t{}</a>'.format(mpec_url(row[MPEC_ID]), row[MPEC_ID], row[TITLE]),
+        datetime.datetime.fromtimestamp(row[TIME]),
+        CHECK_MARK if is_discoverer(row, stations) else "",
+        CHECK_MARK if is_first_conf(row, stations) else "",
+        OBJECT_TYPE_LABELS.get(row[OBJECT_TYPE], row[OBJECT_TYPE]),
+        '<a href={}>CATCH</a>'.format(url) if url else "",
+    ]
+
+def export_row(row, stations):
+    """Plain-text version of render_row() for CSV export."""
+    return {
+        "Name": row[MPEC_ID] + "\t" + row[TITLE],
+        "Date/Time": str(datetime.datetime.fromtimestamp(row[TIME])),
+        "Discoverer": "Yes" if is_discoverer(row, stations) else "No",
+        "First-responding Confirmer": "Yes" if is_first_conf(row, stations) else "No",
+        "Object Type": OBJECT_TYPE_LABELS.get(row[OBJECT_TYPE], row[OBJECT_TYPE]),
+        "Search Archival Image": catch_url(row),
+    }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Canonical observer and measurer names
+
+ At ingest time, proc.py resolves the observers and measurers of every station in an MPEC
+ to canonical persons in the database (PersonResolver; tables Person, PersonAlias,
+ PersonBlock and MPECPersons), and keeps a per-person index of stations, roles, MPEC counts
+ and first/last years of activity (PersonIndex). Names are normalized (see normalize_name)
+ and mapped to the first person, in sorted order, they match with a token_sort_ratio of at
+ least THRESHOLD. A new name is only scored against the persons sharing one of its blocks
+ (see block_keys), looked up through the indexed PersonBlock table.
+
+ PersonPage.py and the observer and measurer tables of StationPage.py are read from these
+ tables, so every page shows the same persons.
+
+ MPECs ingested before that are resolved (and PersonIndex recounted) by PersonResolver the
+ first time it finds MPECPersons empty, i.e. on the first run of proc.py after the upgrade,
+ or by hand with:
+
+    python name_map.py --backfill
+
+ (C) Quanzhi Ye
+
+"""
+
+import re, logging, sqlite3, argparse
+from rapidfuzz import fuzz, process
+
+THRESHOLD = 90
+
+def normalize_name(name: str) -> str:
+    name = name.strip()
+    name = re.sub(r'\s+', ' ', name)
+    name = re.sub(r'\.\s', '.', name)
+    return name
+
+def block_keys(name):
+    """Blocks of a name: each word of 3+ letters, and its initials"""
+    words = re.findall(r'[^\W\d_]+', name.lower())
+    if not words:
+        return ['x:' + name.lower()]
+    return ['w:' + w for w in words if len(w) >= 3] + ['i:' + ''.join(sorted(w[0] for w in words))]
+
+PERSON_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS Person (
+        PersonId INTEGER PRIMARY KEY,
+        Name TEXT UNIQUE
+    )
+    """,
+    # normalized name as published -> person
+    """
+    CREATE TABLE IF NOT EXISTS PersonAlias (
+        Alias TEXT PRIMARY KEY,
+        PersonId INTEGER,
+        FOREIGN KEY (PersonId) REFERENCES Person(PersonId)
+    )
+    """,
+    # block key (see block_keys) -> person, to find the candidates of a new name
+    """
+    CREATE TABLE IF NOT EXISTS PersonBlock (
+        Key TEXT,
+        PersonId INTEGER,
+        PRIMARY KEY (Key, PersonId),
+        FOREIGN KEY (PersonId) REFERENCES Person(PersonId)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS MPECPersons (
+        MPECId TEXT,
+        StationCode TEXT,
+        Role TEXT,
+        PersonId INTEGER,
+        RawName TEXT,
+        PRIMARY KEY (MPECId, StationCode, Role, PersonId),
+        FOREIGN KEY (MPECId) REFERENCES MPEC(MPECId),
+        FOREIGN KEY (PersonId) REFERENCES Person(PersonId)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_mpecpersons_person ON MPECPersons(PersonId);",
+    # observer and measurer tables of a station page
+    "CREATE INDEX IF NOT EXISTS idx_mpecpersons_station ON MPECPersons(StationCode, Role, MPECId);",
+    # person -> station, role, #MPECs and first/last year (UTC) of activity; kept up to date by add_mpec_persons
+    """
+    CREATE TABLE IF NOT EXISTS PersonIndex (
+        PersonId INTEGER,
+        StationCode TEXT,
+        Role TEXT,
+        MPECCount INTEGER,
+        FirstYear INTEGER,
+        LastYear INTEGER,
+        PRIMARY KEY (PersonId, StationCode, Role),
+        FOREIGN KEY (PersonId) REFERENCES Person(PersonId)
+    )
+    """,
+    # persons of a station page
+    "CREATE INDEX IF NOT EXISTS idx_personindex_station ON PersonIndex(StationCode, Role, MPECCount);",
+]
+
+class PersonResolver:
+    """Resolves observer and measurer names to Person ids. A name seen before is looked up in
+    PersonAlias; a new one is only scored against the persons sharing one of its blocks."""
+    def __init__(self, cursor, threshold=THRESHOLD, backfill=True):
+        self.cursor = cursor
+        self.threshold = threshold
+        for sql in PERSON_SCHEMA:
+            cursor.execute(sql)
+        # tables just created (or never filled) are filled once from the station tables
+        if backfill and cursor.execute("SELECT 1 FROM MPECPersons LIMIT 1").fetchone() is None:
+            n = self.backfill()
+            logging.info("MPECPersons backfilled from %d station tables.", n)
+
+    def person_id(self, name):
+        """Person id of a name as published, or None for an empty name"""
+        name = normalize_name(name)
+        if not name:
+            return None
+        row = self.cursor.execute("SELECT PersonId FROM PersonAlias WHERE Alias = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+
+        keys = block_keys(name)
+        candidates = dict(self.cursor.execute("""
+            SELECT DISTINCT p.PersonId, p.Name FROM PersonBlock b JOIN Person p ON b.PersonId = p.PersonId
+            WHERE b.Key IN ({}) ORDER BY p.Name
+        """.format(','.join('?' * len(keys))), keys).fetchall())
+        match = process.extractOne(name, candidates, scorer=fuzz.token_sort_ratio, score_cutoff=self.threshold) if candidates else None
+        if match:
+            person = match[2]
+        else:
+            # no good match → new person
+            self.cursor.execute("INSERT INTO Person (Name) VALUES (?)", (name,))
+            person = self.cursor.lastrowid
+            self.cursor.executemany("INSERT OR IGNORE INTO PersonBlock (Key, PersonId) VALUES (?,?)", [(key, person) for key in keys])
+        self.cursor.execute("INSERT INTO PersonAlias (Alias, PersonId) VALUES (?,?)", (name, person))
+        return person
+
+    def add_mpec_persons(self, mpec_id, station, role, group, year=None):
+        """Record the persons of a comma-joined observer ('OBS') or measurer ('MEA') group of a station in an MPEC
+        published in `year`; PersonIndex is updated unless no year is given (see rebuild_person_index)"""
+        for raw in group.split(','):
+            person = self.person_id(raw)
+            if person is None:
+                continue
+            self.cursor.execute("INSERT OR IGNORE INTO MPECPersons (MPECId, StationCode, Role, PersonId, RawName) VALUES (?,?,?,?,?)",
+                (mpec_id, station, role, person, raw.strip()))
+            if self.cursor.rowcount == 1 and year is not None:
+                self.cursor.execute("""
+                    INSERT INTO PersonIndex (PersonId, StationCode, Role, MPECCount, FirstYear, LastYear) VALUES (?,?,?,1,?,?)
+                    ON CONFLICT (PersonId, StationCode, Role) DO UPDATE SET
+                        MPECCount = MPECCount + 1,
+                        FirstYear = MIN(FirstYear, excluded.FirstYear),
+                        LastYear = MAX(LastYear, excluded.LastYear)
+                """, (person, station, role, year, year))
+
+    def backfill(self, commit=None):
+        """Resolve the observers and measurers of every station table already in the database and
+        recount PersonIndex; returns the number of stations"""
+        stations = [row[0] for row in self.cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'station\\_%' ESCAPE '\\' ORDER BY name").fetchall()]
+        for table in stations:
+            station = table[len('station_'):]
+            rows = self.cursor.execute("SELECT DISTINCT MPEC, Observer, Measurer FROM {} ORDER BY MPEC, Observer, Measurer".format(table)).fetchall()
+            for mpec_id, observer, measurer in rows:
+                self.add_mpec_persons(mpec_id, station, 'OBS', observer or '')
+                self.add_mpec_persons(mpec_id, station, 'MEA', measurer or '')
+            if commit:
+                commit()
+            logging.info("%s: %d MPECs", table, len(rows))
+        rebuild_person_index(self.cursor)
+        return len(stations)
+
+def rebuild_person_index(cursor):
+    """Recount PersonIndex from MPECPersons"""
+    cursor.execute("DELETE FROM PersonIndex")
+    cursor.execute("""
+        INSERT INTO PersonIndex (PersonId, StationCode, Role, MPECCount, FirstYear, LastYear)
+        SELECT mp.PersonId, mp.StationCode, mp.Role, COUNT(*),
+               MIN(CAST(strftime('%Y', m.Time, 'unixepoch') AS INTEGER)), MAX(CAST(strftime('%Y', m.Time, 'unixepoch') AS INTEGER))
+        FROM MPECPersons mp LEFT JOIN MPEC m ON m.MPECId = mp.MPECId
+        GROUP BY mp.PersonId, mp.StationCode, mp.Role
+    """)
+
+def backfill(dbFile):
+    """Resolve the observers and measurers of every station table already in the database"""
+    db = sqlite3.connect(dbFile)
+    cursor = db.cursor()
+    PersonResolver(cursor, backfill=False).backfill(db.commit)
+    db.commit()
+    n = cursor.execute("SELECT COUNT(*) FROM Person").fetchone()[0]
+    db.close()
+    logging.info("%d persons in the database.", n)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Observer/measurer name canonicalization')
+    parser.add_argument('--backfill', action='store_true', help='Resolve the persons of every MPEC already in the database')
+    parser.add_argument('--db', default='../mpecwatch_v4.db', help='Database file (default: ../mpecwatch_v4.db)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.backfill:
+        backfill(args.db)
+    else:
+        parser.print_help()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Write the files of the www tree only when their content changed
+
+ Every generated file goes through this module. The new content is hashed (SHA-1) and
+ compared with a manifest of the files written before, TABLE OutputFiles in
+ ../output_manifest.db (next to the www tree, so it is not deployed):
+
+    Path        absolute path of the file
+    Hash        SHA-1 of its content
+    Size        size in bytes
+    MTime       st_mtime_ns of the file when it was written
+    Changed     unix time of the last write that changed the file
+
+ A file whose hash matches, and that was not touched since (same size and mtime), is
+ left alone, so its mtime stays that of the last real change and rsync, HTTP caches
+ and the like only see files that did change. Files not in the manifest yet (or
+ modified by something else) are compared byte by byte when their size matches, so
+ the first run does not rewrite the whole tree.
+
+ The manifest is a SQLite database because page generators write from several
+ processes at once (StationPage.py workers, the figure queue).
+
+ Usage:
+    write_text('../www/stats.html', html)          # returns True if the file changed
+    with OutputFile('../www/obs.html') as f:       # streamed; replaced only if changed
+        f.write(chunk)
+
+    python output_writer.py --since <unix time> [--list]
+        files (and bytes) changed since a time, e.g. the start of autorun.sh
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, time, sqlite3, hashlib, argparse
+
+MANIFEST = '../output_manifest.db'
+
+_conn = None
+_conn_pid = None
+_stats = {'changed': 0, 'unchanged': 0, 'bytes': 0}
+
+def manifest():
+    """Connection to the manifest, opened once per process (a forked worker opens its own)"""
+    global _conn, _conn_pid
+    if _conn is None or _conn_pid != os.getpid():
+        _conn = sqlite3.connect(MANIFEST, timeout=60, isolation_level=None)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS OutputFiles (
+                Path TEXT PRIMARY KEY,
+                Hash TEXT,
+                Size INTEGER,
+                MTime INTEGER,
+                Changed REAL
+            ) WITHOUT ROWID
+        """)
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_outputfiles_changed ON OutputFiles(Changed);")
+        _conn_pid = os.getpid()
+    return _conn
+
+def _file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def unchanged(path, digest, size):
+    """True if the file at `path` already holds content with this hash and size"""
+    key = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    if st.st_size != size:
+        return False
+    row = manifest().execute("SELECT Hash, Size, MTime FROM OutputFiles WHERE Path = ?", (key,)).fetchone()
+    if row == (digest, size, st.st_mtime_ns):
+        return True
+    # not written by us, or modified since: compare the content itself
+    if _file_hash(path) != digest:
+        return False
+    _record(key, digest, size, st.st_mtime_ns, None)
+    return True
+
+def _record(key, digest, size, mtime, changed):
+    manifest().execute("""
+        INSERT INTO OutputFiles (Path, Hash, Size, MTime, Changed) VALUES (?,?,?,?,?)
+        ON CONFLICT (Path) DO UPDATE SET Hash = excluded.Hash, Size = excluded.Size, MTime = excluded.MTime,
+            Changed = COALESCE(excluded.Changed, Changed)
+    """, (key, digest, size, mtime, changed))
+
+def commit(tmp, path, digest, size):
+    """Move the complete file `tmp` to `path` unless `path` already has this content; returns True if it changed"""
+    if unchanged(path, digest, size):
+        os.remove(tmp)
+        _stats['unchanged'] += 1
+        return False
+    os.replace(tmp, path)
+    _record(os.path.abspath(path), digest, size, os.stat(path).st_mtime_ns, time.time())
+    _stats['changed'] += 1
+    _stats['bytes'] += size
+    return True
+
+def write_bytes(path, data):
+    """Write `data` to `path` unless it already holds it; returns True if the file changed"""
+    digest = hashlib.sha1(data).hexdigest()
+    if unchanged(path, digest, len(data)):
+        _stats['unchanged'] += 1
+        return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # page generators may run in parallel; every process writes its own temporary file
+    tmp = '%s.%i.tmp' % (path, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    return commit(tmp, path, digest, len(data))
+
+def write_text(path, text):
+    return write_bytes(path, text.encode('utf-8'))
+
+class OutputFile:
+    """Text file written chunk by chunk to a temporary file, hashed on the way and moved
+    into place on a clean exit only if its content changed"""
+    def __init__(self, path):
+        self.path = path
+        self.tmp = '%s.%i.tmp' % (path, os.getpid())
+        self.hash = hashlib.sha1()
+        self.size = 0
+        self.f = None
+        self.changed = None
+
+    def __enter__(self):
+        self.f = open(self.tmp, 'wb')
+        return self
+
+    def write(self, chunk):
+        data = chunk.encode('utf-8')
+        self.hash.update(data)
+        self.size += len(data)
+        self.f.write(data)
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.write(chunk)
+
+    def __exit__(self, exc_type, exc, tb):
+        self.f.close()
+        if exc_type is None:
+            self.changed = commit(self.tmp, self.path, self.hash.hexdigest(), self.size)
+        else:
+            os.remove(self.tmp)
+        return False
+
+def output_stats():
+    """Counts of this process: files 'changed' and 'unchanged', and the 'bytes' of the changed ones"""
+    return dict(_stats)
+
+def report(log=print):
+    if _stats['changed'] or _stats['unchanged']:
+        log("%i files changed (%.1f MB), %i unchanged" % (_stats['changed'], _stats['bytes'] / 1e6, _stats['unchanged']))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Files of the www tree changed since a time')
+    parser.add_argument('--since', type=float, required=True, help='Unix time, e.g. $(date +%%s) at the start of the run')
+    parser.add_argument('--list', action='store_true', help='Print the changed files, one per line')
+    args = parser.parse_args()
+    rows = manifest().execute("SELECT Path, Size FROM OutputFiles WHERE Changed >= ? ORDER BY Path", (args.since,)).fetchall()
+    if args.list:
+        for path, size in rows:
+            print(path)
+    else:
+        print("%i files changed (%.1f MB)" % (len(rows), sum(size for path, size in rows) / 1e6))
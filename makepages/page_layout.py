@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Common page layout (head, navbar, footer) for the page generators
+
+ Templates use %(name)s placeholders. They are split into literal and field parts
+ once, when this module is imported, so rendering a page or a table row only joins
+ strings. A page is written through a PageWriter, which writes the layout head on
+ entry, every chunk (typically one table row) as it is produced and the footer on
+ exit, so no page is ever held in memory as a whole. Pages are written to a
+ temporary file and moved into place when complete, unless the page already holds
+ the same content (see output_writer.py).
+
+ `prefix` is the relative path from the page to the site root ('', '../' or '../../').
+
+ Usage:
+    ROW = Template('<tr><td>%(code)s</td><td>%(count)s</td></tr>')
+    with PageWriter('../www/obs.html', 'Global Statistics', active='obs') as page:
+        page.write('<table>')
+        for code, count in rows:
+            page.write(ROW.render(code=code, count=count))
+        page.write('</table>')
+
+ (C) Quanzhi Ye
+
+"""
+
+import re
+from output_writer import OutputFile
+
+SITE = 'https://sbnmpc.astro.umd.edu/mpecwatch/'
+
+class Template:
+    """A %(name)s template, parsed once; values are inserted with str()"""
+    _FIELD = re.compile(r'%\((\w+)\)s')
+
+    def __init__(self, text):
+        parts = self._FIELD.split(text)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+
+    def chunks(self, values):
+        yield self.literals[0]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            yield str(values[field])
+            yield literal
+
+    def render(self, **values):
+        return ''.join(self.chunks(values))
+
+    def render_to(self, f, **values):
+        f.writelines(self.chunks(values))
+
+# navbar items: key, title, link
+NAV = [
+    ('home', 'Home', SITE + 'index.html'),
+    ('obs', 'Observatory Browser', SITE + 'obs.html'),
+    ('survey', 'Survey Browser', SITE + 'survey.html'),
+    ('persons', 'Person Browser', SITE + 'persons.html'),
+    ('stats', 'Various Statistics', SITE + 'stats.html'),
+    ('issues', 'Issue Tracker', 'https://github.com/Yeqzids/mpecwatch/issues'),
+    ('annex', 'SBN-MPC Annex', 'https://sbnmpc.astro.umd.edu'),
+]
+
+CREDIT_QYE = '<a href="https://www.astro.umd.edu/~qye/">Quanzhi Ye</a>'
+CREDIT_QYE_TH = CREDIT_QYE + ' and <a href="https://taegonhibbitts.com/">Taegon Hibbitts</a>'
+
+HEAD = Template("""<!doctype html>
+<html lang="en">
+  <head>
+    <!-- Google tag (gtag.js) -->
+    <script async src="https://www.googletagmanager.com/gtag/js?id=G-WTXHKC28G9"></script>
+    <script>
+      window.dataLayer = window.dataLayer || [];
+      function gtag(){dataLayer.push(arguments);}
+      gtag('js', new Date());
+      gtag('config', 'G-WTXHKC28G9');
+    </script>
+    <meta charset="utf-8">
+    <meta http-equiv="X-UA-Compatible" content="IE=edge">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="icon" href="%(prefix)sfavicon.ico">
+
+    <title>%(title)s</title>
+
+    <!-- Bootstrap core CSS, Bootstrap theme and Bootstrap Table -->
+    <link href="%(prefix)sdist/css/bootstrap.min.css" rel="stylesheet">
+    <link href="%(prefix)sdist/css/bootstrap-theme.min.css" rel="stylesheet">
+    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.css">
+    <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
+    <link href="%(prefix)sassets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
+    <!-- Custom styles for this template -->
+    <link href="%(prefix)stheme.css" rel="stylesheet">%(extra_head)s
+  </head>
+
+  <body>
+
+    <!-- Fixed navbar -->
+    <nav class="navbar navbar-inverse navbar-fixed-top">
+      <div class="container">
+        <div class="navbar-header">
+          <button type="button" class="navbar-toggle collapsed" data-toggle="collapse" data-target="#navbar" aria-expanded="false" aria-controls="navbar">
+            <span class="sr-only">Toggle navigation</span>
+            <span class="icon-bar"></span>
+            <span class="icon-bar"></span>
+            <span class="icon-bar"></span>
+          </button>
+          <a class="navbar-brand" href="#">MPEC Watch</a>
+        </div>
+        <div id="navbar" class="navbar-collapse collapse">
+          <ul class="nav navbar-nav">%(nav)s
+          </ul>
+        </div><!--/.nav-collapse -->
+      </div>
+    </nav>
+
+    <div class="container theme-showcase" role="main">
+""")
+
+NAV_ITEM = Template("""
+            <li%(active)s><a href="%(link)s">%(title)s</a></li>""")
+
+FOOT = Template("""
+      <footer class="pt-5 my-5 text-muted border-top">
+        Script by %(credit)s, hosted at <a href="https://sbnmpc.astro.umd.edu">SBN-MPC</a>. Powered by <a href="https://getbootstrap.com"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-bootstrap-fill" viewBox="0 0 16 16">
+  <path d="M6.375 7.125V4.658h1.78c.973 0 1.542.457 1.542 1.237 0 .802-.604 1.23-1.764 1.23H6.375zm0 3.762h1.898c1.184 0 1.81-.48 1.81-1.377 0-.885-.65-1.348-1.886-1.348H6.375v2.725z"/>
+  <path d="M4.002 0a4 4 0 0 0-4 4v8a4 4 0 0 0 4 4h8a4 4 0 0 0 4-4V4a4 4 0 0 0-4-4h-8zm1.06 12V3.545h3.399c1.587 0 2.543.809 2.543 2.11 0 .884-.65 1.675-1.483 1.816v.1c1.143.117 1.904.931 1.904 2.033 0 1.488-1.084 2.396-2.888 2.396H5.062z"/>
+</svg> Bootstrap</a> and <a href="https://bootstrap-table.com">Bootstrap Table</a>.
+        <a href="https://pdssbn.astro.umd.edu/"><img src="%(prefix)ssbn_logo5_v0.png" width="100" style="vertical-align:bottom"></a>
+        <a href="https://github.com/Small-Bodies-Node/mpecwatch"><svg xmlns="http://www.w3.org/2000/svg" width="50" height="50" fill="currentColor" class="bi bi-github" viewBox="0 0 16 16">
+  <path d="M8 0C3.58 0 0 3.58 0 8c0 3.54 2.29 6.53 5.47 7.59.4.07.55-.17.55-.38 0-.19-.01-.82-.01-1.49-2.01.37-2.53-.49-2.69-.94-.09-.23-.48-.94-.82-1.13-.28-.15-.68-.52-.01-.53.63-.01 1.08.58 1.23.82.72 1.21 1.87.87 2.33.66.07-.52.28-.87.51-1.07-1.78-.2-3.64-.89-3.64-3.95 0-.87.31-1.59.82-2.15-.08-.2-.36-1.02.08-2.12 0 0 .67-.21 2.2.82.64-.18 1.32-.27 2-.27.68 0 1.36.09 2 .27 1.53-1.04 2.2-.82 2.2-.82.44 1.1.16 1.92.08 2.12.51.56.82 1.27.82 2.15 0 3.07-1.87 3.75-3.65 3.95.29.25.54.73.54 1.48 0 1.07-.01 1.93-.01 2.2 0 .21.15.46.55.38A8.012 8.012 0 0 0 16 8c0-4.42-3.58-8-8-8z"/>
+</svg></a>
+      </footer>
+    </div> <!-- /container -->
+
+    <!-- Bootstrap core JavaScript
+    ================================================== -->
+    <!-- Placed at the end of the document so the pages load faster -->
+    <script src="https://code.jquery.com/jquery-3.7.1.min.js" integrity="sha256-/JqT3SQfawRcv/BIHPThkBvs0OEvtFFmqPF/lYI/Cxo=" crossorigin="anonymous"></script>
+    <script src="%(prefix)sdist/js/bootstrap.min.js"></script>
+    <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
+    <script src="%(prefix)sassets/js/ie10-viewport-bug-workaround.js"></script>
+
+    <!-- Bootstrap Table -->
+    <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/tableExport.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/libs/jsPDF/jspdf.umd.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/bootstrap-table.min.js"></script>
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.24.0/dist/extensions/export/bootstrap-table-export.min.js"></script>%(extra_scripts)s
+  </body>
+</html>
+""")
+
+def nav(active=None):
+    return ''.join(NAV_ITEM.render(active=' class="active"' if key == active else '', link=link, title=title) for key, title, link in NAV)
+
+class PageWriter:
+    """Write a page in the common layout chunk by chunk; see the module docstring"""
+
+    def __init__(self, path, title, prefix='', active=None, extra_head='', extra_scripts='', credit=CREDIT_QYE):
+        self.path = path
+        self.head = dict(title=title, prefix=prefix, extra_head=extra_head, nav=nav(active))
+        self.foot = dict(prefix=prefix, extra_scripts=extra_scripts, credit=credit)
+        self.f = None
+
+    def __enter__(self):
+        self.f = OutputFile(self.path).__enter__()
+        HEAD.render_to(self.f, **self.head)
+        return self
+
+    def write(self, chunk):
+        self.f.write(chunk)
+
+    def render(self, template, **values):
+        template.render_to(self.f, **values)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            FOOT.render_to(self.f, **self.foot)
+        self.f.__exit__(exc_type, exc, tb)
+        return False
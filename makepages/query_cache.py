@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Memoized query results, invalidated when the database is re-ingested
+
+ proc.py increments the database's user_version (PRAGMA user_version) at the end of
+ every ingest run, so the value works as an ingest generation counter. Results are
+ stored in query_cache.json, keyed by the SQL text plus its parameters, together with
+ the generation they were computed at. Once the generation changes, the whole cache is
+ dropped. Rows come back as lists, since they go through JSON.
+
+ Usage:
+    cache = QueryCache(cursor)
+    rows = cache.fetchall("SELECT ... WHERE MPECType = ?", ('Discovery',))
+    cache.save()
+
+ (C) Quanzhi Ye
+
+"""
+
+import json, hashlib
+
+CACHE_VERSION = 1
+CACHE_FILE = 'query_cache.json'
+
+def generation(cursor):
+    """Ingest generation counter of the database"""
+    return cursor.execute("PRAGMA user_version").fetchone()[0]
+
+def query_key(sql, params=()):
+    return hashlib.sha1(json.dumps([' '.join(sql.split()), list(params)]).encode()).hexdigest()
+
+class QueryCache:
+    def __init__(self, cursor, path=CACHE_FILE):
+        self.cursor = cursor
+        self.path = path
+        self.generation = generation(cursor)
+        self.results = {}
+        self.changed = False
+        try:
+            with open(path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if cache.get('version') == CACHE_VERSION and cache.get('generation') == self.generation:
+            self.results = cache['results']
+
+    def fetchall(self, sql, params=()):
+        key = query_key(sql, params)
+        if key not in self.results:
+            self.results[key] = [list(row) for row in self.cursor.execute(sql, params).fetchall()]
+            self.changed = True
+        return self.results[key]
+
+    def save(self):
+        if not self.changed:
+            return
+        with open(self.path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'generation': self.generation, 'results': self.results}, f)
+        self.changed = False
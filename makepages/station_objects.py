@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Per-station summary of the objects observed by each station
+
+ TABLE StationObjects holds one row per (station, object): the number of observations,
+ of discovery observations, the first and last observation time, the number of MPECs
+ the station observed the object in and the magnitude of the last observation. proc.py
+ updates it as observations are added to the station tables (StationObjectSummary), so
+ the objects table of a station page is a single range read of the primary key.
+
+ Stations ingested before this table existed are summarized from their station tables
+ by StationObjectSummary the first time it finds the table empty, i.e. on the first run of
+ proc.py after the upgrade. Magnitudes are not kept in the station tables, so a backfill
+ takes the last magnitude from TABLE Objects (the object's latest magnitude from any
+ station). The summary can also be rebuilt by hand with:
+
+    python station_objects.py --backfill
+
+ (C) Quanzhi Ye
+
+"""
+
+import sqlite3, logging, argparse
+
+STATION_OBJECTS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS StationObjects (
+        StationCode TEXT,
+        ObjectId TEXT,
+        ObsCount INTEGER,
+        Discoveries INTEGER,
+        FirstObs INTEGER,
+        LastObs INTEGER,
+        MPECCount INTEGER,
+        LastMag REAL,
+        PRIMARY KEY (StationCode, ObjectId)
+    ) WITHOUT ROWID
+    """,
+    # order of the objects table of a station page
+    "CREATE INDEX IF NOT EXISTS idx_stationobjects_order ON StationObjects(StationCode, Discoveries DESC, ObsCount DESC, ObjectId);",
+]
+
+def magnitude(mag):
+    """Magnitude column of an observation line as a float, or None if it is blank"""
+    try:
+        return float(mag)
+    except (TypeError, ValueError):
+        return None
+
+class StationObjectSummary:
+    """Keeps StationObjects up to date as observations are added to the station tables"""
+    def __init__(self, cursor, backfill=True):
+        self.cursor = cursor
+        for sql in STATION_OBJECTS_SCHEMA:
+            cursor.execute(sql)
+        # a table just created (or never filled) is summarized once from the station tables
+        if backfill and cursor.execute("SELECT 1 FROM StationObjects LIMIT 1").fetchone() is None:
+            n = rebuild_all(cursor)
+            logging.info("StationObjects backfilled from %d station tables.", n)
+
+    def add_observation(self, station, obj, time, discovery, mag, new_mpec):
+        """Count one new observation of `obj` by `station`; `new_mpec` if it is the first observation
+        of the object by the station in its MPEC"""
+        self.cursor.execute("""
+            INSERT INTO StationObjects (StationCode, ObjectId, ObsCount, Discoveries, FirstObs, LastObs, MPECCount, LastMag)
+            VALUES (?,?,1,?,?,?,?,?)
+            ON CONFLICT (StationCode, ObjectId) DO UPDATE SET
+                ObsCount = ObsCount + 1,
+                Discoveries = Discoveries + excluded.Discoveries,
+                FirstObs = MIN(FirstObs, excluded.FirstObs),
+                LastObs = MAX(LastObs, excluded.LastObs),
+                MPECCount = MPECCount + excluded.MPECCount,
+                LastMag = CASE WHEN excluded.LastObs >= LastObs THEN excluded.LastMag ELSE LastMag END
+        """, (station, obj, int(discovery), time, time, int(new_mpec), magnitude(mag)))
+
+def rebuild_station(cursor, station):
+    """Recount the StationObjects rows of a station from its station table"""
+    cursor.execute("DELETE FROM StationObjects WHERE StationCode = ?", (station,))
+    cursor.execute("""
+        INSERT INTO StationObjects (StationCode, ObjectId, ObsCount, Discoveries, FirstObs, LastObs, MPECCount, LastMag)
+        SELECT ?, s.Object, COUNT(*), SUM(s.Discovery), MIN(s.Time), MAX(s.Time), COUNT(DISTINCT s.MPEC),
+               (SELECT CAST(NULLIF(o.Mag, '') AS REAL) FROM Objects o WHERE o.ObjectId = s.Object)
+        FROM {} s
+        GROUP BY s.Object
+    """.format('station_' + station), (station,))
+
+def rebuild_all(cursor, commit=None):
+    """Recount the StationObjects rows of every station table; returns the number of stations"""
+    stations = [row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'station\\_%' ESCAPE '\\' ORDER BY name").fetchall()]
+    for table in stations:
+        rebuild_station(cursor, table[len('station_'):])
+        if commit:
+            commit()
+    return len(stations)
+
+def backfill(dbFile):
+    """Summarize every station table already in the database"""
+    db = sqlite3.connect(dbFile)
+    cursor = db.cursor()
+    StationObjectSummary(cursor, backfill=False)
+    n_stations = rebuild_all(cursor, db.commit)
+    db.commit()
+    n = cursor.execute("SELECT COUNT(*) FROM StationObjects").fetchone()[0]
+    db.close()
+    logging.info("%d station tables, %d (station, object) rows.", n_stations, n)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-station object summary')
+    parser.add_argument('--backfill', action='store_true', help='Summarize every station table already in the database')
+    parser.add_argument('--db', default='../mpecwatch_v4.db', help='Database file (default: ../mpecwatch_v4.db)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.backfill:
+        backfill(args.db)
+    else:
+        parser.print_help()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Classify the role of every station listed in an MPEC
+
+ MPEC.Station holds the stations of an MPEC in the order in which they appear in the
+ observation block, i.e. roughly in time order. Roles are decided from positions in that
+ list rather than from substring or regex tests on the joined string:
+
+    Discovery       the station is DiscStation of a Discovery MPEC
+    Followup        any other station of a Discovery MPEC
+    FirstFollowup   the station right after the discoverer
+    Precovery       a station listed before the discoverer
+    Recovery        any station of an OrbitUpdate MPEC
+    1stRecovery     the first station of an OrbitUpdate MPEC
+
+ Roles are bit flags so one MPEC is classified once for all of its stations.
+
+ (C) Quanzhi Ye
+
+"""
+
+DISCOVERY = 1
+FOLLOWUP = 2
+FIRST_FOLLOWUP = 4
+PRECOVERY = 8
+RECOVERY = 16
+FIRST_RECOVERY = 32
+
+ROLE_NAMES = {
+    DISCOVERY: 'Discovery',
+    FOLLOWUP: 'Followup',
+    FIRST_FOLLOWUP: 'FirstFollowup',
+    PRECOVERY: 'Precovery',
+    RECOVERY: 'Recovery',
+    FIRST_RECOVERY: '1stRecovery',
+}
+
+def split_stations(stations):
+    """'G96, 703, F51' -> ['G96', '703', 'F51']"""
+    return stations.split(', ') if stations else []
+
+def classify(stations, disc_station, mpec_type):
+    """
+    Roles of all stations of one MPEC, as a list of (station, roles) in list order.
+    `stations` is the MPEC.Station string, `disc_station` MPEC.DiscStation and
+    `mpec_type` MPEC.MPECType. Empty and 'XXX' entries are skipped.
+    """
+    codes = split_stations(stations)
+    disc = -1
+    if mpec_type == 'Discovery' and disc_station in codes:
+        disc = codes.index(disc_station)
+
+    out = []
+    for i, code in enumerate(codes):
+        if code == '' or code == 'XXX':
+            continue
+        roles = 0
+        if mpec_type == 'Discovery':
+            if i == disc:
+                roles = DISCOVERY
+            else:
+                roles = FOLLOWUP
+                if disc >= 0 and i == disc + 1:
+                    roles |= FIRST_FOLLOWUP
+                elif i < disc:
+                    roles |= PRECOVERY
+        elif mpec_type == 'OrbitUpdate':
+            roles = RECOVERY
+            if i == 0:
+                roles |= FIRST_RECOVERY
+        out.append((code, roles))
+    return out
+
+def station_roles(stations, disc_station, mpec_type, station):
+    """Roles of a single `station` in one MPEC (0 if it is not listed)."""
+    for code, roles in classify(stations, disc_station, mpec_type):
+        if code == station:
+            return roles
+    return 0
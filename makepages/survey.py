@@ -8,20 +8,34 @@
  
 """
 
-import sqlite3, datetime, json, numpy as np, pandas as pd, plotly.express as px, calendar
+import sqlite3, datetime, json, numpy as np, pandas as pd, calendar
+from breakdown import Breakdown, station_cube, long_frame, stack_followups, MPEC_TYPES, MONTHS
+from mpec_table import load_mpec_table, render_row, export_row
+from page_layout import PageWriter, Template, CREDIT_QYE_TH
+from table_shards import ShardWriter, write_table, table_attrs, script_tag, install_script
+from figures import figure_div, viewer_tags, report
+from figure_queue import FigureQueue, chart
+from output_writer import write_text, report as report_outputs
+from frozen_years import FrozenOutputs, closed, digest, year_hash
+from volatile import placeholder, volatile_tag, mark_updated
 
 stat = 'obscode_stat.json'
 with open(stat) as stat:
     stat = json.load(stat)
 
+# shared MPEC table written by obscode_stat.py; stat[...]['MPECs'] holds indexes into it
+mpecs = load_mpec_table()
+
 mpecconn = sqlite3.connect("../mpecwatch_v4.db")
 cursor = mpecconn.cursor()
 
-MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup"]
+# object types of the survey figures (no PHA)
 OBJ_TYPES = ["NEA", "Comet", "Satellite", "TNO", "Unusual", "Interstellar", "Unknown"]
-MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 YEARS = list(np.arange(1993, datetime.datetime.now().year + 1))
 
+# data-fields of the sharded MPEC table
+MPEC_COLUMNS = ['index', 'name', 'date', 'ds', 'fs', 'obj', 'catch']
+
 def getMonthName(month):
     return calendar.month_name[month][0:3]
 
@@ -65,16 +79,8 @@ def generateSurveyData(surveyName, codes):
     survey_data = {}
     survey_data[surveyName] = {}
     survey_data[surveyName]['MPECId'] = {} # single 'MPECId' key: {MPECId: Object designation in packed form}
-    for mpecType in MPEC_TYPES:
-        survey_data[surveyName][mpecType] = {} # single 'MPECType' key: {Year: {Month: count, total: count, objType: count}}
-        for year in list(np.arange(1993, datetime.datetime.now().year+1, 1))[::-1]:
-            year = int(year)
-            survey_data[surveyName][mpecType][year] = {'total': 0}
-            for month in MONTHS:
-                survey_data[surveyName][mpecType][year][month] = 0
-            for obj in OBJ_TYPES:
-                survey_data[surveyName][mpecType][year][obj] = 0
-    survey_data[surveyName]['MPECs'] = set() #[[Name, unix timestamp, Discovery?, First Conf?, Object Type, CATCH], ...]
+    survey_data[surveyName]['cube'] = 0 # sum of the counter cubes of the stations (see breakdown.py)
+    survey_data[surveyName]['MPECs'] = set() # indexes into the shared MPEC table
     survey_data[surveyName]['OBS'] = {} #contains all observers for each surveyName
     survey_data[surveyName]['MEA'] = {} #contains all measurers for each station
     survey_data[surveyName]['FAC'] = {} #contains all facilities for each station
@@ -93,39 +99,13 @@ def generateSurveyData(surveyName, codes):
         survey_data[surveyName]['FAC'] = merge_mpec_dicts(survey_data[surveyName]['FAC'], stat[code]['FAC'])
 
         #combine MPECs for each station in the survey (skip duplicates)
-        for MPEC in stat[code]['MPECs']:
-            survey_data[surveyName]['MPECs'].add(tuple(MPEC))
-
-        # need to fix this part
-        for year in YEARS[::-1]:
-            # Note that stat stores the year as a string while survey_data stores it as an int (json limitation)
-            survey_data[surveyName]['Discovery'][year]['total'] += stat[code]['Discovery'][str(year)]['total']
-            for obj in OBJ_TYPES:
-                survey_data[surveyName]['Discovery'][year][obj] += stat[code]['Discovery'][str(year)][obj]
-            survey_data[surveyName]['Editorial'][year]['total'] += stat[code]['Editorial'][str(year)]['total']
-            survey_data[surveyName]['OrbitUpdate'][year]['total'] += stat[code]['OrbitUpdate'][str(year)]['total']
-            for obj in OBJ_TYPES:
-                survey_data[surveyName]['OrbitUpdate'][year][obj] += stat[code]['OrbitUpdate'][str(year)][obj]
-            survey_data[surveyName]['DOU'][year]['total'] += stat[code]['DOU'][str(year)]['total']
-            survey_data[surveyName]['ListUpdate'][year]['total'] += stat[code]['ListUpdate'][str(year)]['total']
-            survey_data[surveyName]['Retraction'][year]['total'] += stat[code]['Retraction'][str(year)]['total']
-            survey_data[surveyName]['Other'][year]['total'] += stat[code]['Other'][str(year)]['total']
-            survey_data[surveyName]['Followup'][year]['total'] += stat[code]['Followup'][str(year)]['total']
-            survey_data[surveyName]['FirstFollowup'][year]['total'] += stat[code]['FirstFollowup'][str(year)]['total']
-            # Note that stat stores the month as a string while survey_data stores it as an int (json limitation)
-            for month in MONTHS:
-                survey_data[surveyName]['Discovery'][year][month] += stat[code]['Discovery'][str(year)][month]
-                survey_data[surveyName]['Editorial'][year][month] += stat[code]['Editorial'][str(year)][month]
-                survey_data[surveyName]['OrbitUpdate'][year][month] += stat[code]['OrbitUpdate'][str(year)][month]
-                survey_data[surveyName]['DOU'][year][month] += stat[code]['DOU'][str(year)][month]
-                survey_data[surveyName]['ListUpdate'][year][month] += stat[code]['ListUpdate'][str(year)][month]
-                survey_data[surveyName]['Retraction'][year][month] += stat[code]['Retraction'][str(year)][month]
-                survey_data[surveyName]['Other'][year][month] += stat[code]['Other'][str(year)][month]
-                survey_data[surveyName]['Followup'][year][month] += stat[code]['Followup'][str(year)][month]
-                survey_data[surveyName]['FirstFollowup'][year][month] += stat[code]['FirstFollowup'][str(year)][month]
-
-    # to convert the set back to a list
-    survey_data[surveyName]['MPECs'] = [list(mpec) for mpec in survey_data[surveyName]['MPECs']]
+        survey_data[surveyName]['MPECs'].update(stat[code]['MPECs'])
+
+        #combine the yearly and monthly counters of each station in the survey
+        survey_data[surveyName]['cube'] = survey_data[surveyName]['cube'] + station_cube(stat[code])
+
+    # to convert the set back to a list (in table order, i.e. oldest first)
+    survey_data[surveyName]['MPECs'] = sorted(survey_data[surveyName]['MPECs'])
     return survey_data
 
 def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
@@ -134,107 +114,36 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
     Uses the survey_data dictionary (created with generateSurveyData) to populate the page with statistics and graphs.
     """
     survey_data = generateSurveyData(surveyName, codes)
-    df_yearly = pd.DataFrame({"Year": [], "MPECType": [], "#MPECs": []})
-    disc_obj = pd.DataFrame({"Year": [], "ObjType": [], "#MPECs": []})
-    OU_obj = pd.DataFrame({"Year": [], "ObjType": [], "#MPECs": []})
+    breakdown = Breakdown(survey_data[surveyName]['cube'])
+    yearly = breakdown.yearly()
+    if includeFirstFU:
+        yearly = stack_followups(yearly)
+    else:
+        yearly = yearly.copy()
+        yearly[:, MPEC_TYPES.index('FirstFollowup')] = 0
+    df_yearly = long_frame(yearly, breakdown.years, "Year", MPEC_TYPES, "MPECType")
+    disc_obj = breakdown.objects_frame('Discovery', obj_types=OBJ_TYPES, label="ObjType")
+    OU_obj = breakdown.objects_frame('OrbitUpdate', obj_types=OBJ_TYPES, label="ObjType")
     survey = 'survey'+surveyName
     page = "../www/bySurvey/" + surveyNameAbbv + ".html"
     #list of codes in the corresponding survey
 
-    o = f"""
-<!doctype html>
-<html lang="en">
-  <head>
-        <!-- Google tag (gtag.js) -->
-          <script async src="https://www.googletagmanager.com/gtag/js?id=G-WTXHKC28G9"></script>
-          <script>
-            window.dataLayer = window.dataLayer || [];
-            function gtag(){{dataLayer.push(arguments);}}
-            gtag('js', new Date());
-            gtag('config', 'G-WTXHKC28G9');
-          </script>
-    <meta charset="utf-8">
-    <meta http-equiv="X-UA-Compatible" content="IE=edge">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <!-- The above 3 meta tags *must* come first in the head; any other head content must come *after* these tags -->
-    <meta name="description" content="">
-    <meta name="author" content="">
-    <link rel="icon" href="../favicon.ico">
-
-    <title>MPEC Watch | Survey Statistics {surveyName}</title>
-
-    <!-- Bootstrap core CSS -->
-    <link href="https://unpkg.com/bootstrap-table@1.22.5/dist/bootstrap-table.min.css" rel="stylesheet">
-    <link href="../dist/css/bootstrap.min.css" rel="stylesheet">
-    <!-- Bootstrap theme -->
-    <link href="../dist/css/bootstrap-theme.min.css" rel="stylesheet">
-    <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-    <link href="../assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
-
-    <!-- Custom styles for this template -->
-    <link href="../theme.css" rel="stylesheet">
-    
-    <!-- Just for debugging purposes. Don't actually copy these 2 lines! -->
-    <!--[if lt IE 9]><script src="../assets/js/ie8-responsive-file-warning.js"></script><![endif]-->
-    <script src="../assets/js/ie-emulation-modes-warning.js"></script>
-    <!--
-    <script src="../dist/extensions/export/tableExport.min.js"></script>
-    <script src="../dist/extensions/export/tableExport.js"></script>
-    -->
-
-    <!-- HTML5 shim and Respond.js for IE8 support of HTML5 elements and media queries -->
-    <!--[if lt IE 9]>
-      <script src="https://oss.maxcdn.com/html5shiv/3.7.3/html5shiv.min.js"></script>
-      <script src="https://oss.maxcdn.com/respond/1.4.2/respond.min.js"></script>
-    <![endif]-->
-  </head>
-
-  <body>
-
-    <!-- Fixed navbar -->
-    <nav class="navbar navbar-inverse navbar-fixed-top">
-      <div class="container">
-        <div class="navbar-header">
-          <button type="button" class="navbar-toggle collapsed" data-toggle="collapse" data-target="#navbar" aria-expanded="false" aria-controls="navbar">
-            <span class="sr-only">Toggle navigation</span>
-            <span class="icon-bar"></span>
-            <span class="icon-bar"></span>
-            <span class="icon-bar"></span>
-          </button>
-          <a class="navbar-brand" href="#">MPEC Watch</a>
-        </div>
-        <div id="navbar" class="navbar-collapse collapse">
-          <ul class="nav navbar-nav">
-            <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/index.html">Home</a></li>
-            <li class="active"><a href="https://sbnmpc.astro.umd.edu/mpecwatch/obs.html">Observatory Browser</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">Survey Browser</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/stats.html">Various Statistics</a></li>
-            <!-- <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/mpc_stuff.html">MPC Stuff (non-public)</a></li> -->
-            <li><a href="https://github.com/Yeqzids/mpecwatch/issues">Issue Tracker</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu">SBN-MPC Annex</a></li>
-          </ul>
-        </div><!--/.nav-collapse -->
-      </div>
-    </nav>
-
-    <div class="container theme-showcase" role="main">
-
-      <!-- Main jumbotron for a primary marketing message or call to action -->"""
-    o += f"""<div class="row">
-            <h2>{surveyName}</h2>"""
-    for code in codes:
-        o += f"""<h3>{code}</h3>"""
-
-        if str(code) not in ['244', '245', '247', '248', '249', '250', '258', '270', '273', '274', '275', '500', 'C49', 'C50', 'C51', 'C52', 'C53', 'C54', 'C55', 'C56', 'C57', 'C58', 'C59']:
-            #print(code)
-            #print(mpccode[code])
-            if mpccode[code]['lon'] > 180:
-                lon = mpccode[code]['lon'] - 360
-            else:
-                lon = mpccode[code]['lon']
-            o += f"""<p><a href="https://geohack.toolforge.org/geohack.php?params={mpccode[code]['lat']};{lon}">Where is this observatory?</a></p>"""
-
-    o += f"""<p>
+    with PageWriter(page, 'MPEC Watch | Survey Statistics %s' % surveyName, prefix='../', active='survey', extra_scripts=script_tag('../') + viewer_tags('../'), credit=CREDIT_QYE_TH) as out:
+        out.write(f"""<div class="row">
+            <h2>{surveyName}</h2>""")
+        for code in codes:
+            out.write(f"""<h3>{code}</h3>""")
+
+            if str(code) not in ['244', '245', '247', '248', '249', '250', '258', '270', '273', '274', '275', '500', 'C49', 'C50', 'C51', 'C52', 'C53', 'C54', 'C55', 'C56', 'C57', 'C58', 'C59']:
+                #print(code)
+                #print(mpccode[code])
+                if mpccode[code]['lon'] > 180:
+                    lon = mpccode[code]['lon'] - 360
+                else:
+                    lon = mpccode[code]['lon']
+                out.write(f"""<p><a href="https://geohack.toolforge.org/geohack.php?params={mpccode[code]['lat']};{lon}">Where is this observatory?</a></p>""")
+
+        out.write(f"""<p>
              <h3>Graphs</h3>
               <h4>Yearly Breakdown of MPEC Types</h4>
               <p>
@@ -249,11 +158,11 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
               FirstFollowup - MPECs associated with follow-up observations made by this station to an object discovered elsewhere, with this station being the first station to follow-up.<br>
               Other - MPECs that do not fit into categories listed above and involve observations made by this station.
               </p>
-              <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="graphs/{surveyNameAbbv}.html" height="525" width="100%"></iframe>
+              {figure_div(f"graphs/{surveyNameAbbv}.json", "yearly")}
               <h4>Yearly Breakdown of Discovery Object Types</h4>
-              <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="graphs/{surveyNameAbbv}_disc_obj.html" height="525" width="100%"></iframe>
+              {figure_div(f"graphs/{surveyNameAbbv}.json", "disc_obj")}
               <h4>Yearly Breakdown of Orbit Update Object Types</h4>
-              <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="graphs/{surveyNameAbbv}_OU_obj.html" height="525" width="100%"></iframe>
+              {figure_div(f"graphs/{surveyNameAbbv}.json", "OU_obj")}
               
               <!-- NOT IMPLEMENTED YET
               <h4>Breakdown by Observers</h4>
@@ -296,37 +205,18 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
                         <th>First Follow-Up</th>
                     </tr>
                 </thead>
-        """ 
+        """) 
         
-    for year in list(np.arange(1993, datetime.datetime.now().year+1, 1))[::-1]:
-        year = int(year)
-        year_counts = []
-        for mpecType in MPEC_TYPES:
-            if year in survey_data[surveyName][mpecType].keys():
-                total = survey_data[surveyName][mpecType][year]['total']
-            else:
-                total = 0
-            year_counts.append(total)
-        if includeFirstFU:
-            year_counts[7] -= year_counts[8]
-        else:
-            year_counts[8] = 0
-
-        #for objType in obj_types:
-        
-        df_yearly = pd.concat([df_yearly, pd.DataFrame({"Year": [year, year, year, year, year, year, year, year, year], "MPECType": ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup"], "#MPECs": year_counts})])
-        disc_obj = pd.concat([disc_obj, pd.DataFrame({"Year": [year, year, year, year, year, year, year], "ObjType": ["NEA", "Comet", "Satellite", "TNO", "Unusual", "Interstellar", "Unknown"], "#MPECs": [survey_data[surveyName]['Discovery'][year]['NEA'], survey_data[surveyName]['Discovery'][year]['Comet'], survey_data[surveyName]['Discovery'][year]['Satellite'], survey_data[surveyName]['Discovery'][year]['TNO'], survey_data[surveyName]['Discovery'][year]['Unusual'], survey_data[surveyName]['Discovery'][year]['Interstellar'], survey_data[surveyName]['Discovery'][year]['Unknown']]})])
-        OU_obj = pd.concat([OU_obj, pd.DataFrame({"Year": [year, year, year, year, year, year, year], "ObjType": ["NEA", "Comet", "Satellite", "TNO", "Unusual", "Interstellar", "Unknown"], "#MPECs": [survey_data[surveyName]['OrbitUpdate'][year]['NEA'], survey_data[surveyName]['OrbitUpdate'][year]['Comet'], survey_data[surveyName]['OrbitUpdate'][year]['Satellite'], survey_data[surveyName]['OrbitUpdate'][year]['TNO'], survey_data[surveyName]['OrbitUpdate'][year]['Unusual'], survey_data[surveyName]['OrbitUpdate'][year]['Interstellar'], survey_data[surveyName]['OrbitUpdate'][year]['Unknown']]})])
-        
-        df_monthly_graph = pd.DataFrame({"Month": [], "MPECType": [], "#MPECs": []})
-        for month in MONTHS:
-            month_counts = []
-            for mpecType in MPEC_TYPES:
-                month_counts.append(survey_data[surveyName][mpecType][year][month])
-            df_monthly_graph = pd.concat([df_monthly_graph, pd.DataFrame({"Month": [month, month, month, month, month, month, month, month, month], "MPECType": ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other", "Followup", "FirstFollowup"], "#MPECs": month_counts})])
-        monthly(surveyName, surveyNameAbbv, year, df_monthly_graph, survey_data)
-
-        o += f"""
+        for year, year_counts in zip(breakdown.years, yearly):
+            # monthly pages of closed years are only rewritten when their counters change (see frozen_years.py)
+            key, paths = "survey/%s/%s" % (surveyNameAbbv, year), monthly_paths(surveyNameAbbv, year)
+            inputs = digest(surveyName, [year_hash(stat[code], year) for code in codes])
+            if not (closed(year) and frozen.current(key, inputs, *paths)):
+                monthly(surveyName, surveyNameAbbv, year, breakdown)
+                if closed(year):
+                    frozen.add(key, inputs, *paths)
+
+            out.write(f"""
                 <tr>
                     <td><a href="monthly/{surveyNameAbbv}_{year}.html">{year}</a></td>
                     <td>{sum(year_counts)}</td>
@@ -340,38 +230,38 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
                     <td>{year_counts[7]}</td>
                     <td>{year_counts[8]}</td>
                 </tr>
-        """
-    try:
-        fig = px.bar(df_yearly, x="Year", y="#MPECs", color="MPECType", title= surveyName+" | Number and type of MPECs by year")
-        fig.write_html("../www/bySurvey/graphs/"+surveyNameAbbv+".html")
-    except Exception as e:
-        print(e)
-
-    try:
-        fig = px.bar(disc_obj, x="Year", y="#MPECs", color="ObjType", title= surveyName+" | Discovery: Number and type of Object by year")
-        fig.write_html("../www/bySurvey/graphs/"+surveyNameAbbv+"_disc_obj.html")
-    except Exception as e:
-        print(e)
-
-    try:
-        fig = px.bar(OU_obj, x="Year", y="#MPECs", color="ObjType", title= surveyName+" | Orbit Update: Number and type of Object by year")
-        fig.write_html("../www/bySurvey/graphs/"+surveyNameAbbv+"_OU_obj.html")
-    except Exception as e:
-        print(e)
+        """)
+
+        # the figures of the page are rendered from one JSON bundle (see figures.py), built by the figure queue
+        with queue.bundle("../www/bySurvey/graphs/"+surveyNameAbbv+".json") as bundle:
+            bundle.add("yearly", chart('bar', data_frame=df_yearly, x="Year", y="#MPECs", color="MPECType", title= surveyName+" | Number and type of MPECs by year"))
+            bundle.add("disc_obj", chart('bar', data_frame=disc_obj, x="Year", y="#MPECs", color="ObjType", title= surveyName+" | Discovery: Number and type of Object by year"))
+            bundle.add("OU_obj", chart('bar', data_frame=OU_obj, x="Year", y="#MPECs", color="ObjType", title= surveyName+" | Orbit Update: Number and type of Object by year"))
     
-    o += """
+        # the large tables are written as JSON shards that the page loads on demand (see table_shards.py)
+        data_dir = "../www/bySurvey/data/" + surveyNameAbbv
+        with ShardWriter(data_dir + "/mpecs", MPEC_COLUMNS) as shards:
+            for index, j in enumerate(reversed(survey_data[surveyName]['MPECs']), start=1):
+                name, date, ds, fs, obj, catch = render_row(mpecs[j], codes)
+                shards.add({'index': index, 'name': name, 'date': str(date), 'ds': ds, 'fs': fs, 'obj': obj, 'catch': catch,
+                            '_export': {"Index": index, **export_row(mpecs[j], codes)}})
+        write_table(data_dir + "/observers", ['observer', 'count'], ({'observer': observer, 'count': count} for observer, count in sorted(survey_data[surveyName]['OBS'].items(), key=lambda x: (-x[1], x[0]))))
+        write_table(data_dir + "/measurers", ['measurer', 'count'], ({'measurer': measurer, 'count': count} for measurer, count in sorted(survey_data[surveyName]['MEA'].items(), key=lambda x: (-x[1], x[0]))))
+
+        out.write("""
             </table>
         </div>
         <div class="containter">
             <h4>List of Individual MPECs</h4>
+            <button id="custom-export-btn" class="btn btn-primary btn-sm" style="margin-bottom: 10px;">Export to CSV</button>
             <table id="mpec_table" 
                 class="table table-striped table-bordered table-sm"
                 data-height="460"
                 data-toggle="table"
                 data-pagination="true"
                 data-search="true"
-                data-show-export="true"
-                data-show-columns="true">
+                data-show-columns="true"
+                %(mpecs)s>
                 <thead>
                     <tr>
                         <th class="th-sm" data-field="index" data-sortable="true">Index</th>
@@ -383,76 +273,43 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
                         <th class="th-sm" data-field="catch" data-sortable="true">Search Archival Image</th>
                     </tr>
                 </thead>
-                <tbody>
-    """
-    
-    index = 1
-    for i in reversed(survey_data[surveyName]['MPECs']):
-        o += f"""
-                    <tr>
-                        <td>{index}</td>
-                        <td>{i[0]}</td>
-                        <td>{datetime.datetime.fromtimestamp(i[1])}</td>
-                        <td>{i[2]}</td>
-                        <td>{i[3]}</td>
-                        <td>{i[4]}</td>
-                        <td>{i[5]}</td>
-                    </tr>
-        """
-        index += 1
-
-    o += """
-                </tbody>
             </table>
+            <script>
+                document.addEventListener('DOMContentLoaded', () => {
+                    document.getElementById('custom-export-btn').addEventListener('click', () => exportShardsCSV('mpec_table', '%(abbv)s_mpec_export.csv'));
+                });
+            </script>
             <h4>List of Observers</h4>
             <table id="OBS_table" 
                 class="table table-striped table-bordered table-sm"
                 data-toggle="table"
                 data-search="true"
-                data-pagination="true">
+                data-pagination="true"
+                %(observers)s>
                 <thead>
                     <tr>
                         <th class="th-sm" data-field="observer" data-sortable="true">Observers</th>
                         <th class="th-sm" data-field="count" data-sortable="true">Count</th>
                     </tr>
                 </thead>
-                <tbody>"""
-    for observer, count in survey_data[surveyName]['OBS'].items():
-        o += f"""
-                    <tr>
-                        <td>{observer}</td>
-                        <td>{count}</td>
-                    </tr>
-    """
-        
-    o += """
-                </tbody>
             </table>
             <h4>List of Measurers</h4>
             <table id="MEA_table" 
                 class="table table-striped table-bordered table-sm"
                 data-toggle="table"
                 data-search="true"
-                data-pagination="true">
+                data-pagination="true"
+                %(measurers)s>
                 <thead>
                     <tr>
                         <th class="th-sm" data-field="measurer" data-sortable="true">Measurers</th>
                         <th class="th-sm" data-field="count" data-sortable="true">Count</th>
                     </tr>
                 </thead>
-                <tbody>"""
-    
-    for measurer, count in survey_data[surveyName]['MEA'].items():
-        o += f"""
-                    <tr>
-                        <td>{measurer}</td>
-                        <td>{count}</td>
-                    </tr>
-    """
-
-    o += """
-                </tbody>
             </table>
+""" % dict({table: table_attrs("data/%s/%s/manifest.json" % (surveyNameAbbv, table)) for table in ['mpecs', 'observers', 'measurers']}, abbv=surveyNameAbbv))
+
+        out.write("""
             <h4>List of Facilities</h4>
             <table id="FAC_table" 
                 class="table table-striped table-bordered table-sm"
@@ -465,17 +322,17 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
                         <th class="th-sm" data-field="count" data-sortable="true">Count</th>
                     </tr>
                 </thead>
-                <tbody>"""
+                <tbody>""")
     
-    for facility, count in survey_data[surveyName]['FAC'].items():
-        o += f"""
+        for facility, count in survey_data[surveyName]['FAC'].items():
+            out.write(f"""
                 <tr>
                     <td>{facility}</td>
                     <td>{count}</td>
                 </tr>
-    """
+    """)
 
-    o += """
+        out.write("""
                 </tbody>
             </table>
         
@@ -484,121 +341,62 @@ def createSurveyPage(surveyName, surveyNameAbbv, codes, includeFirstFU = True):
         -->
 
         <script src="../dist/js/custom_sort.js"></script>
-        </div>"""
-    
-    o += """
-        <footer class="pt-5 my-5 text-muted border-top">
-        Script by <a href="https://www.astro.umd.edu/~qye/">Quanzhi Ye</a> and Taegon Hibbitts, hosted at <a href="https://sbnmpc.astro.umd.edu">SBN-MPC</a>. Powered by <a href="https://getbootstrap.com"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-bootstrap-fill" viewBox="0 0 16 16">
-        <path d="M6.375 7.125V4.658h1.78c.973 0 1.542.457 1.542 1.237 0 .802-.604 1.23-1.764 1.23H6.375zm0 3.762h1.898c1.184 0 1.81-.48 1.81-1.377 0-.885-.65-1.348-1.886-1.348H6.375v2.725z"/>
-        <path d="M4.002 0a4 4 0 0 0-4 4v8a4 4 0 0 0 4 4h8a4 4 0 0 0 4-4V4a4 4 0 0 0-4-4h-8zm1.06 12V3.545h3.399c1.587 0 2.543.809 2.543 2.11 0 .884-.65 1.675-1.483 1.816v.1c1.143.117 1.904.931 1.904 2.033 0 1.488-1.084 2.396-2.888 2.396H5.062z"/>
-        </svg> Bootstrap</a> and <a href="https://bootstrap-table.com">Bootstrap Table</a>.
-            <a href="https://pdssbn.astro.umd.edu/"><img src="../sbn_logo5_v0.png" width="100" style="vertical-align:bottom"></a>
-            <a href="https://github.com/Small-Bodies-Node/mpecwatch"><svg xmlns="http://www.w3.org/2000/svg" width="50" height="50" fill="currentColor" class="bi bi-github" viewBox="0 0 16 16">
-        <path d="M8 0C3.58 0 0 3.58 0 8c0 3.54 2.29 6.53 5.47 7.59.4.07.55-.17.55-.38 0-.19-.01-.82-.01-1.49-2.01.37-2.53-.49-2.69-.94-.09-.23-.48-.94-.82-1.13-.28-.15-.68-.52-.01-.53.63-.01 1.08.58 1.23.82.72 1.21 1.87.87 2.33.66.07-.52.28-.87.51-1.07-1.78-.2-3.64-.89-3.64-3.95 0-.87.31-1.59.82-2.15-.08-.2-.36-1.02.08-2.12 0 0 .67-.21 2.2.82.64-.18 1.32-.27 2-.27.68 0 1.36.09 2 .27 1.53-1.04 2.2-.82 2.2-.82.44 1.1.16 1.92.08 2.12.51.56.82 1.27.82 2.15 0 3.07-1.87 3.75-3.65 3.95.29.25.54.73.54 1.48 0 1.07-.01 1.93-.01 2.2 0 .21.15.46.55.38A8.012 8.012 0 0 0 16 8c0-4.42-3.58-8-8-8z"/>
-        </svg></a>
-        </footer>
-
-        <!-- Bootstrap core JavaScript
-        ================================================== -->
-        <!-- Placed at the end of the document so the pages load faster -->
-        <script src="https://code.jquery.com/jquery-1.12.4.min.js" integrity="sha384-nvAa0+6Qg9clwYCGGPpDQLVpLNn0fRaROjHqs13t4Ggj3Ez50XnGQqc/r8MhnRDZ" crossorigin="anonymous"></script>
-        <script>window.jQuery || document.write('<script src="../assets/js/vendor/jquery.min.js"><\/script>')</script>
-        <script src="../dist/js/bootstrap.min.js"></script>
-        <script src="../assets/js/docs.min.js"></script>
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <script src="../assets/js/ie10-viewport-bug-workaround.js"></script>
-
-        <!-- Bootstrap Table -->
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/tableExport.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/libs/jsPDF/jspdf.umd.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.22.5/dist/bootstrap-table.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.22.5/dist/extensions/export/bootstrap-table-export.min.js"></script>
-    </div>
-  </body>
-</html>"""
-
-    #print(survey)
-    with open(page, 'w', encoding='utf-8') as f:
-        f.write(o)      
-
-def monthly(surveyName, surveyNameAbbv, year, df_month_graph, survey_data):
-    fig = px.bar(df_month_graph, x="Month", y="#MPECs", color="MPECType")
-    fig.write_html("../www/bySurvey/monthly/graphs/"+surveyNameAbbv+"_"+str(year)+".html")
-
-    df_monthly = pd.DataFrame({"Editorial": [], "Discovery": [], "OrbitUpdate": [], "DOU": [], "ListUpdate": [], "Retraction": [], "Other": [], "Followup": [], "FirstFollowup": []})
-    for month in MONTHS:
-        new_row = []
-        for mpecType in MPEC_TYPES:
-            new_row.append(survey_data[surveyName][mpecType][year][month])
-        df_monthly = pd.concat([df_monthly, pd.DataFrame([new_row], index=[month], columns=MPEC_TYPES)])
-
-    page = '../www/bySurvey/monthly/{}.html'.format(surveyNameAbbv+"_"+str(year))
-    o = f"""
-<!DOCTYPE html>
-<html lang="en">
-    <head>
-        <meta charset="utf-8">
-        <meta http-equiv="X-UA-Compatible" content="IE=edge">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <title>MPECWatch: {year} Monthly Summary | {surveyName}</title>
-
-        <!-- Bootstrap core CSS -->
-        <link href="../../dist/css/bootstrap.min.css" rel="stylesheet">
-        <!-- Bootstrap theme -->
-        <link href="../../dist/css/bootstrap-theme.min.css" rel="stylesheet">
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <link href="../../assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
-    </head>
-    <body>
-        <div class="container" theme-showcase" role="main">
-            <h2>{surveyName} {year}</h2>
-            <iframe id="igraph" scrolling="no" style="border:none;" seamless="seamless" src="graphs/{surveyNameAbbv}_{year}.html" height="525" width="100%"></iframe>
-            <table class="table table-striped table-hover table-condensed table-responsive">
-                <thead>
-                    <tr>
-                        <th>Month</th>
-                        <th>Editorial</th>
-                        <th>Discovery</th>
-                        <th>P/R/FU</th>
-                        <th>DOU</th>
-                        <th>List Update</th>
-                        <th>Retraction</th>
-                        <th>Other</th>
-                        <th>Follow-Up</th>
-                        <th>First Follow-Up</th>
-                    </tr>
-            </thead>"""
+        </div>""")
+
+
+# monthly page of a survey for one year, written through PageWriter (see page_layout.py)
+MONTHLY_HEAD = Template("""
+        <h2>%(name)s %(year)s</h2>
+        %(figure)s
+        <table class="table table-striped table-hover table-condensed table-responsive">
+            <thead>
+                <tr>
+                    <th>Month</th>
+                    <th>Editorial</th>
+                    <th>Discovery</th>
+                    <th>P/R/FU</th>
+                    <th>DOU</th>
+                    <th>List Update</th>
+                    <th>Retraction</th>
+                    <th>Other</th>
+                    <th>Follow-Up</th>
+                    <th>First Follow-Up</th>
+                </tr>
+            </thead>
+            <tbody>""")
+MONTHLY_ROW = Template("""
+                <tr>
+                    <td>%(month)s</td>%(cells)s
+                </tr>""")
+MONTHLY_CELL = Template("""
+                    <td>%(count)s</td>""")
+MONTHLY_FOOT = Template("""
+            </tbody>
+        </table>
+        <a href="csv/%(abbv)s_%(year)s.csv" download="%(abbv)s_%(year)s.csv">
+            <p style="padding-bottom: 30px;">Download as csv</p>
+        </a>""")
+
+def monthly_paths(surveyNameAbbv, year):
+    """Page, figure bundle and CSV of the monthly page of a survey for one year"""
+    name = surveyNameAbbv+"_"+str(year)
+    return "../www/bySurvey/monthly/"+name+".html", "../www/bySurvey/monthly/graphs/"+name+".json", "../www/bySurvey/monthly/csv/"+name+".csv"
+
+def monthly(surveyName, surveyNameAbbv, year, breakdown):
+    page, bundle_path, csv_path = monthly_paths(surveyNameAbbv, year)
+    with queue.bundle(bundle_path) as bundle:
+        bundle.add(year, chart('bar', data_frame=breakdown.monthly_frame(year, stacked=False), x="Month", y="#MPECs", color="MPECType"))
+
+    df_monthly = pd.DataFrame(breakdown.monthly(year), index=MONTHS, columns=MPEC_TYPES)
+
+    write_text(csv_path, df_monthly.to_csv())
+    with PageWriter(page, 'MPEC Watch | %s Monthly Summary %s' % (year, surveyName), prefix='../../', active='survey',
+                    extra_scripts=viewer_tags('../../'), credit=CREDIT_QYE_TH) as out:
+        out.render(MONTHLY_HEAD, name=surveyName, year=year, figure=figure_div(f"graphs/{surveyNameAbbv}_{year}.json", year))
+        for month in MONTHS:
+            out.render(MONTHLY_ROW, month=month, cells=''.join(MONTHLY_CELL.render(count=int(df_monthly.loc[month, t])) for t in MPEC_TYPES))
+        out.render(MONTHLY_FOOT, abbv=surveyNameAbbv, year=year)
 
-    for month in MONTHS:
-        o += f"""
-                <tbody>
-                    <tr>
-                        <td>{month}</td>
-                        <td>{int(df_monthly.loc[month, 'Editorial'])}</td>
-                        <td>{int(df_monthly.loc[month, 'Discovery'])}</td>
-                        <td>{int(df_monthly.loc[month, 'OrbitUpdate'])}</td>
-                        <td>{int(df_monthly.loc[month, 'DOU'])}</td>
-                        <td>{int(df_monthly.loc[month, 'ListUpdate'])}</td>
-                        <td>{int(df_monthly.loc[month, 'Retraction'])}</td>
-                        <td>{int(df_monthly.loc[month, 'Other'])}</td>
-                        <td>{int(df_monthly.loc[month, 'Followup'])}</td>
-                        <td>{int(df_monthly.loc[month, 'FirstFollowup'])}</td>
-                    </tr>"""
-
-    df_monthly.to_csv(f"../www/bySurvey/monthly/csv/{surveyNameAbbv}_{year}.csv")
-    o += f"""      
-                </tbody>
-            </table>
-            <a href="csv/{surveyNameAbbv}_{year}.csv" download="{surveyNameAbbv}_{year}.csv">
-                <p style="padding-bottom: 30px;">Download as csv</p>
-            </a>
-        </div>
-    </body>
-</html>"""
-    
-    with open(page, 'w', encoding='utf-8') as f:
-            f.write(o)
-      
 survey_def_table = [['Lincoln Near Earth Asteroid Research (LINEAR)', ['704'], 'linear'], \
                     ['Space Surveillance Telescope (SST)', ['G45', 'P07'], 'sst'], \
                     ['Near-Earth Asteroid Tracking (NEAT)', ['566', '608', '644'], 'neat'], \
@@ -629,108 +427,57 @@ cursor = db.cursor()
 with open(mpccode) as mpccode:
     mpccode = json.load(mpccode)
 
+install_script()
+
+# the figures of the survey pages are built by a pool of worker processes (see figure_queue.py)
+queue = FigureQueue()
+frozen = FrozenOutputs()
+
 # with open(survey_data) as survey_data:
 #     survey_data = json.load(survey_data)
     
 YEARS_STR = [str(year) for year in YEARS]
 pages = YEARS_STR + ['All time']
 
+# the survey pages do not depend on the period of the summary pages below: each is made once
+for s in survey_def_table:
+    print(s[0])
+    createSurveyPage(s[0], s[2], s[1])
+
+def page_inputs(p):
+    """Hash of everything the summary page of year p shows: the year links, the surveys, their stations and their counters of that year"""
+    return digest(pages, [(s[0], s[2], [(code, mpccode[code]['name'], year_hash(stat[code], p)) for code in s[1]]) for s in survey_def_table])
+
 for p in pages:
     # testing only all time
     # if p != 'All time':
     #     continue
 
-    o = f"""
-    <!doctype html>
-    <html lang="en">
-      <head>
-        <!-- Google tag (gtag.js) -->
-          <script async src="https://www.googletagmanager.com/gtag/js?id=G-WTXHKC28G9"></script>
-          <script>
-            window.dataLayer = window.dataLayer || [];
-            function gtag(){{dataLayer.push(arguments);}}
-            gtag('js', new Date());
-            gtag('config', 'G-WTXHKC28G9');
-          </script>
-        <meta charset="utf-8">
-        <meta http-equiv="X-UA-Compatible" content="IE=edge">
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <!-- The above 3 meta tags *must* come first in the head; any other head content must come *after* these tags -->
-        <meta name="description" content="">
-        <meta name="author" content="">
-        <link rel="icon" href="favicon.ico">
-    
-        <title>MPEC Watch | Global Statistics {p}</title>
-    
-        <!-- Bootstrap core CSS -->
-        <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-table@1.22.5/dist/bootstrap-table.min.css">
-        <link href="dist/css/bootstrap.min.css" rel="stylesheet">
-        <!-- Bootstrap theme -->
-        <link href="dist/css/bootstrap-theme.min.css" rel="stylesheet">
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <link href="assets/css/ie10-viewport-bug-workaround.css" rel="stylesheet">
-    
-        <!-- Custom styles for this template -->
-        <link href="theme.css" rel="stylesheet">
-    
-        <!-- Just for debugging purposes. Don't actually copy these 2 lines! -->
-        <!--[if lt IE 9]><script src="assets/js/ie8-responsive-file-warning.js"></script><![endif]-->
-        <script src="assets/js/ie-emulation-modes-warning.js"></script>
-    
-        <!-- HTML5 shim and Respond.js for IE8 support of HTML5 elements and media queries -->
-        <!--[if lt IE 9]>
-          <script src="https://oss.maxcdn.com/html5shiv/3.7.3/html5shiv.min.js"></script>
-          <script src="https://oss.maxcdn.com/respond/1.4.2/respond.min.js"></script>
-        <![endif]-->
-        
-        <link rel="stylesheet" href="https://use.fontawesome.com/releases/v5.6.3/css/all.css" integrity="sha384-UHRtZLI+pbxtHCWp1t77Bi1L4ZtiqrqD80Kn4Z8NTSRyMA2Fd33n5dQ8lWUE00s/" crossorigin="anonymous">
-      </head>
-    
-      <body>
-    
-        <!-- Fixed navbar -->
-        <nav class="navbar navbar-inverse navbar-fixed-top">
-          <div class="container">
-            <div class="navbar-header">
-              <button type="button" class="navbar-toggle collapsed" data-toggle="collapse" data-target="#navbar" aria-expanded="false" aria-controls="navbar">
-                <span class="sr-only">Toggle navigation</span>
-                <span class="icon-bar"></span>
-                <span class="icon-bar"></span>
-                <span class="icon-bar"></span>
-              </button>
-              <a class="navbar-brand" href="#">MPEC Watch</a>
-            </div>
-            <div id="navbar" class="navbar-collapse collapse">
-              <ul class="nav navbar-nav">
-                <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/index.html">Home</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/obs.html">Observatory Browser</a></li>
-            <li class="active"><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">Survey Browser</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/stats.html">Various Statistics</a></li>
-            <!-- <li><a href="https://sbnmpc.astro.umd.edu/mpecwatch/mpc_stuff.html">MPC Stuff (non-public)</a></li> -->
-            <li><a href="https://github.com/Yeqzids/mpecwatch/issues">Issue Tracker</a></li>
-            <li><a href="https://sbnmpc.astro.umd.edu">SBN-MPC Annex</a></li>
-              </ul>
-            </div><!--/.nav-collapse -->
-          </div>
-        </nav>
-    
-        <div class="container theme-showcase" role="main">
-        
-        <!-- Main jumbotron for a primary marketing message or call to action -->
-    """
+    if p == 'All time':
+        path = '../www/survey.html'
+    else:
+        path = '../www/survey-%s.html' % str(p)
+        # the pages of closed years are only rewritten when their counters change (see frozen_years.py)
+        if closed(p):
+            inputs = page_inputs(p)
+            if frozen.current('survey/' + p, inputs, path):
+                continue
+            frozen.add('survey/' + p, inputs, path)
+
+    with PageWriter(path, 'MPEC Watch | Global Statistics %s' % p, active='survey', extra_scripts=volatile_tag()) as out:
     
-    # Table of MPECs by year and type
+        # Table of MPECs by year and type
     
-    o += f"""
+        out.write(f"""
           <div class="page-header">
             <h1>Statistics by Survey - {p}</h1>
-            <p><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">All time</a> """
+            <p><a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey.html">All time</a> """)
             
-    for pp in pages[:-1]:
-        pp = str(pp)
-        o += f""" | <a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey-{pp}.html">{pp}</a>"""
+        for pp in pages[:-1]:
+            pp = str(pp)
+            out.write(f""" | <a href="https://sbnmpc.astro.umd.edu/mpecwatch/survey-{pp}.html">{pp}</a>""")
         
-    o += """
+        out.write("""
             </p>
           </div>
           <p>
@@ -743,9 +490,9 @@ for p in pages:
           </p>
           <p>
             Last update: UTC %s
-          </p>""" % (datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+          </p>""" % placeholder('updated'))
           
-    o += """
+        out.write("""
           <div class="page-header">
           <table id="obs_table" class="table table-striped"
               data-toggle="table"
@@ -783,38 +530,35 @@ for p in pages:
                 </tr>
               </thead>
               <tbody>
-    """
-    print("Year: ", p)
-    for s in survey_def_table:
+    """)
+        print("Year: ", p)
+        for s in survey_def_table:
         
-        survey = s[0]
-        survey_abbv = s[2]
+            survey = s[0]
+            survey_abbv = s[2]
         
-        
-        print(survey)
-        createSurveyPage(survey, survey_abbv, s[1])
-        if p == 'All time':
-            o += f"""
+            if p == 'All time':
+                out.write(f"""
             <tr>
                 <td>
                     <a href="https://sbnmpc.astro.umd.edu/mpecwatch/bySurvey/{survey_abbv}.html">{survey}</a>
                 </td> 
-                <td> """
-        else:
-            o += f"""
+                <td> """)
+            else:
+                out.write(f"""
                 <tr>
                     <td>
                         <a href="https://sbnmpc.astro.umd.edu/mpecwatch/bySurvey/monthly/{survey_abbv}.html">{survey}</a>
                     </td> 
-                    <td> """
+                    <td> """)
 
-        for codi in s[1]:
-            o += f"""<a href="https://sbnmpc.astro.umd.edu/mpecwatch/byStation/station_{codi}.html">{codi} {mpccode[codi]['name']}</a><br>"""
+            for codi in s[1]:
+                out.write(f"""<a href="https://sbnmpc.astro.umd.edu/mpecwatch/byStation/station_{codi}.html">{codi} {mpccode[codi]['name']}</a><br>""")
 
-        o += """</td>"""
+            out.write("""</td>""")
 
-        if p == 'All time':
-            o += f"""
+            if p == 'All time':
+                out.write(f"""
                     <td>{sum([stat[i]['total'] for i in s[1]])}</td>
                     <td>{sum([stat[i]['Discovery']['total'] for i in s[1]])}</td>
                     <td>{sum([sum(stat[i]['Discovery'][year]['NEA'] for year in YEARS_STR) for i in s[1]])}</td>
@@ -839,9 +583,9 @@ for p in pages:
                     <td>{sum([stat[i]['OrbitUpdate']['total'] for i in s[1]])}</td>
                     <td>{sum([stat[i]['1stRecovery']['total'] for i in s[1]])}</td>
                 </tr>
-            """
-        else:
-            o += f"""
+            """)
+            else:
+                out.write(f"""
                     <td>{sum(stat[i][str(p)] for i in s[1])}</td>
                     <td>{sum([stat[i]['Discovery'][str(p)]['total'] for i in s[1]])}</td>
                     <td>{sum([stat[i]['Discovery'][str(p)]['NEA'] for i in s[1]])}</td>
@@ -866,66 +610,16 @@ for p in pages:
                     <td>{str(sum(stat[i]['OrbitUpdate'][str(p)]['total'] for i in s[1]))}</td>
                     <td>{str(sum(stat[i]['1stRecovery'][str(p)]['total'] for i in s[1]))}</td>
                 </tr>
-            """
+            """)
         
-    o += """
+        out.write("""
         </tbody>
     </table>
     </div>
-    """
-    
-    o += """
-    	<footer class="pt-5 my-5 text-muted border-top">
-        Script by <a href="https://www.astro.umd.edu/~qye/">Quanzhi Ye</a>, hosted at <a href="https://sbnmpc.astro.umd.edu">SBN-MPC</a>. Powered by <a href="https://getbootstrap.com"><svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" fill="currentColor" class="bi bi-bootstrap-fill" viewBox="0 0 16 16">
-  <path d="M6.375 7.125V4.658h1.78c.973 0 1.542.457 1.542 1.237 0 .802-.604 1.23-1.764 1.23H6.375zm0 3.762h1.898c1.184 0 1.81-.48 1.81-1.377 0-.885-.65-1.348-1.886-1.348H6.375v2.725z"/>
-  <path d="M4.002 0a4 4 0 0 0-4 4v8a4 4 0 0 0 4 4h8a4 4 0 0 0 4-4V4a4 4 0 0 0-4-4h-8zm1.06 12V3.545h3.399c1.587 0 2.543.809 2.543 2.11 0 .884-.65 1.675-1.483 1.816v.1c1.143.117 1.904.931 1.904 2.033 0 1.488-1.084 2.396-2.888 2.396H5.062z"/>
-</svg> Bootstrap</a> and <a href="https://bootstrap-table.com">Bootstrap Table</a>.
-        <a href="https://pdssbn.astro.umd.edu/"><img src="sbn_logo5_v0.png" width="100" style="vertical-align:bottom"></a>
-        <a href="https://github.com/Small-Bodies-Node/mpecwatch"><svg xmlns="http://www.w3.org/2000/svg" width="50" height="50" fill="currentColor" class="bi bi-github" viewBox="0 0 16 16">
-  <path d="M8 0C3.58 0 0 3.58 0 8c0 3.54 2.29 6.53 5.47 7.59.4.07.55-.17.55-.38 0-.19-.01-.82-.01-1.49-2.01.37-2.53-.49-2.69-.94-.09-.23-.48-.94-.82-1.13-.28-.15-.68-.52-.01-.53.63-.01 1.08.58 1.23.82.72 1.21 1.87.87 2.33.66.07-.52.28-.87.51-1.07-1.78-.2-3.64-.89-3.64-3.95 0-.87.31-1.59.82-2.15-.08-.2-.36-1.02.08-2.12 0 0 .67-.21 2.2.82.64-.18 1.32-.27 2-.27.68 0 1.36.09 2 .27 1.53-1.04 2.2-.82 2.2-.82.44 1.1.16 1.92.08 2.12.51.56.82 1.27.82 2.15 0 3.07-1.87 3.75-3.65 3.95.29.25.54.73.54 1.48 0 1.07-.01 1.93-.01 2.2 0 .21.15.46.55.38A8.012 8.012 0 0 0 16 8c0-4.42-3.58-8-8-8z"/>
-</svg></a>
-      </footer>
-    
-        <!-- Bootstrap core JavaScript
-        ================================================== -->
-        <!-- Placed at the end of the document so the pages load faster -->
-        <!--
-        <script src="https://code.jquery.com/jquery-1.12.4.min.js" integrity="sha384-nvAa0+6Qg9clwYCGGPpDQLVpLNn0fRaROjHqs13t4Ggj3Ez50XnGQqc/r8MhnRDZ" crossorigin="anonymous"></script>
-        <script>window.jQuery || document.write('<script src="assets/js/vendor/jquery.min.js"><\/script>')</script>
-
-        <script src="https://cdn.jsdelivr.net/npm/jquery/dist/jquery.min.js"></script>
-        -->
-
-        <script
-        src="https://code.jquery.com/jquery-3.7.1.min.js"
-        integrity="sha256-/JqT3SQfawRcv/BIHPThkBvs0OEvtFFmqPF/lYI/Cxo="
-        crossorigin="anonymous"></script>
-
-        <script src="dist/js/bootstrap.min.js"></script>
-        <script src="assets/js/docs.min.js"></script>
-        <!-- IE10 viewport hack for Surface/desktop Windows 8 bug -->
-        <script src="assets/js/ie10-viewport-bug-workaround.js"></script>
-        
-        <script src="https://cdn.jsdelivr.net/npm/popper.js@1.16.0/dist/umd/popper.min.js"></script>
+    """)
 
-        <!-- Export table
-        <script type="text/javascript" src="extensions/export/libs/FileSaver/FileSaver.min.js"></script>
-        <script type="text/javascript" src="extensions/export/libs/js-xlsx/xlsx.core.min.js"></script>
-        <script type="text/javascript" src="extensions/export/libs/html2canvas/html2canvas.min.js"></script>
-        <script src="extensions/export/tableExport.min.js">$('#obs_table').tableExport({type:'csv'});</script>
-        -->
-
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/tableExport.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/tableexport.jquery.plugin@1.29.0/libs/jsPDF/jspdf.umd.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.22.5/dist/bootstrap-table.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap-table@1.22.5/dist/extensions/export/bootstrap-table-export.min.js"></script>
-
-      </body>
-    </html>"""
-    
-    if p == 'All time':
-        with open('../www/survey.html', 'w', encoding='utf-8') as f:
-          f.write(o)
-    else:
-        with open('../www/survey-%s.html' % str(p), 'w', encoding='utf-8') as f:
-          f.write(o)
+failures = queue.close()
+frozen.commit(path for path, name, error in failures)
+report()
+report_outputs()
+mark_updated()
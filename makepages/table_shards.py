@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Write large tables as paginated, gzip-compressed JSON shards
+
+ Instead of inlining every row of a large table into the page, the rows are written
+ to fixed-size shards next to a manifest:
+
+    <directory>/manifest.json        {"version": 1, "columns": [...], "total": N,
+                                      "page_size": 500, "pages": ["page_00000.json.gz", ...]}
+    <directory>/page_00000.json.gz   [{"<column>": <cell>, ...}, ...]
+
+ and bootstrap-table loads them on demand in server-side pagination mode (see
+ SCRIPT below, installed as ../www/dist/js/table_shards.js), so only the shards
+ of the page on screen are fetched. Searching or sorting a sharded table loads all
+ of its shards once. Rows are dicts keyed by the data-field of the table columns;
+ a row may carry an `_export` dict, used instead of the cells by the CSV export.
+
+ Usage:
+    with ShardWriter('../www/byStation/data/station_X/mpecs', ['index', 'name']) as shards:
+        for row in rows:
+            shards.add(row)
+    <table data-toggle="table" data-pagination="true" %s> % table_attrs('data/station_X/mpecs/manifest.json')
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, io, json, gzip
+from output_writer import write_bytes, write_text
+
+SHARD_VERSION = 1
+PAGE_SIZE = 500
+MANIFEST = 'manifest.json'
+SCRIPT_ASSET = 'dist/js/table_shards.js'    # relative to ../www
+
+class ShardWriter:
+    """Write the rows of one table to `directory`; holds at most one shard in memory"""
+
+    def __init__(self, directory, columns, page_size=PAGE_SIZE):
+        self.directory = directory
+        self.columns = list(columns)
+        self.page_size = page_size
+        self.rows = []
+        self.pages = []
+        self.total = 0
+        self.manifest = None
+        os.makedirs(directory, exist_ok=True)
+
+    def add(self, row):
+        self.rows.append(row)
+        self.total += 1
+        if len(self.rows) >= self.page_size:
+            self._flush()
+
+    def _flush(self):
+        name = 'page_%05i.json.gz' % len(self.pages)
+        # mtime=0 keeps the output byte-identical when the rows are unchanged, so the shard is not rewritten
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as g:
+            g.write(json.dumps(self.rows, separators=(',', ':'), default=str).encode())
+        write_bytes(os.path.join(self.directory, name), buffer.getvalue())
+        self.pages.append(name)
+        self.rows = []
+
+    def close(self):
+        if self.rows:
+            self._flush()
+        self.manifest = {'version': SHARD_VERSION, 'columns': self.columns, 'total': self.total, 'page_size': self.page_size, 'pages': self.pages}
+        write_text(os.path.join(self.directory, MANIFEST), json.dumps(self.manifest))
+        # shards left over from a longer version of the table
+        for name in os.listdir(self.directory):
+            if name.startswith('page_') and name not in self.pages:
+                os.remove(os.path.join(self.directory, name))
+        return self.manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+def write_table(directory, columns, rows, page_size=PAGE_SIZE):
+    """Shard an iterable of rows; returns the manifest"""
+    with ShardWriter(directory, columns, page_size) as shards:
+        for row in rows:
+            shards.add(row)
+    return shards.manifest
+
+def table_attrs(manifest_url):
+    """bootstrap-table attributes of a table backed by the shards at manifest_url (relative to the page)"""
+    return 'data-side-pagination="server" data-ajax="shardTableAjax" data-shards="%s"' % manifest_url
+
+def script_tag(prefix=''):
+    return '\n    <script src="%s%s"></script>' % (prefix, SCRIPT_ASSET)
+
+SCRIPT = r"""/*
+ * MPEC Watch: bootstrap-table server-side pagination over static JSON shards
+ * written by makepages/table_shards.py. Tables opt in with
+ *   data-side-pagination="server" data-ajax="shardTableAjax" data-shards="<manifest url>"
+ */
+(function () {
+  var manifests = {}, shards = {};
+
+  function base(url) {
+    return url.substring(0, url.lastIndexOf('/') + 1);
+  }
+
+  function fetchShard(url) {
+    return fetch(url).then(function (response) {
+      if (!response.ok) throw new Error(url + ': HTTP ' + response.status);
+      return response.arrayBuffer();
+    }).then(function (buffer) {
+      var bytes = new Uint8Array(buffer);
+      // servers that send .gz files with Content-Encoding: gzip have already decoded them
+      if (bytes.length > 1 && bytes[0] === 0x1f && bytes[1] === 0x8b) {
+        return new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'))).text();
+      }
+      return new TextDecoder().decode(bytes);
+    }).then(JSON.parse);
+  }
+
+  function manifest(url) {
+    if (!manifests[url]) {
+      manifests[url] = fetch(url).then(function (response) {
+        if (!response.ok) throw new Error(url + ': HTTP ' + response.status);
+        return response.json();
+      });
+    }
+    return manifests[url];
+  }
+
+  function shard(url, m, i) {
+    var shardUrl = base(url) + m.pages[i];
+    if (!shards[shardUrl]) shards[shardUrl] = fetchShard(shardUrl);
+    return shards[shardUrl];
+  }
+
+  function rowsOf(url, m, first, last) {
+    var wanted = [];
+    for (var i = first; i <= last && i < m.pages.length; i++) wanted.push(shard(url, m, i));
+    return Promise.all(wanted).then(function (pages) {
+      return [].concat.apply([], pages);
+    });
+  }
+
+  function text(value) {
+    return String(value === null || value === undefined ? '' : value).replace(/<[^>]*>/g, '');
+  }
+
+  function compare(a, b) {
+    var ta = text(a), tb = text(b), x = Number(ta), y = Number(tb);
+    if (ta !== '' && tb !== '' && !isNaN(x) && !isNaN(y)) return x - y;
+    return ta.localeCompare(tb);
+  }
+
+  window.shardTableAjax = function (request) {
+    var url = this.$el.attr('data-shards'), q = request.data || {};
+    manifest(url).then(function (m) {
+      var offset = +q.offset || 0, limit = +q.limit || m.total;
+      if (!q.search && !q.sort) {
+        var first = Math.floor(offset / m.page_size), last = Math.floor((offset + limit - 1) / m.page_size);
+        return rowsOf(url, m, first, last).then(function (rows) {
+          var start = offset - first * m.page_size;
+          return {total: m.total, rows: rows.slice(start, start + limit)};
+        });
+      }
+      // searching and sorting need the whole table
+      return rowsOf(url, m, 0, m.pages.length - 1).then(function (rows) {
+        if (q.search) {
+          var s = String(q.search).toLowerCase();
+          rows = rows.filter(function (row) {
+            return m.columns.some(function (c) { return text(row[c]).toLowerCase().indexOf(s) >= 0; });
+          });
+        }
+        if (q.sort) {
+          var sign = q.order === 'desc' ? -1 : 1;
+          rows = rows.slice().sort(function (a, b) { return sign * compare(a[q.sort], b[q.sort]); });
+        }
+        return {total: rows.length, totalNotFiltered: m.total, rows: rows.slice(offset, offset + limit)};
+      });
+    }).then(request.success, function (error) {
+      console.error(error);
+      request.error(error);
+    });
+  };
+
+  function csvCell(value) {
+    if (value === null || value === undefined) return '""';
+    var str = String(value);
+    if (/[",\n]/.test(str)) return '"' + str.replace(/"/g, '""') + '"';
+    return str;
+  }
+
+  // CSV of every row of a sharded table (the rows' _export dicts where present)
+  window.exportShardsCSV = function (tableId, filename) {
+    var url = document.getElementById(tableId).getAttribute('data-shards');
+    return manifest(url).then(function (m) {
+      return rowsOf(url, m, 0, m.pages.length - 1).then(function (rows) {
+        var data = rows.map(function (row) {
+          if (row._export) return row._export;
+          var plain = {};
+          m.columns.forEach(function (c) { plain[c] = text(row[c]); });
+          return plain;
+        });
+        if (!data.length) {
+          console.warn('No data available to export.');
+          return;
+        }
+        var headers = Object.keys(data[0]), lines = [headers.map(csvCell).join(',')];
+        data.forEach(function (row) {
+          lines.push(headers.map(function (h) { return csvCell(row[h]); }).join(','));
+        });
+        var link = document.createElement('a');
+        link.href = URL.createObjectURL(new Blob([lines.join('\r\n')], {type: 'text/csv;charset=utf-8;'}));
+        link.setAttribute('download', filename);
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+        URL.revokeObjectURL(link.href);
+      });
+    });
+  };
+})();
+"""
+
+def install_script(www='../www'):
+    """Write the shard loader to ../www/dist/js/table_shards.js if it is missing or out of date"""
+    write_text(os.path.join(www, SCRIPT_ASSET), SCRIPT)
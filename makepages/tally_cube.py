@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Yearly MPEC tally cube (year x MPECType x ObjectType)
+
+ The cube is built by a single GROUP BY over the MPEC table and saved to mpec_tally.json
+ together with a schema version. MPECTally.py builds and writes it; home.py reads it and
+ only rebuilds it when the file is missing or has another schema version. Years are
+ taken in local time, as the per-year queries of both scripts did.
+
+ File layout:
+    {"schema": 1, "columns": ["Year", "MPECType", "ObjectType", "#MPECs"], "rows": [[1993, "Discovery", "NEA", 3], ...]}
+
+ (C) Quanzhi Ye
+
+"""
+
+import json
+
+SCHEMA_VERSION = 1
+CUBE_FILE = 'mpec_tally.json'
+COLUMNS = ["Year", "MPECType", "ObjectType", "#MPECs"]
+
+MPEC_TYPES = ["Editorial", "Discovery", "OrbitUpdate", "DOU", "ListUpdate", "Retraction", "Other"]
+
+def build_cube(cursor):
+    cursor.execute("""
+        SELECT CAST(strftime('%Y', Time, 'unixepoch', 'localtime') AS INTEGER) AS Year,
+               MPECType,
+               COALESCE(ObjectType, '') AS ObjectType,
+               COUNT(*)
+        FROM MPEC
+        GROUP BY 1, 2, 3
+        ORDER BY 1, 2, 3
+    """)
+    return {'schema': SCHEMA_VERSION, 'columns': COLUMNS, 'rows': [list(row) for row in cursor.fetchall()]}
+
+def write_cube(cube, path=CUBE_FILE):
+    with open(path, 'w') as f:
+        json.dump(cube, f)
+
+def load_cube(path=CUBE_FILE):
+    """The saved cube, or None if there is none or it has another schema version."""
+    try:
+        with open(path) as f:
+            cube = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if cube.get('schema') != SCHEMA_VERSION:
+        return None
+    return cube
+
+def load_or_build(cursor, path=CUBE_FILE):
+    cube = load_cube(path)
+    if cube is None:
+        cube = build_cube(cursor)
+        write_cube(cube, path)
+    return cube
+
+def counts_by_year_type(cube):
+    """{(year, MPECType): count}, summed over object types"""
+    counts = {}
+    for year, mpec_type, obj_type, n in cube['rows']:
+        counts[(year, mpec_type)] = counts.get((year, mpec_type), 0) + n
+    return counts
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+ PROJECT:		MPEC Watch
+ PURPOSE:		Keep values that change on every run out of the pages
+
+ Run times ("Last update") and date windows ("Last 1 year (X to Y)") would make pages
+ differ on every run although their data did not change, so they would be rewritten,
+ synced and re-downloaded every day (see output_writer.py). Instead they are kept in
+ one small file,
+
+    ../www/volatile.json        {"updated": "2024-05-01 04:00:12", "window_1y": "...", ...}
+
+ and the pages carry placeholders, filled in when the page is loaded by
+ ../www/dist/js/volatile.js (SCRIPT below):
+
+    <span data-volatile="updated"></span>
+
+ "updated" is the time of the last run of any generator: pages that were not rewritten
+ are still current as of that run.
+
+ Usage:
+    with PageWriter(path, title, extra_scripts=volatile_tag()) as out:
+        out.write('Last update: UTC %s' % placeholder('updated'))
+    mark_updated()
+
+ (C) Quanzhi Ye
+
+"""
+
+import os, json, datetime
+from output_writer import write_text
+
+VALUES = 'volatile.json'                    # relative to ../www
+SCRIPT_ASSET = 'dist/js/volatile.js'        # relative to ../www
+WWW = '../www'
+
+def placeholder(key):
+    return '<span data-volatile="%s"></span>' % key
+
+def volatile_tag(prefix=''):
+    """<script> tag filling the placeholders of a page at `prefix` from the site root"""
+    return '\n    <script src="%s%s" data-values="%s%s"></script>' % (prefix, SCRIPT_ASSET, prefix, VALUES)
+
+SCRIPT = r"""/*
+ * MPEC Watch: fill the <span data-volatile="<key>"></span> placeholders of a page with
+ * the values in volatile.json, written by makepages/volatile.py.
+ */
+(function () {
+  var url = document.currentScript.getAttribute('data-values');
+  fetch(url, {cache: 'no-cache'}).then(function (response) {
+    if (!response.ok) throw new Error(url + ': HTTP ' + response.status);
+    return response.json();
+  }).then(function (values) {
+    document.querySelectorAll('[data-volatile]').forEach(function (el) {
+      var value = values[el.getAttribute('data-volatile')];
+      if (value !== undefined && value !== null) el.textContent = value;
+    });
+  }).catch(function (error) {
+    console.error(error);
+  });
+})();
+"""
+
+def update(www=WWW, **values):
+    """Set some of the values; the others are kept"""
+    path = os.path.join(www, VALUES)
+    try:
+        with open(path) as f:
+            current = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        current = {}
+    current.update(values)
+    write_text(path, json.dumps(current, sort_keys=True, indent=1))
+    write_text(os.path.join(www, SCRIPT_ASSET), SCRIPT)
+
+def mark_updated(www=WWW):
+    """Record the time of this run as the "Last update" of every page"""
+    update(www, updated=datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
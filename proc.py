@@ -60,6 +60,47 @@ TABLE DOUIdentifier: Stores DOU identification relationships
     IsRetracted BOOLEAN DEFAULT 0	Flag indicating if the entry is retracted (1=retracted, 0=not retracted)
     PRIMARY KEY (MPECId, DOU, RelatedDOU)
 
+TABLE Person: Canonical observers and measurers
+    PersonId	INTEGER PRIMARY KEY	Person identifier
+    Name		TEXT UNIQUE			Canonical (normalized) name
+
+TABLE PersonAlias: Names as published (normalized), resolved to persons
+    Alias		TEXT PRIMARY KEY	Normalized name
+    PersonId	INTEGER				Person identifier
+
+TABLE PersonBlock: Blocking keys of each person, used to find the fuzzy-match candidates of a new name
+    Key			TEXT				Word of 3+ letters or initials of the canonical name (see makepages/name_map.py)
+    PersonId	INTEGER				Person identifier
+    PRIMARY KEY (Key, PersonId)
+
+TABLE MPECPersons: Observers and measurers of each station in an MPEC
+    MPECId		TEXT				MPEC Number
+    StationCode	TEXT				Observatory code
+    Role		TEXT				OBS (observer) or MEA (measurer)
+    PersonId	INTEGER				Person identifier
+    RawName		TEXT				Name as published in the MPEC
+    PRIMARY KEY (MPECId, StationCode, Role, PersonId)
+
+TABLE PersonIndex: Activity of each person by station and role, updated as MPECPersons rows are added
+    PersonId	INTEGER				Person identifier
+    StationCode	TEXT				Observatory code
+    Role		TEXT				OBS (observer) or MEA (measurer)
+    MPECCount	INTEGER				Number of MPECs
+    FirstYear	INTEGER				Year (UTC) of the first MPEC
+    LastYear	INTEGER				Year (UTC) of the last MPEC
+    PRIMARY KEY (PersonId, StationCode, Role)
+
+TABLE StationObjects: Objects observed by each station, updated as observations are added to the station tables
+    StationCode	TEXT				Observatory code
+    ObjectId	TEXT				Object designation in packed form
+    ObsCount	INTEGER				Number of observations
+    Discoveries	INTEGER				Number of observations with the discovery asterisk
+    FirstObs	INTEGER				Time of the first observation (Unix timestamp)
+    LastObs		INTEGER				Time of the last observation (Unix timestamp)
+    MPECCount	INTEGER				Number of MPECs with observations of the object by the station
+    LastMag		REAL				Magnitude of the last observation
+    PRIMARY KEY (StationCode, ObjectId)
+
 TABLE LastRun: Tracks processing status of stations and other entities
     MPECId        TEXT PRIMARY KEY   Identifier (e.g., 'station_G96' for observatory code G96)
     LastRunTime   INTEGER            Unix timestamp of when the data was last processed (currently not used)
@@ -77,6 +118,10 @@ import time, csv, traceback, calendar
 from urllib.request import urlopen
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'makepages'))
+from name_map import PersonResolver
+from station_objects import StationObjectSummary
+
 ym = sys.argv[1]
 dbFile = 'mpecwatch_v4.db'
 
@@ -545,6 +590,12 @@ else:
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_mpec_stations_code ON MPEC_Stations(StationCode);")
     db.commit()
 
+# canonical observers and measurers (tables Person, PersonAlias, PersonBlock, MPECPersons, PersonIndex; see makepages/name_map.py)
+person_resolver = PersonResolver(cursor)
+# per-station object summary (TABLE StationObjects; see makepages/station_objects.py)
+station_objects = StationObjectSummary(cursor)
+db.commit()
+
 # Keep track of the current line being parsed for debugging
 current_line = ""
 for halfmonth in month_to_letter(ym[4:6]):
@@ -600,6 +651,8 @@ for halfmonth in month_to_letter(ym[4:6]):
 
             # set of unique objects in this MPEC
             mpec_objects = set()
+            # stations whose observers and measurers have been resolved for this MPEC
+            person_stations = set()
 
             ## push observation into MPEC TABLE of individual observatory code if mpec_type is Discovery, OrbitUpdate or DOU
             if mpec_type in ('Discovery', 'OrbitUpdate', 'DOU'):
@@ -810,6 +863,11 @@ for halfmonth in month_to_letter(ym[4:6]):
                                 facility = ''
                             else:
                                 observer, measurer, facility = observer_measurer_facility(obs_details, obs_code)
+                                if obs_code not in person_stations:
+                                    person_stations.add(obs_code)
+                                    mpec_year = dt.datetime.utcfromtimestamp(mpec_timestamp).year
+                                    person_resolver.add_mpec_persons(mpec_id, obs_code, 'OBS', observer, mpec_year)
+                                    person_resolver.add_mpec_persons(mpec_id, obs_code, 'MEA', measurer, mpec_year)
                             
                             obs_code_collection.append(obs_code)
                             if line[12:13] == '*':
@@ -830,11 +888,13 @@ for halfmonth in month_to_letter(ym[4:6]):
                                 cursor.execute("CREATE TABLE station_" + obs_code + "(Object TEXT, Time INTEGER, Observer TEXT, Measurer TEXT, Facility TEXT, MPEC TEXT, MPECType TEXT, ObjectType TEXT, Discovery INTEGER)")
                                 db.commit()
                             
-                            # Check for duplicates before inserting
-                            cursor.execute("SELECT 1 FROM station_" + obs_code + " WHERE Object=? AND Time=? AND MPEC=?", (obs_obj, obs_date_timestamp, mpec_id))
-                            if not cursor.fetchone():
+                            # Check for duplicates before inserting (observations of this object already recorded from this MPEC)
+                            cursor.execute("SELECT Time FROM station_" + obs_code + " WHERE Object=? AND MPEC=?", (obs_obj, mpec_id))
+                            recorded = [row[0] for row in cursor.fetchall()]
+                            if obs_date_timestamp not in recorded:
                                 cursor.execute("INSERT INTO station_" + obs_code + "(Object, Time, Observer, Measurer, Facility, MPEC, MPECType, ObjectType, Discovery) VALUES(?,?,?,?,?,?,?,?,?)", \
                                 (obs_obj, obs_date_timestamp, observer, measurer, facility, mpec_id, mpec_type, mpec_obj_type, int(discovery_asterisk)))
+                                station_objects.add_observation(obs_code, obs_obj, obs_date_timestamp, discovery_asterisk, mag, new_mpec=not recorded)
                                 db.commit()
 
                             ### write to TABLE Objects
@@ -935,6 +995,11 @@ cursor.execute("CREATE INDEX IF NOT EXISTS idx_object_id ON Objects(ObjectId);")
 cursor.execute("CREATE INDEX IF NOT EXISTS idx_objecttype_time ON MPEC(ObjectType, Time);") # Found in MPECTally.py, survey.py
 db.commit()
 
+# bump the ingest generation counter; cached query results (makepages/query_cache.py) are dropped when it changes
+generation = cursor.execute("PRAGMA user_version").fetchone()[0]
+cursor.execute("PRAGMA user_version = %i" % (generation + 1))
+db.commit()
+
 time_end = time.time()
 print(f'Processing time for {ym}: {str(time_end - time_start)} seconds')
 db.close()
\ No newline at end of file